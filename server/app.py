@@ -1,27 +1,218 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+import itertools
+import json
 import os
-from prophet_model import ProphetTourismModel
+import threading
+import time
+from forecast_cache import normalize_start_date
+from forecast_export import EXPORT_FORMATS, stream_export
+from forecast_jobs import ForecastJobManager, JobQueueFull
+from instrumentation import (REQUEST_SECONDS, current_profile, finish_profile, profiled_stream, render_metrics,
+                             start_profile, timed)
+from reconciliation import DEFAULT_RECONCILIATION_METHOD, RECONCILIATION_METHODS
+from scenarios import Scenario
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Records JSON serialization time for every jsonify() response"""
+
+    def dumps(self, obj, **kwargs):
+        with timed('serialize'):
+            return super().dumps(obj, **kwargs)
+
 
 app = Flask(__name__)
+app.json = TimedJSONProvider(app)
 CORS(app)
 
 AGGREGATED_MODEL_PATH = './model/aggregated_model.json'
 AGGREGATED_DATA_PATH = './dataset/aggregated_dataset.csv'
 
 COUNTRY_SPECIFIC_DATA_PATH = './dataset/country_monthly_dataset.csv'
+COUNTRY_MODEL_CACHE_DIR = './model/country_model_cache'
+MATERIALIZED_FORECASTS_PATH = './model/materialized_forecasts.npz'
+
+# When the models (and Prophet/pandas with them) are loaded: 'eager' while app.py is
+# imported, 'background' in a thread started at import, 'lazy' on the first request
+# that needs them. Health, metadata and precomputed forecasts never wait for them.
+MODEL_WARM_UP = os.environ.get('MODEL_WARM_UP', 'background')
+
+FORECAST_CACHE_SIZE = int(os.environ.get('FORECAST_CACHE_SIZE', 256))
+FORECAST_CACHE_TTL = int(os.environ.get('FORECAST_CACHE_TTL', 3600))
+
+# Load country models on first use, keeping at most MAX_RESIDENT_COUNTRY_MODELS in memory
+LAZY_COUNTRY_MODELS = os.environ.get('LAZY_COUNTRY_MODELS', '0') == '1'
+MAX_RESIDENT_COUNTRY_MODELS = int(os.environ['MAX_RESIDENT_COUNTRY_MODELS']) if os.environ.get('MAX_RESIDENT_COUNTRY_MODELS') else None
+WARM_COUNTRY_MODELS = os.environ.get('WARM_COUNTRY_MODELS', '1') == '1'
+# gunicorn.conf.py turns this off so models are warmed before workers fork
+WARM_COUNTRY_MODELS_IN_BACKGROUND = os.environ.get('WARM_COUNTRY_MODELS_IN_BACKGROUND', '1') == '1'
+COUNTRY_MODEL_WORKERS = int(os.environ['COUNTRY_MODEL_WORKERS']) if os.environ.get('COUNTRY_MODEL_WORKERS') else None
+
+BATCH_MAX_QUERIES = int(os.environ.get('BATCH_MAX_QUERIES', 500))
+SCENARIO_MAX_SCENARIOS = int(os.environ.get('SCENARIO_MAX_SCENARIOS', 50))
+
+# Send Server-Timing stage breakdowns on every response, not only when X-Profile is set
+PROFILE_ALL_REQUESTS = os.environ.get('PROFILE_ALL_REQUESTS', '0') == '1'
+
+# Background executor for /jobs. Jobs live in the process that accepted them, so
+# they need a single server process (gunicorn.conf.py runs one worker while enabled)
+JOBS_ENABLED = os.environ.get('JOBS_ENABLED', '1') == '1'
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_QUEUE_DEPTH = int(os.environ.get('JOB_QUEUE_DEPTH', 16))
+JOB_RESULT_TTL = int(os.environ.get('JOB_RESULT_TTL', 600))
+
+job_manager = ForecastJobManager(max_workers=JOB_WORKERS, max_queue=JOB_QUEUE_DEPTH, result_ttl=JOB_RESULT_TTL)
+
+tourism_model = None
+warm_up_state = {'status': 'pending', 'error': None, 'seconds': None}
+_warm_up_lock = threading.Lock()
+_warm_up_done = threading.Event()
+_precomputed = {}
+
+def warm_up():
+    """Import the forecasting stack and build the models; later calls return the same model"""
+    global tourism_model
+    with _warm_up_lock:
+        if _warm_up_done.is_set():
+            return tourism_model
+
+        warm_up_state['status'] = 'running'
+        start_time = time.time()
+        try:
+            from prophet_model import ProphetTourismModel
+
+            model = ProphetTourismModel(
+                AGGREGATED_MODEL_PATH,
+                AGGREGATED_DATA_PATH,
+                COUNTRY_SPECIFIC_DATA_PATH,
+                cache_size=FORECAST_CACHE_SIZE,
+                cache_ttl=FORECAST_CACHE_TTL,
+                lazy_country_models=LAZY_COUNTRY_MODELS,
+                max_resident_country_models=MAX_RESIDENT_COUNTRY_MODELS,
+                country_max_workers=COUNTRY_MODEL_WORKERS,
+                materialized_path=MATERIALIZED_FORECASTS_PATH
+            )
+
+            if LAZY_COUNTRY_MODELS and WARM_COUNTRY_MODELS:
+                if WARM_COUNTRY_MODELS_IN_BACKGROUND:
+                    model.prophet_countries.start_background_warm_up()
+                else:
+                    model.prophet_countries.warm_up()
+
+            tourism_model = model
+            warm_up_state['status'] = 'ready'
+            print("Tourism forecasting model initialized successfully")
+        except Exception as e:
+            print(f"Error initializing model: {str(e)}")
+            warm_up_state['status'] = 'failed'
+            warm_up_state['error'] = str(e)
+
+        warm_up_state['seconds'] = time.time() - start_time
+        _warm_up_done.set()
+        return tourism_model
+
+def get_tourism_model(wait=True):
+    """The forecasting model, warming it up (or waiting for a running warm-up) unless wait is False"""
+    if _warm_up_done.is_set() or not wait:
+        return tourism_model
+    return warm_up()
+
+def precomputed_forecasts():
+    """Materialized forecasts validated against the model files, opened without loading any model"""
+    if 'forecasts' not in _precomputed:
+        from materialized_forecasts import open_materialized_forecasts, source_identity
+
+        sources = source_identity(
+            AGGREGATED_MODEL_PATH, AGGREGATED_DATA_PATH, COUNTRY_SPECIFIC_DATA_PATH, COUNTRY_MODEL_CACHE_DIR
+        )
+        _precomputed['forecasts'] = open_materialized_forecasts(MATERIALIZED_FORECASTS_PATH, sources)
+    return _precomputed['forecasts']
+
+def precomputed_forecast(start_date, months_to_forecast):
+    """/forecast result from the materialized grid, or None when the grid does not cover it"""
+    materialized = precomputed_forecasts()
+    records = materialized.forecast_records(start_date, months_to_forecast) if materialized else None
+    if records is None:
+        return None
+    return {
+        'success': True,
+        'data': records,
+        'metadata': {
+            'start_date': start_date,
+            'months_forecasted': months_to_forecast,
+            'total_records': len(records)
+        }
+    }
+
+def precomputed_top_countries(start_date, months_to_forecast, count):
+    """/forecast-top-countries result from the materialized grid, or None when the grid does not cover it"""
+    materialized = precomputed_forecasts()
+    totals = materialized.country_totals(start_date, months_to_forecast) if materialized else None
+    if totals is None:
+        return None
+
+    from prophet_country_model import ProphetCountrySpecificModels
+    return {
+        'success': True,
+        'data': ProphetCountrySpecificModels.rank_countries(*totals, count),
+        'metadata': {
+            'start_date': start_date,
+            'months_forecasted': months_to_forecast
+        }
+    }
 
-try:
-    tourism_model = ProphetTourismModel(
-        AGGREGATED_MODEL_PATH,
-        AGGREGATED_DATA_PATH,
-        COUNTRY_SPECIFIC_DATA_PATH
-    )
+if MODEL_WARM_UP == 'eager':
+    warm_up()
+elif MODEL_WARM_UP == 'background':
+    threading.Thread(target=warm_up, name='model-warm-up', daemon=True).start()
 
-    print("Tourism forecasting model initialized successfully")
-except Exception as e:
-    print(f"Error initializing model: {str(e)}")
-    tourism_model = None
+@app.before_request
+def begin_request_profile():
+    start_profile(request.endpoint or 'unknown')
+
+@app.after_request
+def end_request_profile(response):
+    profile = finish_profile()
+    if profile is not None:
+        method, status = request.method, response.status_code
+
+        def observe():
+            REQUEST_SECONDS.observe(profile.elapsed(), endpoint=profile.endpoint, method=method, status=status)
+
+        # A streamed body is still to be produced; its latency is recorded once it is sent
+        if response.is_streamed:
+            response.call_on_close(observe)
+        else:
+            observe()
+        if PROFILE_ALL_REQUESTS or request.headers.get('X-Profile'):
+            response.headers['Server-Timing'] = profile.server_timing()
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics"""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/livez', methods=['GET'])
+def liveness():
+    """Liveness probe: the process is serving requests"""
+    return jsonify({'status': 'alive'})
+
+@app.route('/readyz', methods=['GET'])
+def readiness():
+    """Readiness probe: models are loaded; never triggers model work"""
+    if not tourism_model:
+        return jsonify({
+            'status': 'not ready',
+            'warm_up': warm_up_state['status'],
+            'error': warm_up_state['error'] or 'Model not initialized'
+        }), 503
+    
+    return jsonify({
+        'status': 'ready',
+        'country_models_warmed_up': tourism_model.prophet_countries.warmed_up
+    })
 
 @app.route('/', methods=['GET'])
 def health_check():
@@ -29,7 +220,8 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'service': 'Tourism Forecast API',
-        'model_loaded': tourism_model is not None
+        'model_loaded': tourism_model is not None,
+        'warm_up': warm_up_state['status']
     })
 
 @app.route('/forecast', methods=['POST'])
@@ -40,10 +232,171 @@ def forecast():
     Expected JSON payload:
     {
         "start_date": "2024-01-01",
-        "months_to_forecast": 12
+        "months_to_forecast": 12,
+        "include_intervals": false (optional)
     }
     """
     try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({
+                'success': False,
+                'error': 'No JSON data provided'
+            }), 400
+        
+        start_date = data.get('start_date')
+        months_to_forecast = data.get('months_to_forecast')
+        include_intervals = data.get('include_intervals', False)
+        
+        if not start_date:
+            return jsonify({
+                'success': False,
+                'error': 'start_date is required'
+            }), 400
+        
+        if not months_to_forecast:
+            return jsonify({
+                'success': False,
+                'error': 'months_to_forecast is required'
+            }), 400
+        
+        try:
+            months_to_forecast = int(months_to_forecast)
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'months_to_forecast must be an integer'
+            }), 400
+        
+        if months_to_forecast <= 0:
+            return jsonify({
+                'success': False,
+                'error': 'months_to_forecast must be greater than 0'
+            }), 400
+        
+        if not isinstance(include_intervals, bool):
+            return jsonify({
+                'success': False,
+                'error': 'include_intervals must be true or false'
+            }), 400
+        
+        # Answered from the precomputed grid while the models are still warming up
+        result = None
+        if not _warm_up_done.is_set() and not include_intervals:
+            result = precomputed_forecast(start_date, months_to_forecast)
+        
+        if result is None:
+            tourism_model = get_tourism_model()
+            if not tourism_model:
+                return jsonify({
+                    'success': False,
+                    'error': 'Model not initialized'
+                }), 500
+            result = tourism_model.forecast(start_date, months_to_forecast, include_intervals)
+        
+        if result['success']:
+            return jsonify(result)
+        else:
+            return jsonify(result), 400
+            
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Internal server error: {str(e)}'
+        }), 500
+
+@app.route('/forecast-top-countries', methods=['POST'])
+def forecast_top_countries():
+    """
+    Forecast tourist arrivals
+    
+    Expected JSON payload:
+    {
+        "start_date": "2024-01-01",
+        "months_to_forecast": 12,
+        "count": 10 (optional)
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({
+                'success': False,
+                'error': 'No JSON data provided'
+            }), 400
+        
+        start_date = data.get('start_date')
+        months_to_forecast = data.get('months_to_forecast')
+        count = data.get('count')
+        
+        if not start_date:
+            return jsonify({
+                'success': False,
+                'error': 'start_date is required'
+            }), 400
+        
+        if not months_to_forecast:
+            return jsonify({
+                'success': False,
+                'error': 'months_to_forecast is required'
+            }), 400
+        
+        try:
+            months_to_forecast = int(months_to_forecast)
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'months_to_forecast must be an integer'
+            }), 400
+        
+        if months_to_forecast <= 0:
+            return jsonify({
+                'success': False,
+                'error': 'months_to_forecast must be greater than 0'
+            }), 400
+        
+        # Answered from the precomputed grid while the models are still warming up
+        result = None
+        if not _warm_up_done.is_set():
+            result = precomputed_top_countries(start_date, months_to_forecast, count)
+        
+        if result is None:
+            tourism_model = get_tourism_model()
+            if not tourism_model:
+                return jsonify({
+                    'success': False,
+                    'error': 'Model not initialized'
+                }), 500
+            result = tourism_model.forecast_top_countries(start_date, months_to_forecast, count)
+        
+        if result['success']:
+            return jsonify(result)
+        else:
+            return jsonify(result), 400
+            
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Internal server error: {str(e)}'
+        }), 500
+
+@app.route('/forecast-countries', methods=['POST'])
+def forecast_countries():
+    """
+    Monthly forecast series per country
+    
+    Expected JSON payload:
+    {
+        "start_date": "2024-01-01",
+        "months_to_forecast": 12,
+        "countries": ["Japan", "Korea"] (optional, default all),
+        "include_components": false (optional)
+    }
+    """
+    try:
+        tourism_model = get_tourism_model()
         if not tourism_model:
             return jsonify({
                 'success': False,
@@ -60,6 +413,8 @@ def forecast():
         
         start_date = data.get('start_date')
         months_to_forecast = data.get('months_to_forecast')
+        countries = data.get('countries')
+        include_components = data.get('include_components', False)
         
         if not start_date:
             return jsonify({
@@ -87,7 +442,19 @@ def forecast():
                 'error': 'months_to_forecast must be greater than 0'
             }), 400
         
-        result = tourism_model.forecast(start_date, months_to_forecast)
+        if countries is not None and not isinstance(countries, list):
+            return jsonify({
+                'success': False,
+                'error': 'countries must be a list'
+            }), 400
+        
+        if not isinstance(include_components, bool):
+            return jsonify({
+                'success': False,
+                'error': 'include_components must be true or false'
+            }), 400
+        
+        result = tourism_model.forecast_country_series(start_date, months_to_forecast, countries, include_components)
         
         if result['success']:
             return jsonify(result)
@@ -100,19 +467,21 @@ def forecast():
             'error': f'Internal server error: {str(e)}'
         }), 500
 
-@app.route('/forecast-top-countries', methods=['POST'])
-def forecast_top_countries():
+@app.route('/forecast-reconciled', methods=['POST'])
+def forecast_reconciled():
     """
-    Forecast tourist arrivals
+    Aggregated and per-country forecasts reconciled so the countries sum to the aggregate
     
     Expected JSON payload:
     {
         "start_date": "2024-01-01",
         "months_to_forecast": 12,
-        "count": 10 (optional)
+        "method": "mint_shrink" (optional: bottom_up, ols, wls, mint_shrink),
+        "count": 10 (optional, default all countries)
     }
     """
     try:
+        tourism_model = get_tourism_model()
         if not tourism_model:
             return jsonify({
                 'success': False,
@@ -129,6 +498,7 @@ def forecast_top_countries():
         
         start_date = data.get('start_date')
         months_to_forecast = data.get('months_to_forecast')
+        method = data.get('method') or DEFAULT_RECONCILIATION_METHOD
         count = data.get('count')
         
         if not start_date:
@@ -157,7 +527,13 @@ def forecast_top_countries():
                 'error': 'months_to_forecast must be greater than 0'
             }), 400
         
-        result = tourism_model.forecast_top_countries(start_date, months_to_forecast, count)
+        if method not in RECONCILIATION_METHODS:
+            return jsonify({
+                'success': False,
+                'error': f"method must be one of: {', '.join(RECONCILIATION_METHODS)}"
+            }), 400
+        
+        result = tourism_model.forecast_reconciled(start_date, months_to_forecast, method, count)
         
         if result['success']:
             return jsonify(result)
@@ -170,18 +546,206 @@ def forecast_top_countries():
             'error': f'Internal server error: {str(e)}'
         }), 500
 
+@app.route('/forecast-scenarios', methods=['POST'])
+def forecast_scenarios():
+    """
+    What-if forecasts: hypothetical shocks and condition flags applied to the fitted models, as deltas to the baseline
+    
+    Expected JSON payload:
+    {
+        "start_date": "2027-01-01",
+        "months_to_forecast": 24,
+        "scenarios": [
+            {
+                "name": "new_outbreak",
+                "shocks": [
+                    {"like": "covid_impact_1", "start": "2027-03-01", "months": 6, "scale": 0.5},
+                    {"effect": -0.1, "start": "2027-09-01", "end": "2027-12-01"}
+                ],
+                "conditions": [
+                    {"start": "2027-03-01", "end": "2027-12-01", "pre_covid": false, "has_covid": true}
+                ]
+            }
+        ],
+        "countries": ["Japan", "Korea"] (optional, default all),
+        "include_series": false (optional, monthly values per country)
+    }
+    """
+    try:
+        tourism_model = get_tourism_model()
+        if not tourism_model:
+            return jsonify({
+                'success': False,
+                'error': 'Model not initialized'
+            }), 500
+        
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({
+                'success': False,
+                'error': 'No JSON data provided'
+            }), 400
+        
+        start_date = data.get('start_date')
+        months_to_forecast = data.get('months_to_forecast')
+        specs = data.get('scenarios')
+        countries = data.get('countries')
+        include_series = data.get('include_series', False)
+        
+        if not start_date:
+            return jsonify({
+                'success': False,
+                'error': 'start_date is required'
+            }), 400
+        
+        if not months_to_forecast:
+            return jsonify({
+                'success': False,
+                'error': 'months_to_forecast is required'
+            }), 400
+        
+        try:
+            months_to_forecast = int(months_to_forecast)
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'months_to_forecast must be an integer'
+            }), 400
+        
+        if months_to_forecast <= 0:
+            return jsonify({
+                'success': False,
+                'error': 'months_to_forecast must be greater than 0'
+            }), 400
+        
+        if not specs or not isinstance(specs, list):
+            return jsonify({
+                'success': False,
+                'error': 'scenarios must be a non-empty list'
+            }), 400
+        
+        if len(specs) > SCENARIO_MAX_SCENARIOS:
+            return jsonify({
+                'success': False,
+                'error': f'At most {SCENARIO_MAX_SCENARIOS} scenarios per request'
+            }), 400
+        
+        if not isinstance(include_series, bool):
+            return jsonify({
+                'success': False,
+                'error': 'include_series must be true or false'
+            }), 400
+        
+        if countries is not None and not isinstance(countries, list):
+            return jsonify({
+                'success': False,
+                'error': 'countries must be a list'
+            }), 400
+        
+        try:
+            scenarios = [Scenario.from_dict(spec, i) for i, spec in enumerate(specs)]
+        except (ValueError, TypeError) as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        result = tourism_model.forecast_scenarios(start_date, months_to_forecast, scenarios, countries, include_series)
+        
+        if result['success']:
+            return jsonify(result)
+        else:
+            return jsonify(result), 400
+            
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Internal server error: {str(e)}'
+        }), 500
+
+@app.route('/forecast-batch', methods=['POST'])
+def forecast_batch():
+    """
+    Answer many forecast queries in one call
+    
+    Expected JSON payload:
+    {
+        "queries": [
+            {"start_date": "2024-01-01", "months_to_forecast": 12},
+            {"start_date": "2024-01-01", "months_to_forecast": 24, "country": "Japan"},
+            {"start_date": "2024-01-01", "months_to_forecast": 12, "type": "top_countries", "count": 10}
+        ]
+    }
+    """
+    try:
+        tourism_model = get_tourism_model()
+        if not tourism_model:
+            return jsonify({
+                'success': False,
+                'error': 'Model not initialized'
+            }), 500
+        
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({
+                'success': False,
+                'error': 'No JSON data provided'
+            }), 400
+        
+        queries = data.get('queries')
+        
+        if not isinstance(queries, list) or not queries:
+            return jsonify({
+                'success': False,
+                'error': 'queries must be a non-empty list'
+            }), 400
+        
+        if len(queries) > BATCH_MAX_QUERIES:
+            return jsonify({
+                'success': False,
+                'error': f'At most {BATCH_MAX_QUERIES} queries are allowed per batch'
+            }), 400
+        
+        if not all(isinstance(query, dict) for query in queries):
+            return jsonify({
+                'success': False,
+                'error': 'Each query must be an object'
+            }), 400
+        
+        results = tourism_model.forecast_batch(queries)
+        
+        return jsonify({
+            'success': True,
+            'data': results,
+            'metadata': {
+                'total_queries': len(results),
+                'failed_queries': sum(1 for result in results if not result['success'])
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Internal server error: {str(e)}'
+        }), 500
+
 @app.route('/export', methods=['POST'])
 def export_forecast():
     """
-    Export forecast to file
+    Stream the forecast as a file download
     
     Expected JSON payload:
     {
         "start_date": "2024-01-01",
-        "months_to_forecast": 12
+        "months_to_forecast": 12,
+        "format": "csv" | "ndjson" | "parquet" (optional, default csv),
+        "scope": "aggregated" | "countries" (optional, default aggregated)
     }
     """
     try:
+        tourism_model = get_tourism_model()
         if not tourism_model:
             return jsonify({
                 'success': False,
@@ -196,24 +760,53 @@ def export_forecast():
                 'error': 'No JSON data provided'
             }), 400
         
-        start_date = data.get('start_date')
+        start_date = normalize_start_date(data.get('start_date'))
         months_to_forecast = data.get('months_to_forecast')
+        export_format = data.get('format', 'csv')
+        scope = data.get('scope', 'aggregated')
         
-        if not start_date or not months_to_forecast:
+        if not start_date:
             return jsonify({
                 'success': False,
-                'error': 'start_date and months_to_forecast are required'
+                'error': 'start_date is required in YYYY-MM-DD format'
             }), 400
         
-        filename = tourism_model.export_forecast(
-            start_date, 
-            int(months_to_forecast)
-        )
+        try:
+            months_to_forecast = int(months_to_forecast)
+        except (TypeError, ValueError):
+            return jsonify({
+                'success': False,
+                'error': 'months_to_forecast must be an integer'
+            }), 400
+        
+        if months_to_forecast <= 0:
+            return jsonify({
+                'success': False,
+                'error': 'months_to_forecast must be greater than 0'
+            }), 400
         
-        return send_file(
-            filename,
-            as_attachment=True,
-            download_name=filename
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({
+                'success': False,
+                'error': f'format must be one of {", ".join(EXPORT_FORMATS)}'
+            }), 400
+        
+        if scope not in ('aggregated', 'countries'):
+            return jsonify({
+                'success': False,
+                'error': 'scope must be aggregated or countries'
+            }), 400
+        
+        frames = tourism_model.export_frames(start_date, months_to_forecast, scope)
+        # Compute the first chunk up front so bad input fails before the response starts
+        first = next(frames, None)
+        chunks = stream_export(itertools.chain([first] if first is not None else [], frames), export_format)
+        
+        filename = f'tourism_forecast_{scope}_{start_date}_{months_to_forecast}m.{export_format}'
+        return Response(
+            stream_with_context(profiled_stream(chunks, current_profile())),
+            mimetype=EXPORT_FORMATS[export_format],
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
         )
         
     except Exception as e:
@@ -222,22 +815,191 @@ def export_forecast():
             'error': f'Export error: {str(e)}'
         }), 500
 
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Run a forecast in the background and return a job id immediately
+    
+    Expected JSON payload:
+    {
+        "type": "forecast" | "top_countries",
+        "start_date": "2024-01-01",
+        "months_to_forecast": 12,
+        "include_intervals": false (optional, forecast only),
+        "count": 10 (optional, top_countries only)
+    }
+    """
+    try:
+        if not JOBS_ENABLED:
+            return jsonify({
+                'success': False,
+                'error': 'Background jobs are disabled (JOBS_ENABLED=0)'
+            }), 404
+        
+        tourism_model = get_tourism_model()
+        if not tourism_model:
+            return jsonify({
+                'success': False,
+                'error': 'Model not initialized'
+            }), 500
+        
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({
+                'success': False,
+                'error': 'No JSON data provided'
+            }), 400
+        
+        job_type = data.get('type', 'forecast')
+        start_date = normalize_start_date(data.get('start_date'))
+        months_to_forecast = data.get('months_to_forecast')
+        
+        if job_type not in ('forecast', 'top_countries'):
+            return jsonify({
+                'success': False,
+                'error': 'type must be forecast or top_countries'
+            }), 400
+        
+        if not start_date:
+            return jsonify({
+                'success': False,
+                'error': 'start_date is required in YYYY-MM-DD format'
+            }), 400
+        
+        try:
+            months_to_forecast = int(months_to_forecast)
+        except (TypeError, ValueError):
+            return jsonify({
+                'success': False,
+                'error': 'months_to_forecast must be an integer'
+            }), 400
+        
+        if months_to_forecast <= 0:
+            return jsonify({
+                'success': False,
+                'error': 'months_to_forecast must be greater than 0'
+            }), 400
+        
+        include_intervals = data.get('include_intervals', False)
+        if not isinstance(include_intervals, bool):
+            return jsonify({
+                'success': False,
+                'error': 'include_intervals must be true or false'
+            }), 400
+        
+        params = {'start_date': start_date, 'months_to_forecast': months_to_forecast}
+        if job_type == 'forecast':
+            params['include_intervals'] = include_intervals
+            work = lambda: tourism_model.forecast(
+                start_date, months_to_forecast, params['include_intervals']
+            )
+        else:
+            params['count'] = data.get('count')
+            work = lambda: tourism_model.forecast_top_countries(
+                start_date, months_to_forecast, params['count']
+            )
+        
+        try:
+            job, coalesced = job_manager.submit(job_type, params, work)
+        except JobQueueFull as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 429
+        
+        return jsonify({
+            'success': True,
+            'job_id': job.id,
+            'status': job.status,
+            'coalesced': coalesced
+        }), 202
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Internal server error: {str(e)}'
+        }), 500
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Poll a job; ?wait=<seconds> blocks until it finishes or the wait elapses"""
+    try:
+        wait = float(request.args.get('wait', 0) or 0)
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'wait must be a number of seconds'
+        }), 400
+    
+    wait = min(max(wait, 0.0), 30.0)
+    job = job_manager.wait(job_id, wait) if wait > 0 else job_manager.get(job_id)
+    
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Job not found'
+        }), 404
+    
+    return jsonify(dict(job.to_dict(), success=True))
+
+@app.route('/jobs/<job_id>/stream', methods=['GET'])
+def stream_job(job_id):
+    """Server-sent events with the job status, ending with the finished job"""
+    job = job_manager.get(job_id)
+    
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Job not found'
+        }), 404
+    
+    def events():
+        status = None
+        while not job.done.wait(1.0):
+            if job.status != status:
+                status = job.status
+                yield f"event: status\ndata: {json.dumps(job.to_dict(include_result=False))}\n\n"
+        yield f"event: {job.status}\ndata: {json.dumps(job.to_dict())}\n\n"
+    
+    return Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
 @app.route('/model-info', methods=['GET'])
 def model_info():
     """Get model information"""
     try:
-        if not tourism_model:
+        if warm_up_state['status'] == 'failed':
             return jsonify({
                 'success': False,
                 'error': 'Model not initialized'
             })
         
+        if not tourism_model:
+            # Still warming up: report what is known without loading anything
+            materialized = precomputed_forecasts()
+            return jsonify({
+                'success': True,
+                'model_path': AGGREGATED_MODEL_PATH,
+                'data_path': AGGREGATED_DATA_PATH,
+                'warm_up': warm_up_state,
+                'jobs': job_manager.stats(),
+                'materialized_forecasts': materialized.stats() if materialized else None
+            })
+        
+        historical_data = tourism_model.aggregated_historical_data
+
         return jsonify({
             'success': True,
-            'model_path': tourism_model.model_path,
-            'data_path': tourism_model.data_path,
-            'historical_data_loaded': tourism_model.historical_data is not None,
-            'historical_records': len(tourism_model.historical_data) if tourism_model.historical_data is not None else 0
+            'model_path': tourism_model.aggregated_model_path,
+            'data_path': tourism_model.aggregated_data_path,
+            'warm_up': warm_up_state,
+            'historical_data_loaded': historical_data is not None,
+            'historical_records': len(historical_data) if historical_data is not None else 0,
+            'forecast_cache': tourism_model.forecast_cache.stats(),
+            'country_models': tourism_model.prophet_countries.residency_stats(),
+            'jobs': job_manager.stats(),
+            'materialized_forecasts': tourism_model.materialized.stats() if tourism_model.materialized else None,
+            'reconciliation': tourism_model.reconciler.stats() if tourism_model.reconciler else None
         })
         
     except Exception as e:
@@ -250,9 +1012,18 @@ if __name__ == '__main__':
     print("Starting Tourism Forecast API server...")
     print("Available endpoints:")
     print("  GET  /                         - Health check")
+    print("  GET  /livez, /readyz           - Liveness and readiness probes")
     print("  POST /forecast                 - Generate forecast")
     print("  POST /forecast-top-countries   - Generate forecast for top countries")
-    print("  POST /export                   - Export forecast to file")
+    print("  POST /forecast-countries       - Forecast series per country")
+    print("  POST /forecast-reconciled      - Coherent aggregated and country forecasts")
+    print("  POST /forecast-scenarios       - What-if shocks as deltas to the baseline")
+    print("  POST /forecast-batch           - Answer many forecast queries in one call")
+    print("  POST /export                   - Stream forecast as CSV, NDJSON or Parquet")
+    print("  POST /jobs                     - Queue a forecast job")
+    print("  GET  /jobs/<id>                - Poll a forecast job")
+    print("  GET  /jobs/<id>/stream         - Stream a forecast job's status")
     print("  GET  /model-info               - Get model information")
+    print("  GET  /metrics                  - Prometheus latency histograms")
     
     app.run(debug=False, host='0.0.0.0', port=5000)
\ No newline at end of file
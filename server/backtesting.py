@@ -0,0 +1,229 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from prophet.diagnostics import prophet_copy
+from prophet.serialize import model_from_json
+
+from forecast_engine import FastProphetModel, prophet_predict
+from prophet_country_model import create_country_model
+from utils import add_future_features
+
+BACKTEST_DIR = './backtests'
+AGGREGATED_SERIES = 'aggregated'
+
+DEFAULT_HORIZON = 12
+DEFAULT_PERIOD = 6
+DEFAULT_INITIAL = 36
+QUICK_CUTOFFS = 2
+
+
+def rolling_cutoffs(dates, horizon=DEFAULT_HORIZON, period=DEFAULT_PERIOD, initial=DEFAULT_INITIAL, last=None):
+    """Rolling-origin cutoffs, oldest first.
+
+    Steps back `period` rows from the latest cutoff that still leaves
+    `horizon` rows to score, keeping at least `initial` rows of training
+    data. `last` keeps only the most recent cutoffs.
+    """
+    dates = np.unique(np.asarray(dates, dtype='datetime64[ns]'))
+    positions = range(len(dates) - horizon - 1, initial - 2, -period)
+    cutoffs = [pd.Timestamp(dates[i]) for i in positions][::-1]
+    if last:
+        cutoffs = cutoffs[-last:]
+    return cutoffs
+
+
+def evaluate_cutoff(series, frame, cutoff, horizon, holidays_df=None, config=None, model_json=None):
+    """Refit one series on rows up to cutoff and forecast the next `horizon` rows.
+
+    Country models are rebuilt from their configuration; the aggregated model
+    is copied from its fitted JSON. Returns (series, cutoff, predictions, fit seconds).
+    """
+    start_time = time.time()
+    train = frame[frame['ds'] <= cutoff]
+    test = frame[frame['ds'] > cutoff].head(horizon).reset_index(drop=True)
+
+    if model_json is not None:
+        model = prophet_copy(model_from_json(model_json), cutoff)
+    else:
+        model = create_country_model(holidays_df, config)
+    model.fit(train)
+
+    try:
+        forecast = FastProphetModel.from_prophet(model).predict(test)
+    except Exception:
+        forecast = prophet_predict(model, test)
+
+    predictions = pd.DataFrame({
+        'series': series,
+        'cutoff': cutoff,
+        'ds': test['ds'].to_numpy(),
+        'horizon': np.arange(1, len(test) + 1),
+        'y': test['y'].to_numpy(dtype=float),
+        'yhat': forecast['yhat'].to_numpy(dtype=float),
+    })
+    return series, cutoff, predictions, time.time() - start_time
+
+
+def score_predictions(predictions, by=('series',)):
+    """MAPE (over non-zero actuals), RMSE and MAE of backtest predictions grouped by `by`"""
+    actual = predictions['y']
+    error = predictions['yhat'] - actual
+    errors = predictions.assign(error=error, ape=error.abs() / actual.where(actual != 0).abs())
+    grouped = errors.groupby(list(by), sort=True)
+    summary = pd.DataFrame({
+        'cutoffs': grouped['cutoff'].nunique(),
+        'points': grouped.size(),
+        'mape': grouped['ape'].mean(),
+        'rmse': np.sqrt(grouped['error'].apply(lambda e: np.mean(e ** 2))),
+        'mae': grouped['error'].apply(lambda e: np.mean(np.abs(e))),
+    })
+    return summary.reset_index()
+
+
+class Backtester:
+    """Rolling-origin backtests of the country models and the aggregated model.
+
+    Every (series, cutoff) pair is an independent refit, so they are spread
+    over a process pool. Country data comes from the models' shared
+    CountryDataStore; each worker only receives its own series.
+    """
+
+    def __init__(self, country_models, aggregated_model_path=None, aggregated_data_path=None,
+                 max_workers=None, mp_start_method=None):
+        self.country_models = country_models
+        self.aggregated_model_path = aggregated_model_path
+        self.aggregated_data_path = aggregated_data_path
+        self.max_workers = max_workers or country_models.max_workers
+        self.mp_start_method = mp_start_method or country_models.mp_start_method
+
+    def _aggregated_frame(self):
+        frame = pd.read_csv(self.aggregated_data_path)
+        frame['ds'] = pd.to_datetime(frame['ds'])
+        return add_future_features(frame)
+
+    def _series(self, countries, include_aggregated):
+        """(series, frame, task keyword arguments) for every series to evaluate"""
+        if include_aggregated and self.aggregated_model_path and self.aggregated_data_path:
+            with open(self.aggregated_model_path, 'r') as f:
+                model_json = f.read()
+            yield AGGREGATED_SERIES, self._aggregated_frame(), {'model_json': model_json}
+
+        for country in countries:
+            yield country, self.country_models.country_data.frame(country), {
+                'holidays_df': self.country_models.holidays,
+                'config': self.country_models.config_for(country),
+            }
+
+    def run(self, countries=None, include_aggregated=True, horizon=DEFAULT_HORIZON, period=DEFAULT_PERIOD,
+            initial=DEFAULT_INITIAL, quick=False, quick_cutoffs=QUICK_CUTOFFS):
+        """Backtest predictions for every series and cutoff, in (series, cutoff, horizon) order.
+
+        quick only evaluates the most recent `quick_cutoffs` cutoffs of each series.
+        """
+        if countries is None:
+            countries = self.country_models.countries
+        last = quick_cutoffs if quick else None
+
+        tasks = []
+        for series, frame, kwargs in self._series(countries, include_aggregated):
+            for cutoff in rolling_cutoffs(frame['ds'], horizon, period, initial, last):
+                tasks.append((series, frame, cutoff, kwargs))
+
+        if not tasks:
+            raise Exception("No cutoffs to evaluate; the series are too short for the requested horizon")
+
+        print(f"[>] Backtesting {len(tasks)} (series, cutoff) pairs on {self.max_workers} processes...")
+        start_time = time.time()
+        results = []
+        context = get_context(self.mp_start_method)
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context) as executor:
+            futures = {
+                executor.submit(evaluate_cutoff, series, frame, cutoff, horizon, **kwargs): (series, cutoff)
+                for series, frame, cutoff, kwargs in tasks
+            }
+
+            for future in as_completed(futures):
+                series, cutoff = futures[future]
+                try:
+                    _, _, predictions, elapsed = future.result()
+                    results.append(predictions)
+                    print(f"[>] Backtested {series} at {cutoff:%Y-%m-%d} in {elapsed:.2f}s")
+                except Exception as e:
+                    print(f"Error backtesting {series} at {cutoff:%Y-%m-%d}: {e}")
+
+        elapsed = time.time() - start_time
+        print(f"[>>>>] Backtested {len(results)} of {len(tasks)} pairs in {elapsed:.2f}s")
+
+        if not results:
+            raise Exception("Every backtest fit failed")
+        predictions = pd.concat(results, ignore_index=True)
+        return predictions.sort_values(['series', 'cutoff', 'horizon']).reset_index(drop=True)
+
+
+def save_backtest(predictions, output_dir=BACKTEST_DIR):
+    """Write predictions plus per-series and per-(series, horizon) score tables as CSV"""
+    os.makedirs(output_dir, exist_ok=True)
+    tables = {
+        'predictions': predictions,
+        'summary': score_predictions(predictions),
+        'by_horizon': score_predictions(predictions, by=('series', 'horizon')),
+    }
+    for name, table in tables.items():
+        table.to_csv(os.path.join(output_dir, f"{name}.csv"), index=False)
+    return tables
+
+
+if __name__ == "__main__":
+    import argparse
+    from prophet_country_model import ProphetCountrySpecificModels
+
+    parser = argparse.ArgumentParser(description="Rolling-origin backtests of the country and aggregated models")
+    parser.add_argument('--countries', nargs='*', help="Countries to evaluate (default all)")
+    parser.add_argument('--no-aggregated', action='store_true', help="Skip the aggregated model")
+    parser.add_argument('--horizon', type=int, default=DEFAULT_HORIZON, help="Months scored after each cutoff")
+    parser.add_argument('--period', type=int, default=DEFAULT_PERIOD, help="Months between cutoffs")
+    parser.add_argument('--initial', type=int, default=DEFAULT_INITIAL, help="Minimum months of training data")
+    parser.add_argument('--quick', action='store_true', help="Only evaluate the most recent cutoffs")
+    parser.add_argument('--quick-cutoffs', type=int, default=QUICK_CUTOFFS)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--output', default=BACKTEST_DIR, help="Directory for the CSV tables")
+    args = parser.parse_args()
+
+    # Lazy: the backtest refits from configuration and never needs the cached models
+    country_models = ProphetCountrySpecificModels(
+        data_path='./dataset/country_monthly_dataset.csv',
+        use_multiprocessing=True,
+        max_workers=args.workers,
+        lazy=True
+    )
+
+    countries = country_models.countries
+    if args.countries:
+        countries = [country_models.find_country(country) for country in args.countries]
+        unknown = [name for name, country in zip(args.countries, countries) if country is None]
+        if unknown:
+            parser.error(f"Unknown countries: {', '.join(unknown)}")
+
+    backtester = Backtester(
+        country_models,
+        aggregated_model_path='./model/aggregated_model.json',
+        aggregated_data_path='./dataset/aggregated_dataset.csv'
+    )
+    predictions = backtester.run(
+        countries,
+        include_aggregated=not args.no_aggregated,
+        horizon=args.horizon,
+        period=args.period,
+        initial=args.initial,
+        quick=args.quick,
+        quick_cutoffs=args.quick_cutoffs
+    )
+    tables = save_backtest(predictions, args.output)
+
+    with pd.option_context('display.max_rows', None, 'display.width', 120):
+        print(tables['summary'].to_string(index=False, float_format=lambda v: f"{v:,.3f}"))
+    print(f"[>>>>] Wrote backtest tables to {args.output}")
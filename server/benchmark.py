@@ -0,0 +1,452 @@
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import http.client
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+AGGREGATED_MODEL_PATH = './model/aggregated_model.json'
+AGGREGATED_DATA_PATH = './dataset/aggregated_dataset.csv'
+COUNTRY_SPECIFIC_DATA_PATH = './dataset/country_monthly_dataset.csv'
+
+# Modules app.py should only import during model warm-up
+HEAVY_MODULES = ('prophet', 'cmdstanpy', 'matplotlib', 'holidays', 'pandas')
+
+# Metrics where a larger value is better; everything else is a latency or size
+HIGHER_IS_BETTER = ('throughput', 'requests_per_second', 'rows_per_second', 'mb_per_second')
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def process_peak_rss_mb(pid):
+    """Peak resident set size of another process in MB (Linux only)"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def summarize(samples, elapsed=None):
+    """Latency percentiles in milliseconds plus calls per second"""
+    samples = np.asarray(samples, dtype=float)
+    stats = {
+        'calls': int(len(samples)),
+        'mean_ms': float(samples.mean() * 1000),
+        'p50_ms': float(np.percentile(samples, 50) * 1000),
+        'p90_ms': float(np.percentile(samples, 90) * 1000),
+        'p99_ms': float(np.percentile(samples, 99) * 1000),
+        'max_ms': float(samples.max() * 1000),
+    }
+    stats['throughput'] = float(len(samples) / (elapsed if elapsed else samples.sum()))
+    return stats
+
+
+def time_calls(fn, repeat, warmup=1):
+    for _ in range(warmup):
+        fn(0)
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def start_dates(count):
+    """Distinct monthly start dates, so repeated calls never hit a cache"""
+    years, months = divmod(np.arange(count), 12)
+    return [f"{2010 + year}-{month + 1:02d}-01" for year, month in zip(years, months)]
+
+
+def bench_startup(repeat):
+    """Cold model construction in a fresh interpreter, including imports"""
+    code = (
+        "import json, resource, time\n"
+        "start = time.perf_counter()\n"
+        "from prophet_model import ProphetTourismModel\n"
+        f"ProphetTourismModel({AGGREGATED_MODEL_PATH!r}, {AGGREGATED_DATA_PATH!r}, {COUNTRY_SPECIFIC_DATA_PATH!r})\n"
+        "print(json.dumps({'seconds': time.perf_counter() - start,"
+        " 'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))\n"
+    )
+    samples, rss = [], []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', code], capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(output)
+        samples.append(result['seconds'])
+        rss.append(result['peak_rss_mb'])
+
+    stats = summarize(samples)
+    stats['peak_rss_mb'] = max(rss)
+    return stats
+
+
+def import_profile(module='app'):
+    """-X importtime of `import module` in a fresh interpreter with model warm-up deferred.
+
+    Returns (seconds, {imported module: (self seconds, cumulative seconds)}).
+    """
+    env = dict(os.environ, MODEL_WARM_UP='lazy')
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, check=True, env=env
+    ).stderr
+
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        modules[name] = (int(self_us) / 1e6, int(cumulative_us) / 1e6)
+    return modules[module][1], modules
+
+
+def heavy_imports(modules):
+    return [name for name in HEAVY_MODULES if name in modules]
+
+
+def bench_imports(repeat, module='app'):
+    """Import time of the serving module without its models"""
+    samples = []
+    for _ in range(repeat):
+        seconds, modules = import_profile(module)
+        samples.append(seconds)
+    stats = summarize(samples)
+    stats['heavy_modules'] = heavy_imports(modules)
+    return stats
+
+
+def load_model():
+    from prophet_model import ProphetTourismModel
+
+    # No result cache or precomputed grid, every call is computed
+    return ProphetTourismModel(
+        AGGREGATED_MODEL_PATH,
+        AGGREGATED_DATA_PATH,
+        COUNTRY_SPECIFIC_DATA_PATH,
+        cache_size=0,
+        materialized_path=None
+    )
+
+
+def bench_forecast(model, horizons, repeat):
+    results = {}
+    for months in horizons:
+        dates = start_dates(repeat + 1)
+        samples = time_calls(lambda i: model.forecast(dates[i], months), repeat)
+        results[f'forecast/h{months}'] = summarize(samples)
+    return results
+
+
+def bench_top_countries(model, worker_counts, repeat, months=12):
+    """forecast_top_countries called from 1..N concurrent threads"""
+    results = {}
+    for workers in worker_counts:
+        dates = start_dates(repeat * workers + 1)
+        model.forecast_top_countries(dates[-1], months)
+        samples = []
+        lock = threading.Lock()
+
+        def call(i):
+            start = time.perf_counter()
+            model.forecast_top_countries(dates[i], months, 10)
+            elapsed = time.perf_counter() - start
+            with lock:
+                samples.append(elapsed)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(call, range(repeat * workers)))
+        results[f'top_countries/workers{workers}'] = summarize(samples, time.perf_counter() - start)
+    return results
+
+
+def bench_export(months, repeat):
+    import app as server
+
+    client = server.app.test_client()
+    results = {}
+    for export_format, scope in (('csv', 'aggregated'), ('csv', 'countries'), ('ndjson', 'countries')):
+        sizes, rows = [], []
+
+        def call(i):
+            response = client.post('/export', json={
+                'start_date': '2024-01-01',
+                'months_to_forecast': months,
+                'format': export_format,
+                'scope': scope
+            })
+            data = response.get_data()
+            sizes.append(len(data))
+            rows.append(data.count(b'\n'))
+
+        samples = time_calls(call, repeat)
+        stats = summarize(samples)
+        total = sum(samples)
+        stats['rows_per_second'] = float(sum(rows[-repeat:]) / total)
+        stats['mb_per_second'] = float(sum(sizes[-repeat:]) / total / 2**20)
+        results[f'export/{export_format}-{scope}-h{months}'] = stats
+    return results
+
+
+def run(args):
+    results = {}
+    if not args.skip_startup:
+        print("[>] Startup...")
+        results['startup'] = bench_startup(args.startup_repeat)
+        results['import/app'] = bench_imports(args.startup_repeat)
+
+    model = load_model()
+    print("[>] Forecast horizons...")
+    results.update(bench_forecast(model, args.horizons, args.repeat))
+    print("[>] Top countries...")
+    results.update(bench_top_countries(model, args.workers, args.repeat))
+    print("[>] Export...")
+    results.update(bench_export(args.export_months, max(args.repeat // 5, 3)))
+
+    report = {'meta': run_metadata(), 'peak_rss_mb': peak_rss_mb(), 'results': results}
+    print_results(results)
+    print(f"Peak RSS: {report['peak_rss_mb']:.1f} MB")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"[>>>>] Results written to {args.output}")
+
+
+def run_metadata():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def print_results(results):
+    print(f"{'benchmark':<40}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'per sec':>10}")
+    for name, stats in results.items():
+        print(f"{name:<40}{stats['p50_ms']:>10.2f}{stats['p90_ms']:>10.2f}"
+              f"{stats['p99_ms']:>10.2f}{stats['throughput']:>10.1f}")
+
+
+def compare(args):
+    """Print per-metric changes between two runs; exit 1 if any got worse by more than the threshold"""
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    regressions = 0
+    print(f"{'benchmark':<40}{'metric':<20}{'baseline':>12}{'candidate':>12}{'change':>10}")
+    for name, stats in candidate['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        for metric in ('p50_ms', 'p99_ms', 'throughput', 'rows_per_second', 'requests_per_second', 'peak_rss_mb'):
+            if metric not in stats or metric not in base or not base[metric]:
+                continue
+            change = (stats[metric] - base[metric]) / base[metric]
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = ' !' if worse > args.threshold else ''
+            regressions += bool(flag)
+            print(f"{name:<40}{metric:<20}{base[metric]:>12.2f}{stats[metric]:>12.2f}{change:>+10.1%}{flag}")
+
+    print(f"{regressions} metrics regressed by more than {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def imports(args):
+    """Print the import-time profile of app.py; exit 1 if it is over budget or imports a heavy module"""
+    seconds, modules = import_profile(args.module)
+    heavy = heavy_imports(modules)
+
+    print(f"{'module':<50}{'self ms':>10}{'cumulative ms':>16}")
+    ranked = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)
+    for name, (self_seconds, cumulative) in ranked[:args.top]:
+        print(f"{name:<50}{self_seconds * 1000:>10.1f}{cumulative * 1000:>16.1f}")
+
+    print(f"import {args.module}: {seconds * 1000:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"Heavy modules imported: {', '.join(heavy) if heavy else 'none'}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'meta': run_metadata(),
+                'seconds': seconds,
+                'heavy_modules': heavy,
+                'modules': {name: {'self_ms': s * 1000, 'cumulative_ms': c * 1000} for name, (s, c) in ranked}
+            }, f, indent=2)
+        print(f"[>>>>] Profile written to {args.output}")
+
+    return 1 if heavy or seconds * 1000 > args.budget_ms else 0
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def load(args):
+    """Drive the app with concurrent keep-alive clients.
+
+    The app is started in a subprocess on a free port, unless --url points
+    at a server that is already running.
+    """
+    if args.url:
+        url = urlparse(args.url)
+        host, port = url.hostname, url.port or 80
+        server = None
+    else:
+        host, port = '127.0.0.1', free_port()
+        server = subprocess.Popen(
+            [sys.executable, '-c', f"import app; app.app.run(host='127.0.0.1', port={port}, threaded=True)"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+    try:
+        deadline = time.time() + args.startup_timeout
+        while True:
+            try:
+                connection = http.client.HTTPConnection(host, port, timeout=5)
+                connection.request('GET', '/readyz')
+                if connection.getresponse().status == 200:
+                    break
+            except OSError:
+                pass
+            if time.time() > deadline or (server is not None and server.poll() is not None):
+                raise Exception("Server did not become ready")
+            time.sleep(0.5)
+
+        requests = [
+            ('/forecast', {'start_date': date, 'months_to_forecast': months})
+            for date in start_dates(48) for months in args.horizons
+        ] + [
+            ('/forecast-top-countries', {'start_date': date, 'months_to_forecast': 12, 'count': 10})
+            for date in start_dates(48)
+        ]
+
+        samples, errors = [], [0]
+        lock = threading.Lock()
+        stop_at = time.perf_counter() + args.duration
+
+        def client(worker):
+            connection = http.client.HTTPConnection(host, port, timeout=60)
+            i = worker
+            while time.perf_counter() < stop_at:
+                path, body = requests[i % len(requests)]
+                i += args.concurrency
+                start = time.perf_counter()
+                try:
+                    connection.request('POST', path, json.dumps(body), {'Content-Type': 'application/json'})
+                    response = connection.getresponse()
+                    response.read()
+                    ok = response.status == 200
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    connection = http.client.HTTPConnection(host, port, timeout=60)
+                    ok = False
+                elapsed = time.perf_counter() - start
+                with lock:
+                    samples.append(elapsed)
+                    errors[0] += not ok
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(worker,)) for worker in range(args.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = summarize(samples, time.perf_counter() - start)
+        stats['requests_per_second'] = stats['throughput']
+        stats['errors'] = errors[0]
+        stats['concurrency'] = args.concurrency
+        stats['server_peak_rss_mb'] = process_peak_rss_mb(server.pid) if server is not None else None
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    results = {f'load/c{args.concurrency}': stats}
+    print_results(results)
+    if stats['server_peak_rss_mb'] is not None:
+        print(f"Errors: {stats['errors']}, server peak RSS: {stats['server_peak_rss_mb']} MB")
+    else:
+        print(f"Errors: {stats['errors']}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'meta': run_metadata(), 'results': results}, f, indent=2)
+        print(f"[>>>>] Results written to {args.output}")
+
+
+def int_list(value):
+    return [int(item) for item in value.split(',') if item]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the forecasting server")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Benchmark startup, forecasts, top countries and export")
+    run_parser.add_argument('--output', help="Write results as JSON")
+    run_parser.add_argument('--repeat', type=int, default=50, help="Calls per benchmark")
+    run_parser.add_argument('--horizons', type=int_list, default=[1, 12, 60, 240])
+    run_parser.add_argument('--workers', type=int_list, default=[1, 4, 8],
+                            help="Concurrent callers for the top-countries benchmark")
+    run_parser.add_argument('--export-months', type=int, default=600)
+    run_parser.add_argument('--startup-repeat', type=int, default=3)
+    run_parser.add_argument('--skip-startup', action='store_true')
+
+    compare_parser = commands.add_parser('compare', help="Compare two result files")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help="Relative change counted as a regression")
+
+    load_parser = commands.add_parser('load', help="Measure requests/sec, starting the app on a free port unless --url is given")
+    load_parser.add_argument('--url', help="Base URL of an already running server, e.g. http://127.0.0.1:5000")
+    load_parser.add_argument('--output', help="Write results as JSON")
+    load_parser.add_argument('--concurrency', type=int, default=8)
+    load_parser.add_argument('--duration', type=float, default=20.0, help="Seconds to generate load")
+    load_parser.add_argument('--horizons', type=int_list, default=[12, 24])
+    load_parser.add_argument('--startup-timeout', type=float, default=120.0)
+
+    imports_parser = commands.add_parser('imports', help="Import-time profile of the serving module")
+    imports_parser.add_argument('--module', default='app')
+    imports_parser.add_argument('--top', type=int, default=20, help="Slowest modules to list")
+    imports_parser.add_argument('--budget-ms', type=float, default=500.0, help="Fail above this import time")
+    imports_parser.add_argument('--output', help="Write the profile as JSON")
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    elif args.command == 'compare':
+        sys.exit(compare(args))
+    elif args.command == 'imports':
+        sys.exit(imports(args))
+    else:
+        load(args)
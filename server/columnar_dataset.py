@@ -0,0 +1,111 @@
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from model_store import file_source
+
+COLUMNAR_VERSION = 1
+AGGREGATED_DATA_PATH = './dataset/aggregated_dataset.csv'
+COUNTRY_DATA_PATH = './dataset/country_monthly_dataset.csv'
+
+
+def columnar_path(csv_path):
+    """Directory holding the columnar copy of a CSV dataset"""
+    return os.path.splitext(csv_path)[0] + '.columnar'
+
+
+def month_ordinals(ds):
+    """Months since 1970-01 for datetime64 values, as int32"""
+    return np.asarray(ds).astype('datetime64[M]').astype(np.int32)
+
+
+def write_columns(path, columns, source_path, attributes=None):
+    """Write each column as an .npy file, plus a manifest tying them to the source CSV.
+
+    Columns are written to a temporary directory that replaces path once
+    complete, so readers never see a partial conversion.
+    """
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    for name, values in columns.items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), np.ascontiguousarray(values), allow_pickle=False)
+
+    manifest = {
+        'version': COLUMNAR_VERSION,
+        'source': file_source(source_path),
+        'columns': {name: {'dtype': str(values.dtype), 'shape': list(values.shape)} for name, values in columns.items()},
+        'attributes': attributes or {},
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    with open(os.path.join(tmp_path, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+
+
+def read_columns(path, source_path=None):
+    """(memory-mapped columns, attributes), or None if missing or older than source_path"""
+    manifest_path = os.path.join(path, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        return None
+
+    try:
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != COLUMNAR_VERSION:
+            print(f"Warning: Columnar dataset {path} has an old format, reading the CSV instead")
+            return None
+        if source_path and os.path.exists(source_path) and manifest.get('source') != file_source(source_path):
+            print(f"Warning: Columnar dataset {path} is older than {source_path}, reading the CSV instead")
+            return None
+
+        columns = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r', allow_pickle=False)
+            for name in manifest['columns']
+        }
+    except Exception as e:
+        print(f"Warning: Could not read columnar dataset {path}: {e}")
+        return None
+    return columns, manifest.get('attributes', {})
+
+
+def convert_aggregated_dataset(csv_path=AGGREGATED_DATA_PATH, path=None):
+    """Store the aggregated ds/y CSV as typed columns"""
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    ds = pd.to_datetime(df['ds']).to_numpy(dtype='datetime64[ns]')
+    write_columns(path or columnar_path(csv_path), {
+        'ds': ds,
+        'y': df['y'].to_numpy(dtype=float),
+    }, csv_path)
+    return len(df)
+
+
+def convert_country_dataset(csv_path=COUNTRY_DATA_PATH, path=None):
+    """Store the per-country CSV as a partitioned CountryDataStore"""
+    from country_data import CountryDataStore
+
+    store = CountryDataStore.from_csv(csv_path)
+    store.save(path or columnar_path(csv_path), csv_path)
+    return len(store.y), len(store)
+
+
+if __name__ == "__main__":
+    start_time = time.time()
+    rows = convert_aggregated_dataset()
+    print(f"[>] Wrote {columnar_path(AGGREGATED_DATA_PATH)} ({rows} rows)")
+
+    rows, countries = convert_country_dataset()
+    print(f"[>] Wrote {columnar_path(COUNTRY_DATA_PATH)} ({rows} rows, {countries} countries)")
+
+    elapsed = time.time() - start_time
+    print(f"[>>>>] Columnar dataset conversion completed in {elapsed:.2f}s")
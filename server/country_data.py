@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+from columnar_dataset import month_ordinals, read_columns, write_columns
+from utils import COVID_OUTBREAK_DATE, COVID_RECOVERY_DATE, FEATURE_COLUMNS, add_future_features
+
+# Stored features are only reused while they were derived with the same definitions
+FEATURE_ATTRIBUTES = {
+    'feature_columns': FEATURE_COLUMNS,
+    'covid_outbreak_date': COVID_OUTBREAK_DATE,
+    'covid_recovery_date': COVID_RECOVERY_DATE,
+}
+
+
+class CountryDataStore:
+    """Country rows partitioned into contiguous blocks of shared column arrays.
+
+    Rows of country i live in [offsets[i], offsets[i + 1]) of every array, in
+    their original file order, so per-country dates, arrivals and features
+    are zero-copy slices. Features are one uint8 block (rows x FEATURE_COLUMNS).
+    The arrays may be memory-mapped from a columnar copy of the CSV (see open).
+    """
+
+    def __init__(self, countries, offsets, ds, y, features, months=None):
+        self.countries = list(countries)
+        self.offsets = offsets
+        self.ds = ds
+        self.y = y
+        self.features = features
+        self.months = month_ordinals(ds) if months is None else months
+        self.index = {country: i for i, country in enumerate(self.countries)}
+
+    @classmethod
+    def from_frame(cls, df, country_column='Country of Residence', date_column='ds', value_column='y'):
+        """Partition df in one pass: factorize countries, then a stable sort by country code"""
+        codes, countries = pd.factorize(df[country_column], sort=False)
+        order = np.argsort(codes, kind='mergesort')
+        offsets = np.zeros(len(countries) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=len(countries)), out=offsets[1:])
+
+        ds = pd.to_datetime(df[date_column]).to_numpy(dtype='datetime64[ns]')[order]
+        values = df[value_column].to_numpy(dtype=float)[order]
+        # Whole-number arrivals fit in int32; interpolated fractional values stay float64
+        if np.all(np.isfinite(values)) and np.all(values == np.round(values)) and \
+                (len(values) == 0 or np.abs(values).max() < 2**31):
+            y = values.astype(np.int32)
+        else:
+            y = values
+
+        features = add_future_features(pd.DataFrame({'ds': ds}))[FEATURE_COLUMNS].to_numpy(dtype=np.uint8)
+        return cls(countries, offsets, ds, y, features)
+
+    @classmethod
+    def from_csv(cls, path):
+        df = pd.read_csv(path, usecols=['Country of Residence', 'Arrivals', 'Date'])
+        return cls.from_frame(df.rename(columns={'Date': 'ds', 'Arrivals': 'y'}))
+
+    @classmethod
+    def open(cls, path, source_path=None):
+        """Store memory-mapped from a columnar directory, or None if it is missing or out of date"""
+        loaded = read_columns(path, source_path)
+        if loaded is None:
+            return None
+        columns, attributes = loaded
+        if any(attributes.get(key) != value for key, value in FEATURE_ATTRIBUTES.items()):
+            print(f"Warning: Features in {path} were derived differently, reading the CSV instead")
+            return None
+        return cls(
+            columns['countries'].tolist(), columns['offsets'], columns['ds'], columns['y'],
+            columns['features'], months=columns['months']
+        )
+
+    def save(self, path, source_path):
+        """Write the store as memory-mappable columns, with per-row month ordinals"""
+        write_columns(path, {
+            'countries': np.array(self.countries, dtype=str),
+            'offsets': self.offsets,
+            'ds': self.ds,
+            'months': self.months,
+            'y': self.y,
+            'features': self.features,
+        }, source_path, FEATURE_ATTRIBUTES)
+
+    def __len__(self):
+        return len(self.countries)
+
+    def __contains__(self, country):
+        return country in self.index
+
+    def _rows(self, country):
+        i = self.index[country]
+        return slice(self.offsets[i], self.offsets[i + 1])
+
+    def dates(self, country):
+        return self.ds[self._rows(country)]
+
+    def values(self, country):
+        return self.y[self._rows(country)]
+
+    def frame(self, country):
+        """Training dataframe (ds, y and feature columns) for one country"""
+        rows = self._rows(country)
+        features = self.features[rows]
+        columns = {'ds': self.ds[rows], 'y': self.y[rows].astype(float)}
+        for col, name in enumerate(FEATURE_COLUMNS):
+            columns[name] = features[:, col].astype(bool if name in ('pre_covid', 'has_covid') else int)
+        return pd.DataFrame(columns)
+
+    def year_range(self):
+        return int(self.months.min() // 12 + 1970), int(self.months.max() // 12 + 1970)
+
+    @property
+    def nbytes(self):
+        return self.ds.nbytes + self.y.nbytes + self.features.nbytes + self.offsets.nbytes + self.months.nbytes
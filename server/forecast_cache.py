@@ -0,0 +1,148 @@
+from collections import OrderedDict
+from datetime import datetime
+import hashlib
+import os
+import threading
+import time
+
+
+def directory_fingerprint(path, suffix=None):
+    """Short hash of the names, sizes and modification times of all files under path (ending in suffix)"""
+    digest = hashlib.sha1()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            if suffix and not name.endswith(suffix):
+                continue
+            file_path = os.path.join(root, name)
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            digest.update(f"{os.path.relpath(file_path, path)}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:12]
+
+
+def files_fingerprint(paths, suffix=None):
+    """Short hash over the given files and directories (their files ending in suffix); other paths do not alter it"""
+    digest = hashlib.sha1()
+    for path in paths:
+        if os.path.isdir(path):
+            digest.update(f"{path}:{directory_fingerprint(path, suffix)};".encode())
+            continue
+        try:
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        except OSError:
+            digest.update(f"{path}:missing;".encode())
+    return digest.hexdigest()[:12]
+
+
+def normalize_start_date(start_date):
+    """Canonical YYYY-MM-DD form of a start date, or None if it does not parse"""
+    try:
+        return datetime.strptime(str(start_date), '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        return None
+
+
+class ForecastCache:
+    """Bounded in-process cache of forecast results with LRU and TTL eviction.
+
+    Entries are keyed by (namespace, start_date) and remember the horizon they
+    were computed for, so a cached 24-month forecast also answers any shorter
+    request from the same start date. `version_fn` is polled at most every
+    `version_check_interval` seconds; when its value changes (e.g. a model
+    file was rewritten) every entry is dropped.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=3600, version_fn=None, version_check_interval=5.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version_fn = version_fn
+        self.version_check_interval = version_check_interval
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        self.version = version_fn() if version_fn else None
+        self._version_checked_at = time.monotonic()
+
+    def check_version(self):
+        """Drop all entries if the model version changed; returns True when it did"""
+        if self.version_fn is None:
+            return False
+
+        now = time.monotonic()
+        if now - self._version_checked_at < self.version_check_interval:
+            return False
+        self._version_checked_at = now
+
+        version = self.version_fn()
+        if version == self.version:
+            return False
+
+        with self._lock:
+            self.version = version
+            self._entries.clear()
+            self.invalidations += 1
+        return True
+
+    def get(self, namespace, start_date, months):
+        """Return (value, cached_months) for an entry covering months, or None"""
+        key = (namespace, start_date)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, cached_months, created_at = entry
+                if self.ttl_seconds is not None and time.monotonic() - created_at > self.ttl_seconds:
+                    del self._entries[key]
+                    entry = None
+                elif cached_months < months:
+                    entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value, cached_months
+
+    def put(self, namespace, start_date, months, value):
+        key = (namespace, start_date)
+        with self._lock:
+            existing = self._entries.get(key)
+            # Keep the longer horizon, it serves every shorter prefix
+            if existing is not None and existing[1] > months:
+                self._entries.move_to_end(key)
+                return
+
+            self._entries[key] = (value, months, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'model_version': self.version,
+            }
@@ -0,0 +1,522 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+
+NANOSECONDS_PER_SECOND = 10**9
+NANOSECONDS_PER_DAY = 86400 * NANOSECONDS_PER_SECOND
+
+# Years of holidays added at a time when a forecast runs past the fitted holiday table
+HOLIDAY_EXTENSION_YEARS = 10
+
+_holiday_extension_lock = threading.Lock()
+
+# Prophet.predict keeps intermediate state on the model and is not safe to run concurrently
+_prophet_predict_lock = threading.Lock()
+
+
+def prophet_predict(model, future_df):
+    """Prophet.predict, serialized across threads; only used when no fast engine exists"""
+    with _prophet_predict_lock:
+        return model.predict(future_df)
+
+
+def _datetime_ns(values):
+    """Return datetimes as int64 nanoseconds since the epoch"""
+    return pd.to_datetime(pd.Series(values)).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+
+class FeatureSpec:
+    """Column layout of a fitted Prophet model's seasonal feature matrix.
+
+    Mirrors `Prophet.make_all_seasonality_features`: conditional Fourier
+    seasonalities first, then holiday indicator columns (sorted by name),
+    then the extra regressors.
+    """
+
+    def __init__(self, seasonalities, holiday_columns, holiday_days, holiday_cols, regressors):
+        # seasonalities: list of (name, period, fourier_order, condition_name)
+        self.seasonalities = seasonalities
+        self.holiday_columns = holiday_columns
+        # (day ordinal, column) pairs sorted by day, one per holiday occurrence
+        order = np.argsort(holiday_days, kind='mergesort')
+        self.holiday_days = np.asarray(holiday_days, dtype=np.int64)[order]
+        self.holiday_cols = np.asarray(holiday_cols, dtype=np.int64)[order]
+        # regressors: list of (name, mu, std)
+        self.regressors = regressors
+        self.holiday_source = None
+        self.holidays_through = None
+        self._holiday_profiles = {}
+
+        self.columns = []
+        for name, _, fourier_order, _ in seasonalities:
+            self.columns.extend(f'{name}_delim_{i + 1}' for i in range(2 * fourier_order))
+        self.holiday_offset = len(self.columns)
+        self.columns.extend(holiday_columns)
+        self.columns.extend(name for name, _, _ in regressors)
+
+    @classmethod
+    def from_prophet(cls, model):
+        seasonalities = [
+            (name, float(props['period']), int(props['fourier_order']), props['condition_name'])
+            for name, props in model.seasonalities.items()
+        ]
+
+        holiday_columns, holiday_days, holiday_cols = [], [], []
+        if model.holidays is not None and len(model.holidays) > 0:
+            holidays = model.holidays
+            if model.train_holiday_names is not None:
+                holidays = holidays[holidays['holiday'].isin(model.train_holiday_names)]
+
+            occurrences = cls._holiday_occurrences(holidays)
+            holiday_columns = sorted(occurrences)
+            for col, key in enumerate(holiday_columns):
+                for day in occurrences[key]:
+                    holiday_days.append(day)
+                    holiday_cols.append(col)
+
+        regressors = [
+            (name, float(props['mu']), float(props['std']))
+            for name, props in model.extra_regressors.items()
+        ]
+
+        return cls(seasonalities, holiday_columns, holiday_days, holiday_cols, regressors)
+
+    @staticmethod
+    def _holiday_occurrences(holidays):
+        """Holiday column name -> set of day ordinals, expanding each row's window"""
+        occurrences = {}
+        for row in holidays.itertuples():
+            day = pd.Timestamp(row.ds).normalize().value // NANOSECONDS_PER_DAY
+            lower = int(getattr(row, 'lower_window', 0))
+            upper = int(getattr(row, 'upper_window', 0))
+            for offset in range(lower, upper + 1):
+                key = '{}_delim_{}{}'.format(row.holiday, '+' if offset >= 0 else '-', abs(offset))
+                occurrences.setdefault(key, set()).add(day + offset)
+        return occurrences
+
+    def attach_holiday_source(self, source):
+        """Extend holidays past the fitted table on demand.
+
+        `source(start_year, end_year)` returns a Prophet holidays dataframe.
+        When build() sees dates after the last year the model has holidays
+        for, occurrences of the holidays it was fitted on are added for the
+        later years, so they keep their effect instead of silently dropping out.
+        """
+        if not len(self.holiday_days):
+            return
+        self.holiday_source = source
+        last_day = np.datetime64(int(self.holiday_days.max()), 'D')
+        self.holidays_through = int(last_day.astype('datetime64[Y]').astype(int)) + 1970
+
+    def _extend_holidays(self, year):
+        with _holiday_extension_lock:
+            if year <= self.holidays_through:
+                return
+            start_year = self.holidays_through + 1
+            end_year = max(year, self.holidays_through + HOLIDAY_EXTENSION_YEARS)
+            first_day = np.datetime64(f'{start_year}-01-01', 'D').astype(np.int64)
+
+            columns = {name: col for col, name in enumerate(self.holiday_columns)}
+            days, cols = [self.holiday_days], [self.holiday_cols]
+            for key, occurrences in self._holiday_occurrences(self.holiday_source(start_year, end_year)).items():
+                if key not in columns:
+                    continue
+                new_days = np.array(sorted(day for day in occurrences if day >= first_day), dtype=np.int64)
+                days.append(new_days)
+                cols.append(np.full(len(new_days), columns[key], dtype=np.int64))
+
+            days, cols = np.concatenate(days), np.concatenate(cols)
+            order = np.argsort(days, kind='mergesort')
+            self.holiday_days, self.holiday_cols = days[order], cols[order]
+            self.holidays_through = end_year
+
+    def holiday_profile(self, holiday):
+        """X columns of `holiday` for each month of its window, in order.
+
+        Only window offsets that fell on the first of a month in the fitted
+        occurrences are kept, since those are the ones monthly rows were
+        fitted against; the k-th entry is the effect of the k-th month.
+        """
+        if holiday not in self._holiday_profiles:
+            prefix = f'{holiday}_delim_'
+            occurrence_days = self.holiday_days.astype('datetime64[D]')
+            month_start = occurrence_days == occurrence_days.astype('datetime64[M]').astype('datetime64[D]')
+            profile = []
+            for col, name in enumerate(self.holiday_columns):
+                if not name.startswith(prefix):
+                    continue
+                if month_start[self.holiday_cols == col].any():
+                    offset = int(name[len(prefix):].replace('+', ''))
+                    profile.append((offset, self.holiday_offset + col))
+            self._holiday_profiles[holiday] = [col for _, col in sorted(profile)]
+        return self._holiday_profiles[holiday]
+
+    @property
+    def signature(self):
+        """Hashable key; models with equal signatures share one feature matrix"""
+        return (
+            tuple(self.seasonalities),
+            tuple(self.columns),
+            self.holiday_days.tobytes(),
+            self.holiday_cols.tobytes(),
+            tuple(self.regressors),
+        )
+
+    @property
+    def required_columns(self):
+        conditions = [c for _, _, _, c in self.seasonalities if c is not None]
+        return list(dict.fromkeys(conditions + [name for name, _, _ in self.regressors]))
+
+    @timed('features')
+    def build(self, frame, ds_ns=None):
+        """Build the (rows x columns) feature matrix for a future dataframe"""
+        if ds_ns is None:
+            ds_ns = _datetime_ns(frame['ds'])
+        n = len(ds_ns)
+
+        holiday_days, holiday_cols = self.holiday_days, self.holiday_cols
+        if self.holiday_source is not None and n:
+            last_year = int(np.datetime64(int(ds_ns.max()), 'ns').astype('datetime64[Y]').astype(int)) + 1970
+            if last_year > self.holidays_through:
+                self._extend_holidays(last_year)
+            with _holiday_extension_lock:
+                holiday_days, holiday_cols = self.holiday_days, self.holiday_cols
+        X = np.zeros((n, max(len(self.columns), 1)))
+
+        # Fourier seasonalities, zeroed outside their condition
+        t = ds_ns // NANOSECONDS_PER_SECOND / (3600 * 24.)
+        col = 0
+        for name, period, fourier_order, condition_name in self.seasonalities:
+            orders = np.arange(1, fourier_order + 1)
+            angles = np.outer(t * np.pi * 2, orders) / period
+            block = X[:, col:col + 2 * fourier_order]
+            block[:, 0::2] = np.sin(angles)
+            block[:, 1::2] = np.cos(angles)
+            if condition_name is not None:
+                condition = np.asarray(frame[condition_name], dtype=bool)
+                block[~condition] = 0
+            col += 2 * fourier_order
+
+        # Holiday indicators: match each row's day against the occurrence pairs
+        if len(holiday_days):
+            days = ds_ns // NANOSECONDS_PER_DAY
+            left = np.searchsorted(holiday_days, days, side='left')
+            right = np.searchsorted(holiday_days, days, side='right')
+            counts = right - left
+            if counts.any():
+                rows = np.repeat(np.arange(n), counts)
+                starts = np.repeat(left, counts)
+                within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+                X[rows, self.holiday_offset + holiday_cols[starts + within]] = 1.
+
+        # Extra regressors, standardized as at fit time
+        col = self.holiday_offset + len(self.holiday_columns)
+        for name, mu, std in self.regressors:
+            X[:, col] = (np.asarray(frame[name], dtype=float) - mu) / std
+            col += 1
+
+        return X
+
+
+class FastProphetModel:
+    """NumPy evaluator for the point forecast of a fitted Prophet model.
+
+    Computes the same `yhat` as `Prophet.predict` straight from the fitted
+    parameters, without building Prophet's intermediate dataframes and
+    without Monte Carlo uncertainty sampling unless intervals are requested.
+    Supports linear and flat growth fitted with MAP estimation.
+    """
+
+    def __init__(self, features, growth, start_ns, t_scale_ns, y_scale, floor, k, m,
+                 deltas, changepoints_t, beta, multiplicative, additive, components,
+                 sigma_obs=0.0, interval_width=0.8, uncertainty_samples=1000, history_t_step=None):
+        self.features = features
+        self.growth = growth
+        self.start_ns = int(start_ns)
+        self.t_scale_ns = float(t_scale_ns)
+        self.y_scale = float(y_scale)
+        self.floor = float(floor)
+        self.k = float(k)
+        self.m = float(m)
+        self.deltas = np.asarray(deltas, dtype=float)
+        self.changepoints_t = np.asarray(changepoints_t, dtype=float)
+        self.beta = np.asarray(beta, dtype=float)
+        self.multiplicative = np.asarray(multiplicative, dtype=float)
+        self.additive = np.asarray(additive, dtype=float)
+        # component name -> 0/1 column mask, as in Prophet's train_component_cols
+        self.components = components
+        self.sigma_obs = float(sigma_obs)
+        self.interval_width = float(interval_width)
+        self.uncertainty_samples = int(uncertainty_samples or 1000)
+        self.history_t_step = history_t_step
+
+        self.beta_multiplicative = self.beta * self.multiplicative
+        self.beta_additive = self.beta * self.additive * self.y_scale
+
+    @classmethod
+    def from_prophet(cls, model):
+        """Extract the fitted parameters of a Prophet model"""
+        if model.history is None:
+            raise ValueError('Model has not been fit.')
+        if model.growth not in ('linear', 'flat'):
+            raise ValueError(f"Unsupported growth for fast prediction: {model.growth}")
+        if model.country_holidays is not None:
+            raise ValueError('Built-in country holidays are not supported for fast prediction')
+
+        features = FeatureSpec.from_prophet(model)
+        beta = np.nanmean(model.params['beta'], axis=0)
+        if len(beta) != max(len(features.columns), 1):
+            raise ValueError(
+                f"Feature layout mismatch: {len(features.columns)} columns for {len(beta)} coefficients"
+            )
+
+        component_cols = model.train_component_cols
+        components = {
+            name: component_cols[name].to_numpy(dtype=float)
+            for name in component_cols.columns
+        }
+
+        if model.logistic_floor:
+            raise ValueError('Logistic floor is not supported for fast prediction')
+        floor = model.y_min if model.scaling == 'minmax' else 0.
+
+        history_t = np.asarray(model.history['t'], dtype=float)
+        history_t_step = float(np.diff(history_t).mean()) if len(history_t) > 1 else None
+
+        return cls(
+            features=features,
+            growth=model.growth,
+            start_ns=pd.Timestamp(model.start).value,
+            t_scale_ns=pd.Timedelta(model.t_scale).value,
+            y_scale=model.y_scale,
+            floor=floor,
+            k=np.nanmean(model.params['k']),
+            m=np.nanmean(model.params['m']),
+            deltas=np.nanmean(model.params['delta'], axis=0),
+            changepoints_t=model.changepoints_t,
+            beta=beta,
+            multiplicative=components.get('multiplicative_terms', np.zeros_like(beta)),
+            additive=components.get('additive_terms', np.zeros_like(beta)),
+            components=components,
+            sigma_obs=np.nanmean(model.params['sigma_obs']),
+            interval_width=model.interval_width,
+            uncertainty_samples=model.uncertainty_samples,
+            history_t_step=history_t_step,
+        )
+
+    def scaled_time(self, ds_ns):
+        return (ds_ns - self.start_ns) / self.t_scale_ns
+
+    def predict_trend(self, t):
+        """Trend on the original scale for scaled times `t`"""
+        if self.growth == 'flat':
+            trend = self.m * np.ones_like(t)
+        else:
+            deltas_t = (self.changepoints_t[None, :] <= t[..., None]) * self.deltas
+            k_t = deltas_t.sum(axis=1) + self.k
+            m_t = (deltas_t * -self.changepoints_t).sum(axis=1) + self.m
+            trend = k_t * t + m_t
+        return trend * self.y_scale + self.floor
+
+    @timed('predict')
+    def predict(self, future_df, include_intervals=False, include_components=False, X=None):
+        """Forecast for a future dataframe with `ds` and the model's regressor/condition columns.
+
+        Returns a dataframe with `ds`, `trend`, `additive_terms`,
+        `multiplicative_terms` and `yhat`; `yhat_lower`/`yhat_upper` are added
+        when `include_intervals` is set, and the individual seasonal,
+        holiday and regressor components when `include_components` is set.
+        A prebuilt feature matrix `X` for the same rows can be passed in.
+        """
+        ds_ns = _datetime_ns(future_df['ds'])
+        order = np.argsort(ds_ns, kind='mergesort')
+        if X is None:
+            X = self.features.build(future_df, ds_ns=ds_ns)
+        ds_ns, X = ds_ns[order], X[order]
+
+        t = self.scaled_time(ds_ns)
+        trend = self.predict_trend(t)
+        multiplicative_terms = X @ self.beta_multiplicative
+        additive_terms = X @ self.beta_additive
+
+        result = {
+            'ds': pd.to_datetime(ds_ns),
+            'trend': trend,
+            'additive_terms': additive_terms,
+            'multiplicative_terms': multiplicative_terms,
+        }
+        if include_components:
+            for name, mask in self.components.items():
+                if name in ('additive_terms', 'multiplicative_terms'):
+                    continue
+                scale = self.y_scale if mask @ self.additive > 0 else 1.
+                result[name] = X @ (self.beta * mask) * scale
+        if include_intervals:
+            lower, upper = self.predict_intervals(t, trend, multiplicative_terms, additive_terms)
+            result['yhat_lower'] = lower
+            result['yhat_upper'] = upper
+
+        result['yhat'] = trend * (1 + multiplicative_terms) + additive_terms
+        return pd.DataFrame(result)
+
+    def predict_intervals(self, t, trend, multiplicative_terms, additive_terms):
+        """Uncertainty interval for yhat, following Prophet's vectorized sampler"""
+        n_samples = self.uncertainty_samples
+        n = len(t)
+        uncertainty = np.zeros((n_samples, n))
+
+        future = t > 1
+        n_future = int(future.sum())
+        if self.growth == 'linear' and n_future > 0:
+            if n_future > 1:
+                single_diff = np.diff(t[future]).mean()
+            else:
+                single_diff = self.history_t_step or 0.
+            likelihood = len(self.changepoints_t) * single_diff
+            mean_delta = np.mean(np.abs(self.deltas)) + 1e-8
+
+            changes = np.random.uniform(size=(n_samples, n_future)) < likelihood
+            shifts = np.random.laplace(0, mean_delta, size=changes.shape) * changes
+            shifted = np.hstack([np.zeros((n_samples, 1)), shifts])[:, :-1]
+            shifts = (shifted + shifts) / 2
+            uncertainty[:, future] = shifts.cumsum(axis=1).cumsum(axis=1) * single_diff
+
+        trends = trend + uncertainty * self.y_scale
+        noise = np.random.normal(0, self.sigma_obs, trends.shape) * self.y_scale
+        samples = trends * (1 + multiplicative_terms) + additive_terms + noise
+
+        lower_p = 100 * (1.0 - self.interval_width) / 2
+        upper_p = 100 * (1.0 + self.interval_width) / 2
+        return (
+            np.nanpercentile(samples, lower_p, axis=0),
+            np.nanpercentile(samples, upper_p, axis=0),
+        )
+
+
+class BatchForecastEngine:
+    """Evaluates many FastProphetModels over a shared date grid in one pass.
+
+    Trend parameters are stacked into (models x changepoints) arrays and the
+    seasonal coefficients into (models x columns) matrices, one per distinct
+    feature layout, so every model's yhat comes out of a few matrix products
+    against a feature matrix built once per layout.
+    """
+
+    def __init__(self, engines):
+        self.names = list(engines)
+        models = [engines[name] for name in self.names]
+        n_models = len(models)
+        n_changepoints = max([len(e.changepoints_t) for e in models] + [1])
+
+        self.start_ns = np.array([e.start_ns for e in models], dtype=np.int64)
+        self.t_scale_ns = np.array([e.t_scale_ns for e in models])
+        self.y_scale = np.array([e.y_scale for e in models])
+        self.floor = np.array([e.floor for e in models])
+        self.k = np.array([0. if e.growth == 'flat' else e.k for e in models])
+        self.m = np.array([e.m for e in models])
+
+        # Pad with zero deltas so every model shares the changepoint axis
+        self.changepoints_t = np.zeros((n_models, n_changepoints))
+        self.deltas = np.zeros((n_models, n_changepoints))
+        for i, e in enumerate(models):
+            if e.growth == 'flat':
+                continue
+            self.changepoints_t[i, :len(e.changepoints_t)] = e.changepoints_t
+            self.deltas[i, :len(e.deltas)] = e.deltas
+        self.deltas_changepoints = self.deltas * self.changepoints_t
+
+        groups = {}
+        for i, e in enumerate(models):
+            groups.setdefault(e.features.signature, []).append(i)
+        self.groups = [
+            (
+                models[rows[0]].features,
+                np.array(rows),
+                np.vstack([models[i].beta_multiplicative for i in rows]),
+                np.vstack([models[i].beta_additive for i in rows]),
+            )
+            for rows in groups.values()
+        ]
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def required_columns(self):
+        columns = []
+        for features, _, _, _ in self.groups:
+            columns.extend(features.required_columns)
+        return list(dict.fromkeys(columns))
+
+    def predict_trend(self, ds_ns):
+        """(models x rows) trend for sorted int64 nanosecond dates"""
+        t = (ds_ns[None, :] - self.start_ns[:, None]) / self.t_scale_ns[:, None]
+        passed = (self.changepoints_t[:, None, :] <= t[:, :, None]).astype(float)
+        k_t = self.k[:, None] + np.einsum('cns,cs->cn', passed, self.deltas)
+        m_t = self.m[:, None] - np.einsum('cns,cs->cn', passed, self.deltas_changepoints)
+        return (k_t * t + m_t) * self.y_scale[:, None] + self.floor[:, None]
+
+    @timed('predict')
+    def predict(self, future_df):
+        """Return the (models x rows) yhat matrix, rows sorted by `ds`"""
+        ds_ns = np.sort(_datetime_ns(future_df['ds']), kind='mergesort')
+        frame = future_df.sort_values('ds', kind='mergesort')
+        trend = self.predict_trend(ds_ns)
+
+        yhat = np.empty_like(trend)
+        for features, rows, beta_multiplicative, beta_additive in self.groups:
+            X = features.build(frame, ds_ns=ds_ns)
+            multiplicative_terms = beta_multiplicative @ X.T
+            additive_terms = beta_additive @ X.T
+            yhat[rows] = trend[rows] * (1 + multiplicative_terms) + additive_terms
+        return yhat
+
+    def unreplayable(self, holidays):
+        """Holidays some model has no month-start profile for, so replaying them would change nothing"""
+        return sorted({
+            holiday for holiday in holidays
+            for features, _, _, _ in self.groups if not features.holiday_profile(holiday)
+        })
+
+    @timed('predict')
+    def predict_scenarios(self, future_df, scenarios):
+        """Return the (1 + scenarios, models, rows) yhat array: the baseline, then each scenario.
+
+        Each scenario supplies `build(features, frame, ds_ns, X)`, returning
+        its feature matrix given the baseline one, and `effect(ds_ns)`, a
+        relative change per row applied to the scenario's yhat. The
+        fitted parameters are used as they are; the feature matrices of all
+        scenarios are stacked so each layout takes one product per
+        coefficient matrix.
+        """
+        ds_ns = np.sort(_datetime_ns(future_df['ds']), kind='mergesort')
+        frame = future_df.sort_values('ds', kind='mergesort')
+        trend = self.predict_trend(ds_ns)
+        n_rows = len(ds_ns)
+        n_cases = len(scenarios) + 1
+        effects = np.vstack([np.zeros(n_rows)] + [scenario.effect(ds_ns) for scenario in scenarios])
+
+        yhat = np.empty((n_cases,) + trend.shape)
+        for features, rows, beta_multiplicative, beta_additive in self.groups:
+            X = features.build(frame, ds_ns=ds_ns)
+            stacked = np.vstack([X] + [scenario.build(features, frame, ds_ns, X) for scenario in scenarios])
+            shape = (len(rows), n_cases, n_rows)
+            multiplicative_terms = (beta_multiplicative @ stacked.T).reshape(shape).transpose(1, 0, 2)
+            additive_terms = (beta_additive @ stacked.T).reshape(shape).transpose(1, 0, 2)
+            yhat[:, rows] = trend[rows] * (1 + multiplicative_terms) + additive_terms
+        return yhat * (1 + effects[:, None, :])
+
+
+def top_n(values, count):
+    """Indices of the `count` largest values, largest first"""
+    values = np.asarray(values)
+    if count <= 0 or len(values) == 0:
+        return np.array([], dtype=int)
+    if count < len(values):
+        candidates = np.argpartition(-values, count - 1)[:count]
+    else:
+        candidates = np.arange(len(values))
+    return candidates[np.argsort(-values[candidates], kind='mergesort')]
@@ -0,0 +1,105 @@
+import io
+import json
+
+import numpy as np
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def _json_value(value):
+    if isinstance(value, (float, np.floating)) and np.isnan(value):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _csv_chunks(frames):
+    header_written = False
+    for frame in frames:
+        buffer = io.StringIO()
+        # The header comes from the same writer as the rows, so line endings match
+        frame.to_csv(buffer, header=not header_written, index=False, lineterminator='\n')
+        header_written = True
+        yield buffer.getvalue().encode('utf-8')
+
+
+def _ndjson_chunks(frames):
+    for frame in frames:
+        columns = list(frame.columns)
+        lines = [
+            json.dumps({column: _json_value(value) for column, value in zip(columns, row)})
+            for row in frame.itertuples(index=False, name=None)
+        ]
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to the caller in pieces"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _parquet_chunks(frames):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    writer = None
+    try:
+        # Every chunk becomes one row group, flushed to the client as soon as it is written
+        for frame in frames:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                # A column that is all None in this chunk (actuals past the history) is typed null;
+                # store it as float64 so chunks that do have values still match the file schema
+                schema = pa.schema(
+                    [field.with_type(pa.float64()) if pa.types.is_null(field.type) else field for field in table.schema],
+                    metadata=table.schema.metadata
+                )
+                writer = pq.ParquetWriter(sink, schema)
+            writer.write_table(table.cast(writer.schema))
+            data = sink.take()
+            if data:
+                yield data
+    finally:
+        if writer is not None:
+            writer.close()
+    yield sink.take()
+
+
+def stream_export(frames, export_format='csv'):
+    """Encode an iterator of DataFrame chunks as a stream of bytes in export_format"""
+    if export_format == 'csv':
+        return _csv_chunks(frames)
+    if export_format == 'ndjson':
+        return _ndjson_chunks(frames)
+    if export_format == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise Exception("Parquet export requires pyarrow to be installed")
+        return _parquet_chunks(frames)
+    raise Exception(f"Unsupported export format: {export_format}")
@@ -0,0 +1,157 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import threading
+import time
+import uuid
+
+
+class JobQueueFull(Exception):
+    """Raised when the job executor already has max_queue jobs pending"""
+
+
+class ForecastJob:
+    """State of a single background forecast computation"""
+
+    def __init__(self, kind, params):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.coalesced = 0
+        self.done = threading.Event()
+
+    def to_dict(self, include_result=True):
+        job = {
+            'job_id': self.id,
+            'type': self.kind,
+            'params': self.params,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'coalesced_requests': self.coalesced,
+        }
+        if include_result and self.status == 'done':
+            job['result'] = self.result
+        if self.error is not None:
+            job['error'] = self.error
+        return job
+
+
+class ForecastJobManager:
+    """Runs forecast requests on a bounded thread pool and tracks them by job id.
+
+    At most `max_queue` jobs may be queued or running at once; further
+    submissions raise JobQueueFull. A submission identical to a job that is
+    still in flight returns that job instead of starting a new computation.
+    Finished jobs are kept for `result_ttl` seconds so clients can poll them.
+    Jobs are held in memory, so they are only visible to (and only coalesce
+    within) the process that accepted them.
+    """
+
+    def __init__(self, max_workers=2, max_queue=16, result_ttl=600):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='forecast-job')
+        self._jobs = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    @staticmethod
+    def _key(kind, params):
+        return kind, json.dumps(params, sort_keys=True)
+
+    def submit(self, kind, params, fn):
+        """Queue fn() for (kind, params); returns (job, coalesced)"""
+        key = self._key(kind, params)
+        with self._lock:
+            self._expire()
+
+            job = self._in_flight.get(key)
+            if job is not None:
+                job.coalesced += 1
+                self.coalesced += 1
+                return job, True
+
+            if len(self._in_flight) >= self.max_queue:
+                self.rejected += 1
+                raise JobQueueFull(f"Job queue is full ({self.max_queue} jobs pending)")
+
+            job = ForecastJob(kind, params)
+            self._jobs[job.id] = job
+            self._in_flight[key] = job
+            self.submitted += 1
+
+        self._executor.submit(self._run, key, job, fn)
+        return job, False
+
+    def _run(self, key, job, fn):
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            job.result = fn()
+            if isinstance(job.result, dict) and not job.result.get('success', True):
+                job.status = 'failed'
+                job.error = job.result.get('error')
+            else:
+                job.status = 'done'
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                if self._in_flight.get(key) is job:
+                    del self._in_flight[key]
+            job.done.set()
+
+    def _expire(self):
+        if self.result_ttl is None:
+            return
+        cutoff = time.time() - self.result_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id, timeout=None):
+        """Block until the job finishes or timeout elapses; returns the job or None"""
+        job = self.get(job_id)
+        if job is not None:
+            job.done.wait(timeout)
+        return job
+
+    def stats(self):
+        with self._lock:
+            statuses = {}
+            for job in self._jobs.values():
+                statuses[job.status] = statuses.get(job.status, 0) + 1
+            return {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'in_flight': len(self._in_flight),
+                'jobs': statuses,
+                'submitted': self.submitted,
+                'coalesced': self.coalesced,
+                'rejected': self.rejected,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
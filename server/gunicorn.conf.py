@@ -0,0 +1,34 @@
+# Production server: gunicorn -c gunicorn.conf.py app:app (from the server folder)
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+workers = int(os.environ.get('WEB_WORKERS', min(multiprocessing.cpu_count(), 4)))
+threads = int(os.environ.get('WEB_THREADS', 4))
+
+# /jobs state lives in the worker that accepted the job, so a poll routed to another
+# worker would not find it; while jobs are enabled, run one worker and scale with threads
+if os.environ.get('JOBS_ENABLED', '1') == '1' and workers > 1:
+    print(f"JOBS_ENABLED=1 keeps job state in one process; starting 1 worker instead of {workers} "
+          f"(set JOBS_ENABLED=0 to run more)")
+    workers = 1
+worker_class = 'gthread'
+timeout = int(os.environ.get('WEB_TIMEOUT', 120))
+keepalive = 5
+
+# Load the models once in the master; forked workers share those pages copy-on-write
+preload_app = True
+
+# Background threads do not survive fork, so models are built and warmed before forking
+os.environ.setdefault('MODEL_WARM_UP', 'eager')
+os.environ.setdefault('WARM_COUNTRY_MODELS_IN_BACKGROUND', '0')
+
+accesslog = os.environ.get('ACCESS_LOG', '-')
+
+
+def when_ready(server):
+    # Move everything loaded so far out of the collector's generations, so its
+    # bookkeeping does not write to (and un-share) the preloaded pages
+    gc.freeze()
+    server.log.info(f"Models preloaded, starting {workers} workers x {threads} threads")
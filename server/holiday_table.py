@@ -0,0 +1,193 @@
+from importlib.metadata import version
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+HOLIDAY_TABLE_VERSION = 1
+HOLIDAY_TABLE_PATH = './model/holidays.npz'
+COUNTRY_CODE = 'PH'
+DEFAULT_START_YEAR = 2008
+DEFAULT_END_YEAR = 2035
+
+# One-off shocks modelled as holidays spanning [ds, ds_upper]
+SHOCK_WINDOWS = [
+    {'holiday': 'covid_impact_1', 'ds': '2020-02-01', 'ds_upper': '2020-12-01'},
+    {'holiday': 'covid_impact_2', 'ds': '2021-01-01', 'ds_upper': '2021-12-01'},
+    {'holiday': 'covid_recovery', 'ds': '2022-01-01', 'ds_upper': '2022-07-01'},
+]
+
+
+def _national_holidays(country_code, start_year, end_year):
+    """(names, dates) from the holidays package, in its generation order"""
+    # Imported on first use: loading a saved table does not need the package
+    import holidays
+
+    country_holidays = holidays.country_holidays(country_code, years=list(range(start_year, end_year + 1)))
+    items = list(country_holidays.items())
+    names = np.array([name for _, name in items], dtype=object)
+    dates = np.array([np.datetime64(date, 'D') for date, _ in items], dtype='datetime64[D]')
+    return names, dates
+
+
+def shock_frame(shocks=SHOCK_WINDOWS):
+    lockdowns = pd.DataFrame([
+        {'holiday': shock['holiday'], 'ds': shock['ds'], 'lower_window': 0, 'ds_upper': shock['ds_upper']}
+        for shock in shocks
+    ])
+    for t_col in ['ds', 'ds_upper']:
+        lockdowns[t_col] = pd.to_datetime(lockdowns[t_col])
+    lockdowns['upper_window'] = (lockdowns['ds_upper'] - lockdowns['ds']).dt.days
+    return lockdowns
+
+
+def holiday_frame(names, dates, shocks=SHOCK_WINDOWS):
+    """Prophet holidays dataframe: shock windows, then holidays moved to the first of their month"""
+    holiday_df = pd.DataFrame({'holiday': names, 'ds': pd.to_datetime(dates)})
+    holiday_df['lower_window'] = 0
+    holiday_df['upper_window'] = 0
+    holiday_df = holiday_df.sort_values(by='ds').reset_index(drop=True)
+
+    holiday_df['ds'] = holiday_df['ds'].dt.to_period('M').dt.to_timestamp()
+    holiday_df = holiday_df.drop_duplicates(subset=['holiday', 'ds'])
+
+    return pd.concat([shock_frame(shocks), holiday_df])
+
+
+class HolidayTable:
+    """National holidays for a year range plus shock windows, persisted as a versioned artifact.
+
+    The artifact keeps the raw holiday dates in the order the holidays package
+    produced them, so any sub-range yields exactly the table that building it
+    directly would. Ranges beyond the stored years are generated on demand and
+    kept in memory. Without explicit shocks the artifact's own shock windows
+    are used (SHOCK_WINDOWS for a new artifact), so a table generated with
+    custom shocks keeps them.
+    """
+
+    def __init__(self, path=HOLIDAY_TABLE_PATH, country_code=COUNTRY_CODE, shocks=None,
+                 start_year=DEFAULT_START_YEAR, end_year=DEFAULT_END_YEAR):
+        self.path = path
+        self.country_code = country_code
+        self.shocks = shocks
+        self.names = None
+        self.dates = None
+        self.start_year = None
+        self.end_year = None
+        self._frames = {}
+        self._lock = threading.Lock()
+
+        if not self._load():
+            if self.shocks is None:
+                self.shocks = SHOCK_WINDOWS
+            self._generate(start_year, end_year)
+            self.save()
+
+    def _manifest(self):
+        return {
+            'version': HOLIDAY_TABLE_VERSION,
+            'holidays_version': version('holidays'),
+            'country_code': self.country_code,
+            'shocks': self.shocks,
+            'start_year': self.start_year,
+            'end_year': self.end_year,
+        }
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                manifest = json.loads(str(data['manifest']))
+                names = data['names']
+                codes = data['codes']
+                days = data['days']
+        except Exception as e:
+            print(f"Warning: Could not read holiday table {self.path}: {e}")
+            return False
+
+        if self.shocks is None:
+            # Kept even if the table is regenerated below
+            self.shocks = manifest.get('shocks', SHOCK_WINDOWS)
+
+        expected = self._manifest()
+        for key in ('version', 'holidays_version', 'country_code', 'shocks'):
+            if manifest.get(key) != expected[key]:
+                print(f"Holiday table {self.path} is out of date ({key} changed), regenerating...")
+                return False
+
+        self.names = names.astype(object)[codes]
+        self.dates = days.astype('datetime64[D]')
+        self.start_year = manifest['start_year']
+        self.end_year = manifest['end_year']
+        return True
+
+    def _generate(self, start_year, end_year):
+        self.names, self.dates = _national_holidays(self.country_code, start_year, end_year)
+        self.start_year, self.end_year = start_year, end_year
+        self._frames = {}
+
+    def save(self):
+        if not self.path:
+            return
+        unique_names, codes = np.unique(self.names.astype(str), return_inverse=True)
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            manifest=np.array(json.dumps(self._manifest())),
+            names=unique_names,
+            codes=codes.astype(np.int32),
+            days=self.dates.astype(np.int64),
+        )
+        os.replace(tmp_path, self.path)
+
+    def extend(self, start_year, end_year):
+        """Cover [start_year, end_year], generating any missing years in memory"""
+        with self._lock:
+            if start_year >= self.start_year and end_year <= self.end_year:
+                return
+            self._generate(min(start_year, self.start_year), max(end_year, self.end_year))
+
+    def frame(self, start_year, end_year):
+        """Prophet holidays dataframe for [start_year, end_year] (shock windows always included)"""
+        self.extend(start_year, end_year)
+        key = (start_year, end_year)
+        if key not in self._frames:
+            years = self.dates.astype('datetime64[Y]').astype(int) + 1970
+            selected = (years >= start_year) & (years <= end_year)
+            self._frames[key] = holiday_frame(self.names[selected], self.dates[selected], self.shocks)
+        return self._frames[key].copy()
+
+
+_tables = {}
+
+
+def load_holiday_table(path=HOLIDAY_TABLE_PATH):
+    """Process-wide HolidayTable for path, loaded once and shared by every pipeline"""
+    if path not in _tables:
+        _tables[path] = HolidayTable(path)
+    return _tables[path]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate the holiday and shock table artifact")
+    parser.add_argument('--start-year', type=int, default=DEFAULT_START_YEAR)
+    parser.add_argument('--end-year', type=int, default=DEFAULT_END_YEAR)
+    parser.add_argument('--shocks', help="JSON file with a list of {holiday, ds, ds_upper} shock windows")
+    parser.add_argument('--output', default=HOLIDAY_TABLE_PATH)
+    args = parser.parse_args()
+
+    shocks = SHOCK_WINDOWS
+    if args.shocks:
+        with open(args.shocks) as f:
+            shocks = json.load(f)
+
+    table = HolidayTable(path=None, shocks=shocks, start_year=args.start_year, end_year=args.end_year)
+    table.path = args.output
+    table.save()
+    print(f"[>] Wrote {len(table.names)} holidays for {args.start_year}-{args.end_year} "
+          f"and {len(shocks)} shock windows to {args.output}")
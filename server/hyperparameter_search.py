@@ -0,0 +1,255 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+import itertools
+import json
+import time
+
+import numpy as np
+
+from backtesting import DEFAULT_HORIZON, DEFAULT_INITIAL, DEFAULT_PERIOD, evaluate_cutoff, rolling_cutoffs
+
+SEARCH_SPACE = {
+    'seasonality_mode': ['multiplicative', 'additive'],
+    'seasonality_period': [365.5],
+    'fourier_order': [3, 5, 10, 15],
+    'changepoint_prior_scale': [0.001, 0.01, 0.05, 0.1, 0.5],
+}
+SEARCH_METRICS = ('rmse', 'mape')
+SEARCH_CUTOFFS = 2
+DEFAULT_PATIENCE = 8
+DEFAULT_BUDGET_SECONDS = 1800
+
+
+def candidate_configs(baseline, space=SEARCH_SPACE, strategy='grid', samples=20, seed=0):
+    """Configs to try, baseline first; 'random' draws `samples` grid points without replacement"""
+    keys = sorted(space)
+    grid = [dict(zip(keys, values)) for values in itertools.product(*(space[key] for key in keys))]
+    if strategy == 'random':
+        rng = np.random.default_rng(seed)
+        grid = [grid[i] for i in rng.permutation(len(grid))[:samples]]
+    elif strategy != 'grid':
+        raise ValueError(f"Unknown search strategy: {strategy}")
+
+    candidates = [dict(baseline)]
+    for config in grid:
+        config = {**baseline, **config}
+        if config not in candidates:
+            candidates.append(config)
+    return candidates
+
+
+def _point_losses(predictions, metric):
+    error = predictions['yhat'].to_numpy() - predictions['y'].to_numpy()
+    if metric == 'mape':
+        actual = predictions['y'].to_numpy()
+        nonzero = actual != 0
+        return np.abs(error[nonzero] / actual[nonzero])
+    return error ** 2
+
+
+def _score(loss, points, metric):
+    if points == 0:
+        return None
+    return float(np.sqrt(loss / points)) if metric == 'rmse' else float(loss / points)
+
+
+def tune_country(country, frame, holidays_df, candidates, cutoffs, horizon, metric, patience, deadline):
+    """Evaluate candidates for one country in order and return the best one.
+
+    Losses are summed over cutoffs (most recent first), so a candidate is
+    dropped as soon as its partial loss reaches the best total. The search
+    stops after `patience` candidates without improvement or at `deadline`.
+    A candidate whose fit fails is counted as failed and skipped.
+    """
+    start_time = time.time()
+    best_config, best_loss, best_points = None, None, 0
+    baseline_score = None
+    evaluated = pruned = failed = since_improvement = 0
+    stop_reason = 'exhausted'
+
+    for config in candidates:
+        if time.time() >= deadline:
+            stop_reason = 'budget'
+            break
+        if best_config is not None and since_improvement >= patience:
+            stop_reason = 'early_stopping'
+            break
+
+        loss, points = 0.0, 0
+        try:
+            for cutoff in cutoffs:
+                _, _, predictions, _ = evaluate_cutoff(country, frame, cutoff, horizon, holidays_df, config)
+                losses = _point_losses(predictions, metric)
+                loss += float(losses.sum())
+                points += len(losses)
+                if best_loss is not None and loss >= best_loss:
+                    break
+        except Exception as e:
+            print(f"Error evaluating a candidate for {country} ({config}): {e}")
+            failed += 1
+            since_improvement += 1
+            continue
+        evaluated += 1
+
+        if best_loss is not None and loss >= best_loss:
+            pruned += 1
+            since_improvement += 1
+            continue
+
+        if config is candidates[0]:
+            baseline_score = _score(loss, points, metric)
+        best_config, best_loss, best_points = config, loss, points
+        since_improvement = 0
+
+    return {
+        'country': country,
+        'config': best_config,
+        'score': _score(best_loss, best_points, metric) if best_config is not None else None,
+        'baseline_score': baseline_score,
+        'metric': metric,
+        'evaluated': evaluated,
+        'pruned': pruned,
+        'failed': failed,
+        'stop_reason': stop_reason,
+        'seconds': time.time() - start_time,
+    }
+
+
+class HyperparameterSearch:
+    """Per-country search over the country model configuration on a process pool.
+
+    Each country is one task that scores its candidates with quick
+    rolling-origin backtests. The whole run shares one wall-clock budget;
+    countries not finished by then keep their current config.
+    """
+
+    def __init__(self, country_models, space=SEARCH_SPACE, strategy='grid', samples=20, seed=0, metric='rmse',
+                 horizon=DEFAULT_HORIZON, period=DEFAULT_PERIOD, initial=DEFAULT_INITIAL, cutoffs=SEARCH_CUTOFFS,
+                 patience=DEFAULT_PATIENCE, budget_seconds=DEFAULT_BUDGET_SECONDS, max_workers=None):
+        if metric not in SEARCH_METRICS:
+            raise ValueError(f"Unknown metric: {metric}. Expected one of: {', '.join(SEARCH_METRICS)}")
+        self.country_models = country_models
+        self.space = space
+        self.strategy = strategy
+        self.samples = samples
+        self.seed = seed
+        self.metric = metric
+        self.horizon = horizon
+        self.period = period
+        self.initial = initial
+        self.cutoffs = cutoffs
+        self.patience = patience
+        self.budget_seconds = budget_seconds
+        self.max_workers = max_workers or country_models.max_workers
+
+    def run(self, countries=None):
+        """Search every country; returns {country: result} for the countries that finished a baseline"""
+        if countries is None:
+            countries = self.country_models.countries
+        deadline = time.time() + self.budget_seconds
+
+        print(f"[>] Tuning {len(countries)} countries on {self.max_workers} processes "
+              f"({self.strategy} search, budget {self.budget_seconds}s)...")
+        results = {}
+        context = get_context(self.country_models.mp_start_method)
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context) as executor:
+            futures = {}
+            for country in countries:
+                frame = self.country_models.country_data.frame(country)
+                cutoffs = rolling_cutoffs(frame['ds'], self.horizon, self.period, self.initial, self.cutoffs)[::-1]
+                candidates = candidate_configs(
+                    self.country_models.config_for(country), self.space, self.strategy, self.samples, self.seed
+                )
+                future = executor.submit(
+                    tune_country, country, frame, self.country_models.holidays, candidates, cutoffs,
+                    self.horizon, self.metric, self.patience, deadline
+                )
+                futures[future] = country
+
+            for future in as_completed(futures):
+                country = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Error tuning {country}: {e}")
+                    continue
+                if result['config'] is None:
+                    reason = 'every candidate failed' if result['failed'] else 'budget exhausted'
+                    print(f"[>] No config for {country} ({reason})")
+                    continue
+                results[country] = result
+                baseline = f"{result['baseline_score']:,.3f}" if result['baseline_score'] is not None else 'failed'
+                print(f"[>] Tuned {country}: {self.metric} {baseline} -> "
+                      f"{result['score']:,.3f} after {result['evaluated']} candidates "
+                      f"({result['failed']} failed, {result['stop_reason']}, {result['seconds']:.1f}s)")
+        return results
+
+    def save(self, results):
+        """Store each country's winning config next to its cached model"""
+        for country, result in results.items():
+            details = {key: value for key, value in result.items() if key not in ('country', 'config')}
+            self.country_models.save_tuned_config(country, result['config'], **details)
+
+
+if __name__ == "__main__":
+    import argparse
+    from prophet_country_model import ProphetCountrySpecificModels
+
+    parser = argparse.ArgumentParser(description="Search the country model configuration per country")
+    parser.add_argument('--countries', nargs='*', help="Countries to tune (default all)")
+    parser.add_argument('--strategy', choices=['grid', 'random'], default='grid')
+    parser.add_argument('--samples', type=int, default=20, help="Candidates drawn per country by random search")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--space', help="JSON file mapping config keys to candidate values")
+    parser.add_argument('--metric', choices=SEARCH_METRICS, default='rmse')
+    parser.add_argument('--horizon', type=int, default=DEFAULT_HORIZON, help="Months scored after each cutoff")
+    parser.add_argument('--cutoffs', type=int, default=SEARCH_CUTOFFS, help="Most recent cutoffs scored per candidate")
+    parser.add_argument('--patience', type=int, default=DEFAULT_PATIENCE,
+                        help="Stop a country after this many candidates without improvement")
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_SECONDS, help="Wall-clock budget in seconds")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--dry-run', action='store_true', help="Report the winners without saving them")
+    args = parser.parse_args()
+
+    space = SEARCH_SPACE
+    if args.space:
+        with open(args.space) as f:
+            space = json.load(f)
+
+    # Lazy: the search refits from configuration and never needs the cached models
+    country_models = ProphetCountrySpecificModels(
+        data_path='./dataset/country_monthly_dataset.csv',
+        use_multiprocessing=True,
+        max_workers=args.workers,
+        lazy=True
+    )
+
+    countries = country_models.countries
+    if args.countries:
+        countries = [country_models.find_country(country) for country in args.countries]
+        unknown = [name for name, country in zip(args.countries, countries) if country is None]
+        if unknown:
+            parser.error(f"Unknown countries: {', '.join(unknown)}")
+
+    search = HyperparameterSearch(
+        country_models,
+        space=space,
+        strategy=args.strategy,
+        samples=args.samples,
+        seed=args.seed,
+        metric=args.metric,
+        horizon=args.horizon,
+        cutoffs=args.cutoffs,
+        patience=args.patience,
+        budget_seconds=args.budget
+    )
+    start_time = time.time()
+    results = search.run(countries)
+
+    changed = [country for country, result in results.items() if result['config'] != country_models.config_for(country)]
+    if not args.dry_run:
+        search.save(results)
+    print(f"[>>>>] Tuned {len(results)} countries in {time.time() - start_time:.2f}s, "
+          f"{len(changed)} with a new config{' (dry run, nothing saved)' if args.dry_run else ''}")
+    if changed and not args.dry_run:
+        print("[>] Their cached models are now stale and are refitted on the next training run")
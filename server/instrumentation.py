@@ -0,0 +1,154 @@
+from contextlib import contextmanager
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram with labels"""
+
+    def __init__(self, name, help_text, labelnames, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0, 0.0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def _labels(self, key, extra=None):
+        pairs = list(zip(self.labelnames, key))
+        if extra:
+            pairs.append(extra)
+        escaped = (
+            '{}="{}"'.format(name, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+            for name, value in pairs
+        )
+        return '{' + ','.join(escaped) + '}'
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, count, total) in sorted(self._series.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{self._labels(key, ('le', repr(float(bound))))} {bucket_count}")
+                lines.append(f"{self.name}_bucket{self._labels(key, ('le', '+Inf'))} {count}")
+                lines.append(f"{self.name}_sum{self._labels(key)} {total!r}")
+                lines.append(f"{self.name}_count{self._labels(key)} {count}")
+        return '\n'.join(lines)
+
+
+STAGE_SECONDS = Histogram(
+    'forecast_stage_seconds',
+    'Time spent in each forecast stage, excluding nested stages',
+    ('endpoint', 'stage')
+)
+REQUEST_SECONDS = Histogram(
+    'forecast_request_seconds',
+    'Total request latency',
+    ('endpoint', 'method', 'status')
+)
+
+_local = threading.local()
+
+
+class Profile:
+    """Per-request accumulation of stage timings"""
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.started_at = time.perf_counter()
+        self.stages = {}
+        self.stack = []
+
+    def elapsed(self):
+        return time.perf_counter() - self.started_at
+
+    def server_timing(self):
+        """Value for a Server-Timing header, durations in milliseconds"""
+        parts = [f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in self.stages.items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.3f}")
+        return ', '.join(parts)
+
+
+def start_profile(endpoint):
+    _local.profile = Profile(endpoint)
+    return _local.profile
+
+
+def finish_profile():
+    profile = getattr(_local, 'profile', None)
+    _local.profile = None
+    return profile
+
+
+def current_profile():
+    return getattr(_local, 'profile', None)
+
+
+def profiled_stream(chunks, profile):
+    """Yield chunks with profile current while each one is produced.
+
+    A streamed response body runs after the request's after_request hooks,
+    so stages timed while producing it would otherwise land on 'background'.
+    """
+    iterator = iter(chunks)
+    while True:
+        previous = current_profile()
+        _local.profile = profile
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _local.profile = previous
+        yield chunk
+
+
+@contextmanager
+def timed(stage):
+    """Record the time spent in a forecast stage.
+
+    Time spent in stages nested inside this one is attributed to them only,
+    so the stages of a request add up to at most its total latency.
+    """
+    profile = current_profile()
+    stack = profile.stack if profile is not None else _background_stack()
+    stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        total = time.perf_counter() - start
+        own = total - stack.pop()
+        if stack:
+            stack[-1] += total
+
+        endpoint = profile.endpoint if profile is not None else 'background'
+        STAGE_SECONDS.observe(own, endpoint=endpoint, stage=stage)
+        if profile is not None:
+            profile.stages[stage] = profile.stages.get(stage, 0.0) + own
+
+
+def _background_stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format"""
+    return '\n'.join([STAGE_SECONDS.render(), REQUEST_SECONDS.render()]) + '\n'
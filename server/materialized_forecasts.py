@@ -0,0 +1,195 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from forecast_cache import directory_fingerprint, normalize_start_date
+from model_store import file_source
+from utils import nullable_values
+
+MATERIALIZED_PATH = './model/materialized_forecasts.npz'
+
+
+def source_identity(aggregated_model_path, aggregated_data_path, country_data_path, country_cache_dir):
+    """Identity of the model and data files behind a materialized file, from their paths alone"""
+    sources = {
+        'aggregated_model': aggregated_model_path,
+        'aggregated_data': aggregated_data_path,
+        'country_data': country_data_path,
+    }
+    identity = {
+        name: file_source(path) if os.path.exists(path) else None
+        for name, path in sources.items()
+    }
+    # Only the fitted models; metadata sidecars and tuned configs do not change a forecast
+    identity['country_models'] = directory_fingerprint(country_cache_dir, suffix='_model.json')
+    return identity
+
+
+def model_sources(tourism_model):
+    """Identity of every model and dataset a materialized file was computed from"""
+    countries = tourism_model.prophet_countries
+    return source_identity(
+        tourism_model.aggregated_model_path,
+        tourism_model.aggregated_data_path,
+        countries.data_path,
+        countries.cache_dir
+    )
+
+
+def materialize_forecasts(tourism_model, start_dates, max_months, path=MATERIALIZED_PATH):
+    """Precompute aggregated and per-country forecasts for every start date in the grid.
+
+    Each start date is forecast once for max_months; any shorter horizon is a
+    prefix of that row. Arrays are stored column by column in an uncompressed
+    .npz next to the models, which NumPy reads without any extra dependency.
+    """
+    start_dates = [normalize_start_date(start_date) for start_date in start_dates]
+    if None in start_dates:
+        raise ValueError("Start dates must be in YYYY-MM-DD format")
+
+    dates = np.empty((len(start_dates), max_months), dtype='<U10')
+    aggregated_yhat = np.empty((len(start_dates), max_months))
+    aggregated_actual = np.empty((len(start_dates), max_months))
+    country_names = None
+    country_yhat = None
+
+    for i, start_date in enumerate(start_dates):
+        records = tourism_model._forecast_records(start_date, max_months)
+        dates[i] = [record['date'] for record in records]
+        aggregated_yhat[i] = [record['prediction'] for record in records]
+        aggregated_actual[i] = [np.nan if record['actual'] is None else record['actual'] for record in records]
+
+        names, yhat = tourism_model.prophet_countries.forecast_country_matrix(start_date, max_months)
+        if country_names is None:
+            country_names = sorted(names)
+            country_yhat = np.empty((len(start_dates), len(country_names), max_months))
+        order = {name: row for row, name in enumerate(names)}
+        country_yhat[i] = yhat[[order[name] for name in country_names]]
+
+    manifest = {
+        'created_at': time.time(),
+        'max_months': max_months,
+        'sources': model_sources(tourism_model),
+    }
+
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(
+        tmp_path,
+        manifest=np.array(json.dumps(manifest)),
+        start_dates=np.array(start_dates),
+        dates=dates,
+        aggregated_yhat=aggregated_yhat,
+        aggregated_actual=aggregated_actual,
+        country_names=np.array(country_names or []),
+        country_yhat=country_yhat if country_yhat is not None else np.zeros((len(start_dates), 0, max_months)),
+    )
+    os.replace(tmp_path, path)
+
+
+class MaterializedForecasts:
+    """Precomputed forecasts keyed by start date, answering any horizon up to max_months"""
+
+    def __init__(self, path):
+        self.path = path
+        with np.load(path, allow_pickle=False) as data:
+            self.manifest = json.loads(str(data['manifest']))
+            self.start_dates = [str(start_date) for start_date in data['start_dates']]
+            self.dates = data['dates']
+            self.aggregated_yhat = data['aggregated_yhat']
+            self.aggregated_actual = data['aggregated_actual']
+            self.country_names = [str(name) for name in data['country_names']]
+            self.country_yhat = data['country_yhat']
+
+        self.max_months = self.manifest['max_months']
+        self.index = {start_date: row for row, start_date in enumerate(self.start_dates)}
+        # Running totals so top-country rankings are a single column lookup
+        self.country_cumulative = np.cumsum(self.country_yhat, axis=2)
+        self.hits = 0
+
+    def is_current(self, sources):
+        return self.manifest['sources'] == sources
+
+    def _row(self, start_date, months_to_forecast):
+        if not 0 < months_to_forecast <= self.max_months:
+            return None
+        return self.index.get(normalize_start_date(start_date))
+
+    def forecast_records(self, start_date, months_to_forecast):
+        """Records in the /forecast format, or None if the request is outside the grid"""
+        row = self._row(start_date, months_to_forecast)
+        if row is None:
+            return None
+        self.hits += 1
+
+        actual = nullable_values(self.aggregated_actual[row, :months_to_forecast])
+
+        return pd.DataFrame({
+            'date': self.dates[row, :months_to_forecast],
+            'actual': actual,
+            'prediction': self.aggregated_yhat[row, :months_to_forecast]
+        }).to_dict('records')
+
+    def country_totals(self, start_date, months_to_forecast):
+        """(country names, total arrivals per country), or None if outside the grid"""
+        row = self._row(start_date, months_to_forecast)
+        if row is None:
+            return None
+        self.hits += 1
+        return self.country_names, self.country_cumulative[row, :, months_to_forecast - 1]
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'start_dates': len(self.start_dates),
+            'first_start_date': self.start_dates[0] if self.start_dates else None,
+            'last_start_date': self.start_dates[-1] if self.start_dates else None,
+            'max_months': self.max_months,
+            'countries': len(self.country_names),
+            'hits': self.hits,
+        }
+
+
+def open_materialized_forecasts(path, sources=None):
+    """Open path, or return None if it is missing, unreadable or computed from other models"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        materialized = MaterializedForecasts(path)
+    except Exception as e:
+        print(f"Warning: Could not open materialized forecasts {path}: {e}")
+        return None
+
+    if sources is not None and not materialized.is_current(sources):
+        print(f"Warning: Materialized forecasts in {path} are out of date, serving live predictions")
+        return None
+    return materialized
+
+
+if __name__ == "__main__":
+    import argparse
+    from prophet_model import ProphetTourismModel
+
+    parser = argparse.ArgumentParser(description="Precompute forecasts for a grid of start dates and horizons")
+    parser.add_argument('--start', default='2015-01-01', help="First start date of the grid (YYYY-MM-DD)")
+    parser.add_argument('--end', default='2030-12-01', help="Last start date of the grid (YYYY-MM-DD)")
+    parser.add_argument('--max-months', type=int, default=60, help="Longest horizon served from the grid")
+    parser.add_argument('--output', default=MATERIALIZED_PATH, help="Output file")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    tourism_model = ProphetTourismModel(
+        './model/aggregated_model.json',
+        './dataset/aggregated_dataset.csv',
+        './dataset/country_monthly_dataset.csv',
+        materialized_path=None
+    )
+
+    start_dates = pd.date_range(args.start, args.end, freq='MS').strftime('%Y-%m-%d')
+    materialize_forecasts(tourism_model, start_dates, args.max_months, args.output)
+
+    elapsed = time.time() - start_time
+    print(f"[>>>>] Materialized {len(start_dates)} start dates x {args.max_months} months "
+          f"to {args.output} in {elapsed:.2f}s")
@@ -0,0 +1,256 @@
+import glob
+import hashlib
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+from forecast_engine import FeatureSpec, FastProphetModel
+
+STORE_MAGIC = b'PHFCST01'
+ALIGNMENT = 64
+
+AGGREGATED_MODEL_PATH = './model/aggregated_model.json'
+AGGREGATED_STORE_PATH = './model/aggregated_model.store'
+COUNTRY_CACHE_DIR = './model/country_model_cache'
+COUNTRY_STORE_PATH = './model/country_models.store'
+
+
+def file_source(path):
+    """Identity of a source model file, used to detect stale store entries"""
+    stat = os.stat(path)
+    return {'path': os.path.basename(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _feature_state(features):
+    meta = {
+        'seasonalities': [list(s) for s in features.seasonalities],
+        'holiday_columns': list(features.holiday_columns),
+        'regressors': [list(r) for r in features.regressors],
+    }
+    arrays = {'holiday_days': features.holiday_days, 'holiday_cols': features.holiday_cols}
+    return meta, arrays
+
+
+def _engine_state(engine):
+    component_names = list(engine.components)
+    meta = {
+        'growth': engine.growth,
+        'start_ns': engine.start_ns,
+        't_scale_ns': engine.t_scale_ns,
+        'y_scale': engine.y_scale,
+        'floor': engine.floor,
+        'k': engine.k,
+        'm': engine.m,
+        'sigma_obs': engine.sigma_obs,
+        'interval_width': engine.interval_width,
+        'uncertainty_samples': engine.uncertainty_samples,
+        'history_t_step': engine.history_t_step,
+        'component_names': component_names,
+    }
+    arrays = {
+        'deltas': engine.deltas,
+        'changepoints_t': engine.changepoints_t,
+        'beta': engine.beta,
+        'multiplicative': engine.multiplicative.astype(np.uint8),
+        'additive': engine.additive.astype(np.uint8),
+        'components': (
+            np.vstack([engine.components[name] for name in component_names]).astype(np.uint8)
+            if component_names else np.zeros((0, len(engine.beta)), dtype=np.uint8)
+        ),
+    }
+    return meta, arrays
+
+
+def write_model_store(path, engines, sources=None):
+    """Write engines (name -> FastProphetModel) to a single flat-buffer archive.
+
+    Layout: magic, manifest length, JSON manifest, then every array as raw
+    little-endian bytes aligned to 64 bytes. Feature layouts shared by several
+    models are written once. The file is replaced atomically so workers that
+    still map the previous version keep a valid view.
+    """
+    sources = sources or {}
+    manifest = {'created_at': time.time(), 'features': [], 'models': {}}
+    blobs = []
+    written = {}
+    offset = 0
+
+    def add_array(array):
+        nonlocal offset
+        array = np.ascontiguousarray(array)
+        dtype = array.dtype.newbyteorder('<')
+        array = array.astype(dtype, copy=False)
+        data = array.tobytes()
+
+        # Identical arrays (component masks, shared changepoint grids) are stored once
+        key = (dtype.str, array.shape, hashlib.sha1(data).digest())
+        if key not in written:
+            written[key] = [offset, dtype.str, list(array.shape)]
+            padding = -len(data) % ALIGNMENT
+            blobs.append(data + b'\0' * padding)
+            offset += len(data) + padding
+        return written[key]
+
+    feature_index = {}
+    for name, engine in engines.items():
+        signature = engine.features.signature
+        if signature not in feature_index:
+            meta, arrays = _feature_state(engine.features)
+            meta['arrays'] = {key: add_array(value) for key, value in arrays.items()}
+            feature_index[signature] = len(manifest['features'])
+            manifest['features'].append(meta)
+
+        meta, arrays = _engine_state(engine)
+        meta['features'] = feature_index[signature]
+        meta['arrays'] = {key: add_array(value) for key, value in arrays.items()}
+        meta['source'] = sources.get(name)
+        manifest['models'][name] = meta
+
+    header = json.dumps(manifest).encode('utf-8')
+    prefix = STORE_MAGIC + struct.pack('<Q', len(header)) + header
+    prefix += b'\0' * (-len(prefix) % ALIGNMENT)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(prefix)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+
+class ModelStore:
+    """Read-only, memory-mapped view of an archive written by write_model_store.
+
+    Arrays are zero-copy views into the mapped file, so the pages are shared
+    between every worker process that opens the same store.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(STORE_MAGIC)) != STORE_MAGIC:
+                raise ValueError(f"{path} is not a model store")
+            (header_length,) = struct.unpack('<Q', f.read(8))
+            self.manifest = json.loads(f.read(header_length).decode('utf-8'))
+
+        prefix_length = len(STORE_MAGIC) + 8 + header_length
+        self.data_offset = prefix_length + (-prefix_length % ALIGNMENT)
+        self.buffer = np.memmap(path, dtype=np.uint8, mode='r')
+        self._features = {}
+
+    @property
+    def names(self):
+        return list(self.manifest['models'])
+
+    def __contains__(self, name):
+        return name in self.manifest['models']
+
+    def _array(self, entry):
+        offset, dtype, shape = entry
+        dtype = np.dtype(dtype)
+        start = self.data_offset + offset
+        count = int(np.prod(shape)) if shape else 1
+        return self.buffer[start:start + count * dtype.itemsize].view(dtype).reshape(shape)
+
+    def _feature_spec(self, index):
+        if index not in self._features:
+            meta = self.manifest['features'][index]
+            arrays = {key: self._array(entry) for key, entry in meta['arrays'].items()}
+            self._features[index] = FeatureSpec(
+                seasonalities=[tuple(s) for s in meta['seasonalities']],
+                holiday_columns=meta['holiday_columns'],
+                holiday_days=arrays['holiday_days'],
+                holiday_cols=arrays['holiday_cols'],
+                regressors=[tuple(r) for r in meta['regressors']],
+            )
+        return self._features[index]
+
+    def source(self, name):
+        return self.manifest['models'][name].get('source')
+
+    def is_current(self, name, source_path):
+        """True if the entry was converted from source_path as it is on disk now"""
+        source = self.source(name)
+        if source is None or not os.path.exists(source_path):
+            return True
+        current = file_source(source_path)
+        return source['size'] == current['size'] and source['mtime_ns'] == current['mtime_ns']
+
+    def load(self, name):
+        """Build the FastProphetModel for name"""
+        meta = self.manifest['models'][name]
+        arrays = {key: self._array(entry) for key, entry in meta['arrays'].items()}
+        components = dict(zip(meta['component_names'], arrays['components'].astype(float)))
+
+        return FastProphetModel(
+            features=self._feature_spec(meta['features']),
+            growth=meta['growth'],
+            start_ns=meta['start_ns'],
+            t_scale_ns=meta['t_scale_ns'],
+            y_scale=meta['y_scale'],
+            floor=meta['floor'],
+            k=meta['k'],
+            m=meta['m'],
+            deltas=arrays['deltas'],
+            changepoints_t=arrays['changepoints_t'],
+            beta=arrays['beta'],
+            multiplicative=arrays['multiplicative'],
+            additive=arrays['additive'],
+            components=components,
+            sigma_obs=meta['sigma_obs'],
+            interval_width=meta['interval_width'],
+            uncertainty_samples=meta['uncertainty_samples'],
+            history_t_step=meta['history_t_step'],
+        )
+
+
+def open_model_store(path):
+    """Open the store at path, or return None if it is missing or unreadable"""
+    if not os.path.exists(path):
+        return None
+    try:
+        return ModelStore(path)
+    except Exception as e:
+        print(f"Warning: Could not open model store {path}: {e}")
+        return None
+
+
+def convert_json_models(json_paths, store_path):
+    """Convert Prophet JSON models (name -> path) into a single model store"""
+    from prophet.serialize import model_from_json
+
+    engines = {}
+    sources = {}
+    for name, json_path in json_paths.items():
+        with open(json_path, 'r') as f:
+            model = model_from_json(f.read())
+        engines[name] = FastProphetModel.from_prophet(model)
+        sources[name] = file_source(json_path)
+
+    write_model_store(store_path, engines, sources)
+    return engines
+
+
+def country_model_paths(cache_dir=COUNTRY_CACHE_DIR):
+    """Country name -> cached Prophet JSON model path"""
+    suffix = '_model.json'
+    return {
+        os.path.basename(path)[:-len(suffix)]: path
+        for path in sorted(glob.glob(os.path.join(cache_dir, f'*{suffix}')))
+    }
+
+
+if __name__ == "__main__":
+    start_time = time.time()
+    convert_json_models({'aggregated': AGGREGATED_MODEL_PATH}, AGGREGATED_STORE_PATH)
+    print(f"[>] Wrote {AGGREGATED_STORE_PATH}")
+
+    country_paths = country_model_paths()
+    convert_json_models(country_paths, COUNTRY_STORE_PATH)
+    print(f"[>] Wrote {COUNTRY_STORE_PATH} with {len(country_paths)} country models")
+
+    elapsed = time.time() - start_time
+    print(f"[>>>>] Model store conversion completed in {elapsed:.2f}s")
@@ -1,149 +1,383 @@
-from prophet import Prophet
-from prophet.serialize import model_to_json, model_from_json
-from utils import create_future_dataframe, COVID_OUTBREAK_DATE, COVID_RECOVERY_DATE
+from utils import MONTHS, add_future_features, create_future_features
+from country_data import CountryDataStore
+from columnar_dataset import columnar_path
+from forecast_engine import FastProphetModel, BatchForecastEngine, prophet_predict, top_n
+from model_store import open_model_store
+from scenarios import check_replays
+from instrumentation import timed
 import pandas as pd
-import holidays
+from holiday_table import HOLIDAY_TABLE_PATH, load_holiday_table
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
-from multiprocessing import cpu_count
+from multiprocessing import cpu_count, get_context
 import numpy as np
 from functools import partial
+from collections import OrderedDict
+import hashlib
+from io import StringIO
+import json
 import os
 from typing import Dict, Tuple, Optional
+import threading
 import time
 
+# Aggregate components returned next to each seasonality by forecast_country_series
+SERIES_COMPONENTS = ['holidays', 'extra_regressors_multiplicative', 'multiplicative_terms', 'additive_terms']
+
+TRAINING_COLUMNS = ['ds', 'y', 'pre_covid', 'has_covid'] + [f'is_{month}' for month in MONTHS]
+
+
+DEFAULT_MODEL_CONFIG = {
+    'seasonality_mode': 'multiplicative',
+    'seasonality_period': 365.5,
+    'fourier_order': 10,
+    'changepoint_prior_scale': 0.05,
+}
+
+
+def create_country_model(holidays_df, config=None) -> 'Prophet':
+    """Create an unfitted Prophet model with the country model configuration"""
+    # Imported on first use: serving from the model store never needs Prophet
+    from prophet import Prophet
+
+    config = config or DEFAULT_MODEL_CONFIG
+    model = Prophet(
+        yearly_seasonality=False,
+        seasonality_mode=config['seasonality_mode'],
+        changepoint_prior_scale=config['changepoint_prior_scale'],
+        holidays=holidays_df,
+    )
+
+    # Add regressors
+    for month in MONTHS:
+        model.add_regressor(f'is_{month}')
+
+    # Add seasonalities
+    monthly_period = config['seasonality_period']
+    fourier_order = config['fourier_order']
+    model.add_seasonality(
+        name='yearly_pre_covid', 
+        period=monthly_period, 
+        fourier_order=fourier_order, 
+        condition_name='pre_covid'
+    )
+    model.add_seasonality(
+        name='yearly_has_covid', 
+        period=monthly_period, 
+        fourier_order=fourier_order, 
+        condition_name='has_covid'
+    )
+    
+    return model
+
+
+def fit_country_model(country, country_data, holidays_df, config=None, init=None):
+    """Fit one country's model in a worker process; returns (country, model JSON, fit seconds)"""
+    from prophet.serialize import model_to_json
+
+    start_time = time.time()
+    model = create_country_model(holidays_df, config)
+    if init is not None:
+        model.fit(country_data, init=init)
+    else:
+        model.fit(country_data)
+    return country, model_to_json(model), time.time() - start_time
+
+
+def data_fingerprint(country_data):
+    """Content hash of the columns a country model is trained on"""
+    # Fixed dtypes, so the training history stored in a model JSON hashes the same as the dataset
+    columns = country_data[TRAINING_COLUMNS].astype({column: float for column in TRAINING_COLUMNS[1:]})
+    columns['ds'] = pd.to_datetime(columns['ds']).astype('datetime64[ns]')
+    hashed = pd.util.hash_pandas_object(columns, index=False)
+    return hashlib.sha1(hashed.to_numpy().tobytes()).hexdigest()
+
+
+def history_fingerprint(model_path):
+    """data_fingerprint of the training history serialized in a cached Prophet model JSON"""
+    with open(model_path, 'r') as f:
+        history = json.load(f)['history']
+    return data_fingerprint(pd.read_json(StringIO(history), orient='table'))
+
+
+def config_fingerprint(config, holidays_df):
+    """Hash of the model hyperparameters and the holiday table they are fitted with"""
+    digest = hashlib.sha1(json.dumps(config, sort_keys=True).encode())
+    digest.update(pd.util.hash_pandas_object(holidays_df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
 class ProphetCountrySpecificModels:
-    months = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+    months = MONTHS
 
-    def __init__(self, data_path, use_multiprocessing=False, max_workers=None, cache_models=True):
-        # Default to threading since multiprocessing has issues with pandas/Prophet
+    def __init__(self, data_path, use_multiprocessing=False, max_workers=None, cache_models=True,
+                 model_store_path="./model/country_models.store", lazy=False, max_resident_models=None,
+                 mp_start_method='spawn', warm_start=False, holiday_table_path=HOLIDAY_TABLE_PATH,
+                 cache_dir="./model/country_model_cache"):
+        # Default to threading; the process pool is meant for dedicated retrain runs
+        # and its spawned workers re-import the calling script's __main__ module
         self.use_multiprocessing = use_multiprocessing
-        self.max_workers = max_workers or min(cpu_count(), 8)
+        self.mp_start_method = mp_start_method
+        self.max_workers = max_workers or (cpu_count() if use_multiprocessing else min(cpu_count(), 8))
         self.cache_models = cache_models
-        self.cache_dir = "./model/country_model_cache"
+        self.cache_dir = cache_dir
+        self.model_store_path = model_store_path
+        # Lazy mode loads models on first use and keeps at most max_resident_models of them
+        self.lazy = lazy
+        self.max_resident_models = max_resident_models
+        # Initialize Stan from the previous fit when refitting a stale model
+        self.warm_start = warm_start
+        self.model_config = dict(DEFAULT_MODEL_CONFIG)
         
         if self.cache_models:
             os.makedirs(self.cache_dir, exist_ok=True)
         
+        self.data_path = data_path
         self.load_historical_data(data_path)
+        self.holiday_table = load_holiday_table(holiday_table_path)
         self.holidays = self.get_all_holidays()
+        self.config_fingerprint = config_fingerprint(self.model_config, self.holidays)
+        self._config_fingerprints = {json.dumps(self.model_config, sort_keys=True): self.config_fingerprint}
+        self._data_fingerprints = {}
         self.models = {}
+        self.engines = {}
+        self.batch_engine = None
+        self._lazy_batch = None
+        self.model_mtimes = {}
+        self.fit_times = {}
+        self._resident = OrderedDict()
+        self._resident_lock = threading.RLock()
+        self.model_store = None
+        self.warmed_up = not lazy
         
-        # Pre-compute country data to avoid repeated filtering
-        self.country_data_cache = self._prepare_country_data()
+        self.countries = list(self.country_data.countries)
+        self.load_tuned_configs()
         
-        self.prepare_and_train_models()
-        print(f"[>>>>] All {len(self.models)} models have been trained using {self.max_workers} workers!")
+        if self.lazy:
+            self.model_store = open_model_store(self.model_store_path) if self.model_store_path else None
+            print(f"[>>>>] Lazy loading enabled for {len(self.countries)} models "
+                  f"(max resident: {self.max_resident_models or 'unbounded'})")
+        else:
+            self.prepare_and_train_models()
+            print(f"[>>>>] All {len(self.engines.keys() | self.models.keys())} models have been trained using {self.max_workers} workers!")
 
     def load_historical_data(self, data_path):
         try:
-            self.historical_data = pd.read_csv(data_path)
-            self.historical_data = self.historical_data.rename(columns={'Date': 'ds', 'Arrivals': 'y'})
-            self.historical_data['ds'] = pd.to_datetime(self.historical_data['ds'])
-            print(f"Country-specific historical data loaded: {len(self.historical_data)} rows")
+            # Partitioned once into shared arrays; per-country data are views into them.
+            # A columnar copy (columnar_dataset.py) is memory-mapped instead of parsing the CSV
+            self.country_data = CountryDataStore.open(columnar_path(data_path), data_path)
+            source = 'memory-mapped'
+            if self.country_data is None:
+                self.country_data = CountryDataStore.from_csv(data_path)
+                source = 'parsed'
+            print(f"Country-specific historical data loaded: {len(self.country_data.y)} rows "
+                  f"({self.country_data.nbytes / 1024:.0f} KB for {len(self.country_data)} countries, {source})")
         except Exception as e:
             raise Exception(f"Error loading historical data: {str(e)}")
-    
-    def _prepare_country_data(self):
-        """Pre-compute and cache country-specific data to avoid repeated operations"""
-        country_data = {}
-        countries = self.historical_data['Country of Residence'].unique()
-        
-        # Add common columns once to the main dataframe
-        self._add_feature_columns(self.historical_data)
-        
-        for country in countries:
-            country_data[country] = self.historical_data[
-                self.historical_data['Country of Residence'] == country
-            ].copy()
-        
-        return country_data
-    
-    def _add_feature_columns(self, df):
-        """Add all feature columns to dataframe"""
-        # Monthly indicators
-        for i, month in enumerate(self.months, 1):
-            df[f'is_{month}'] = (df['ds'].dt.month == i).astype(int)
-        
-        # COVID periods
-        covid_outbreak_date = '2020-02-01'
-        covid_end_recovery_date = '2023-07-01'
-        
-        df['pre_covid'] = pd.to_datetime(df['ds']) < pd.to_datetime(covid_outbreak_date)
-        df['has_covid'] = (
-            (pd.to_datetime(df['ds']) > pd.to_datetime(covid_outbreak_date)) &
-            (pd.to_datetime(df['ds']) < pd.to_datetime(covid_end_recovery_date))
-        )
 
-    def _create_model_for_country(self, country: str) -> Prophet:
+    def _create_model_for_country(self, country: str) -> 'Prophet':
         """Create a Prophet model for a specific country"""
-        model = Prophet(
-            yearly_seasonality=False,
-            seasonality_mode='multiplicative',
-            holidays=self.holidays,
-        )
+        return create_country_model(self.holidays, self.config_for(country))
 
-        # Add regressors
-        for month in self.months:
-            model.add_regressor(f'is_{month}')
-
-        # Add seasonalities
-        monthly_period = 365.5
-        fourier_order = 10
-        model.add_seasonality(
-            name='yearly_pre_covid', 
-            period=monthly_period, 
-            fourier_order=fourier_order, 
-            condition_name='pre_covid'
-        )
-        model.add_seasonality(
-            name='yearly_has_covid', 
-            period=monthly_period, 
-            fourier_order=fourier_order, 
-            condition_name='has_covid'
-        )
-        
-        return model
+    def _meta_path(self, country):
+        return os.path.join(self.cache_dir, f"{country.replace('/', '_')}_meta.json")
+
+    def _config_path(self, country):
+        return os.path.join(self.cache_dir, f"{country.replace('/', '_')}_config.json")
+
+    def load_tuned_configs(self):
+        """Read the per-country configs chosen by hyperparameter_search.py; other countries use model_config"""
+        self.tuned_configs = {}
+        for country in self.countries:
+            config_path = self._config_path(country)
+            if not os.path.exists(config_path):
+                continue
+            try:
+                with open(config_path, 'r') as f:
+                    tuned = json.load(f)
+                self.tuned_configs[country] = {**self.model_config, **tuned['config']}
+            except Exception as e:
+                print(f"Warning: Could not read tuned config for {country}: {e}")
+        if self.tuned_configs:
+            print(f"[>] Using tuned configs for {len(self.tuned_configs)} countries")
+
+    def save_tuned_config(self, country, config, **details):
+        """Store a country's winning config next to its cached model; its next training run uses it"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tuned = {'config': config, **details, 'tuned_at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        with open(self._config_path(country), 'w') as f:
+            json.dump(tuned, f, indent=2)
+        self.tuned_configs[country] = {**self.model_config, **config}
+
+    def config_for(self, country):
+        return self.tuned_configs.get(country, self.model_config)
+
+    def _config_fingerprint(self, country):
+        config = self.config_for(country)
+        key = json.dumps(config, sort_keys=True)
+        if key not in self._config_fingerprints:
+            self._config_fingerprints[key] = config_fingerprint(config, self.holidays)
+        return self._config_fingerprints[key]
+
+    def _current_metadata(self, country):
+        if country not in self._data_fingerprints:
+            self._data_fingerprints[country] = data_fingerprint(self.country_data.frame(country))
+        return {
+            'data_fingerprint': self._data_fingerprints[country],
+            'config_fingerprint': self._config_fingerprint(country),
+            'config': self.config_for(country),
+        }
+
+    def cache_status(self, country):
+        """'missing', 'stale' or 'current' for a country's cached model"""
+        if not os.path.exists(self._cache_path(country)):
+            return 'missing'
+
+        meta_path = self._meta_path(country)
+        if not os.path.exists(meta_path):
+            return self._confirm_unversioned(country)
+
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+        except Exception:
+            return 'stale'
+
+        current = self._current_metadata(country)
+        if (meta.get('data_fingerprint') == current['data_fingerprint'] and
+                meta.get('config_fingerprint') == current['config_fingerprint']):
+            return 'current'
+        return 'stale'
+
+    def stale_countries(self):
+        """Countries whose model is missing or was fitted on different data or hyperparameters"""
+        return [c for c in self.countries if self.cache_status(c) in ('missing', 'stale')]
+
+    def _confirm_unversioned(self, country):
+        """Status of a cache written without metadata, checked against the history stored in the model.
+
+        Such caches predate tuning, so they were fitted with the default
+        config. When their training history matches the current data they
+        are stamped with metadata and are current; otherwise they are stale.
+        """
+        if self.config_for(country) != self.model_config:
+            return 'stale'
+        try:
+            confirmed = history_fingerprint(self._cache_path(country)) == self._current_metadata(country)['data_fingerprint']
+        except Exception as e:
+            print(f"Warning: Could not read the training history of {country}: {e}")
+            return 'stale'
+        if not confirmed:
+            return 'stale'
+
+        try:
+            self._write_metadata(country)
+        except Exception as e:
+            print(f"Warning: Could not stamp cached model for {country}: {e}")
+        return 'current'
+
+    def _write_metadata(self, country, fit_seconds=None):
+        meta = dict(self._current_metadata(country))
+        meta['fit_seconds'] = fit_seconds
+        meta['updated_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        with open(self._meta_path(country), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+    def _warm_start_init(self, country):
+        """Stan initial values taken from the previous fit, if warm starting is enabled"""
+        if not self.warm_start or not os.path.exists(self._cache_path(country)):
+            return None
+        try:
+            from prophet.serialize import model_from_json
+            from prophet.utilities import warm_start_params
+
+            with open(self._cache_path(country), 'r') as f:
+                return warm_start_params(model_from_json(f.read()))
+        except Exception as e:
+            print(f"Warning: Could not warm start {country}: {e}")
+            return None
+
+    def _load_cached_model(self, country):
+        """Return the cached model for a country, or None if it is missing, stale or unreadable"""
+        if not self.cache_models:
+            return None
+
+        cache_path = self._cache_path(country)
+        status = self.cache_status(country)
+        if status == 'missing':
+            return None
+        if status == 'stale':
+            print(f"[>] Cached model for {country} is stale, retraining...")
+            return None
+
+        try:
+            from prophet.serialize import model_from_json
+
+            with open(cache_path, 'r') as f:
+                model = model_from_json(f.read())
+            print(f"[>] Loaded cached model for {country}")
+            return model
+        except Exception as e:
+            print(f"[>] Cache corrupted for {country}, retraining...")
+            return None
+
+    def _save_cached_model(self, country, model_json, fit_seconds=None):
+        if not self.cache_models:
+            return
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self._cache_path(country), 'w') as f:
+                f.write(model_json)
+            self._write_metadata(country, fit_seconds)
+        except Exception as e:
+            print(f"Warning: Could not cache model for {country}: {e}")
 
     def _train_single_model(self, country):
         """Train a single model - designed for parallel execution"""
-        # Get country data from cache
-        country_data = self.country_data_cache[country]
-        
         # Check cache first
-        if self.cache_models:
-            cache_path = os.path.join(self.cache_dir, f"{country.replace('/', '_')}_model.json")
-            if os.path.exists(cache_path):
-                try:
-                    with open(cache_path, 'r') as f:
-                        model = model_from_json(f.read())
-                    print(f"[>] Loaded cached model for {country}")
-                    return country, model
-                except Exception as e:
-                    print(f"[>] Cache corrupted for {country}, retraining...")
+        model = self._load_cached_model(country)
+        if model is not None:
+            return country, model
+
+        country_data = self.country_data.frame(country)
         
         print(f"[>] Training model for {country}...")
+        init = self._warm_start_init(country)
         start_time = time.time()
         
         model = self._create_model_for_country(country)
-        model.fit(country_data)
+        if init is not None:
+            model.fit(country_data, init=init)
+        else:
+            model.fit(country_data)
         
+        elapsed = time.time() - start_time
+        self.fit_times[country] = elapsed
+
         # Cache the trained model
-        if self.cache_models:
-            cache_path = os.path.join(self.cache_dir, f"{country.replace('/', '_')}_model.json")
-            try:
-                with open(cache_path, 'w') as f:
-                    f.write(model_to_json(model))
-            except Exception as e:
-                print(f"Warning: Could not cache model for {country}: {e}")
+        from prophet.serialize import model_to_json
+        self._save_cached_model(country, model_to_json(model), elapsed)
         
-        elapsed = time.time() - start_time
         print(f"[>] Completed {country} in {elapsed:.2f}s")
         return country, model
 
     def prepare_and_train_models(self):
         """Prepare and train all models in parallel"""
-        countries = list(self.country_data_cache.keys())
+        countries = self._load_model_store(list(self.countries))
         
+        if self.use_multiprocessing:
+            self._train_with_processes(countries)
+        else:
+            self._train_with_threads(countries)
+
+        self._build_engines()
+
+        if self.fit_times:
+            slowest = max(self.fit_times, key=self.fit_times.get)
+            print(f"[>] Fitted {len(self.fit_times)} models in {sum(self.fit_times.values()):.2f}s of fit time "
+                  f"(slowest: {slowest} at {self.fit_times[slowest]:.2f}s)")
+
+    def _train_with_threads(self, countries):
         # Use ThreadPoolExecutor by default since it's more reliable with Prophet/pandas
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
             future_to_country = {
@@ -161,14 +395,238 @@ class ProphetCountrySpecificModels:
                     import traceback
                     traceback.print_exc()
 
+    def _train_with_processes(self, countries):
+        """Fit uncached models on a process pool, shipping each worker only its country's slice"""
+        to_train = []
+        for country in countries:
+            model = self._load_cached_model(country)
+            if model is not None:
+                self.models[country] = model
+            else:
+                to_train.append(country)
+
+        if not to_train:
+            return
+
+        from prophet.serialize import model_from_json
+
+        print(f"[>] Training {len(to_train)} models on {self.max_workers} processes...")
+        context = get_context(self.mp_start_method)
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context) as executor:
+            future_to_country = {
+                executor.submit(
+                    fit_country_model,
+                    country,
+                    self.country_data.frame(country),
+                    self.holidays,
+                    self.config_for(country),
+                    self._warm_start_init(country)
+                ): country
+                for country in to_train
+            }
+
+            for future in as_completed(future_to_country):
+                try:
+                    country, model_json, elapsed = future.result()
+                    self.models[country] = model_from_json(model_json)
+                    self.fit_times[country] = elapsed
+                    self._save_cached_model(country, model_json, elapsed)
+                    print(f"[>] Completed {country} in {elapsed:.2f}s")
+                except Exception as e:
+                    country = future_to_country[future]
+                    print(f"Error training model for {country}: {e}")
+                    import traceback
+                    traceback.print_exc()
+
+    def _load_model_store(self, countries):
+        """Load up-to-date engines from the compact model store; returns the countries still to load or train"""
+        store = open_model_store(self.model_store_path) if self.model_store_path else None
+        if store is None:
+            return countries
+
+        remaining = []
+        for country in countries:
+            if self._store_entry_usable(store, country):
+                self.engines[country] = store.load(country)
+            else:
+                remaining.append(country)
+
+        print(f"[>] Loaded {len(countries) - len(remaining)} models from {self.model_store_path}")
+        return remaining
+
+    def _store_entry_usable(self, store, country):
+        return (
+            country in store and
+            store.is_current(country, self._cache_path(country)) and
+            self.cache_status(country) != 'stale'
+        )
+
+    def _build_engines(self):
+        """Extract NumPy point-forecast engines from the fitted models"""
+        for country, model in self.models.items():
+            try:
+                self.engines[country] = FastProphetModel.from_prophet(model)
+            except Exception as e:
+                print(f"Warning: Fast prediction unavailable for {country}, using Prophet.predict: {e}")
+
+        for engine in self.engines.values():
+            engine.features.attach_holiday_source(self.holiday_table.frame)
+        self.batch_engine = BatchForecastEngine(self.engines) if self.engines else None
+        self.model_mtimes = {
+            country: os.stat(self._cache_path(country)).st_mtime_ns
+            for country in self.engines.keys() | self.models.keys()
+            if os.path.exists(self._cache_path(country))
+        }
+
+    def _cache_path(self, country):
+        return os.path.join(self.cache_dir, f"{country.replace('/', '_')}_model.json")
+
+    def get_country_model(self, country):
+        """Return (engine, Prophet model) for a country, loading it on first use in lazy mode.
+
+        One of the two is None: the Prophet model is only kept when no
+        fast engine could be built for it.
+        """
+        with self._resident_lock:
+            if country in self.engines or country in self.models:
+                if country in self._resident:
+                    self._resident.move_to_end(country)
+                return self.engines.get(country), self.models.get(country)
+
+        if not self.lazy:
+            raise KeyError(f"No model available for {country}")
+
+        engine, model = self._load_country(country)
+        with self._resident_lock:
+            if engine is not None:
+                self.engines[country] = engine
+            else:
+                self.models[country] = model
+            self._resident[country] = None
+            cache_path = self._cache_path(country)
+            if os.path.exists(cache_path):
+                self.model_mtimes[country] = os.stat(cache_path).st_mtime_ns
+            self._evict_excess()
+        return engine, model
+
+    def _load_country(self, country):
+        """Load one country's model from the store or the JSON cache; never fits on the request path"""
+        store = self.model_store
+        if store is not None and self._store_entry_usable(store, country):
+            engine = store.load(country)
+            engine.features.attach_holiday_source(self.holiday_table.frame)
+            return engine, None
+
+        cache_path = self._cache_path(country)
+        if not os.path.exists(cache_path):
+            raise Exception(f"No trained model for {country}; train it with python prophet_country_model.py")
+        if self.cache_status(country) == 'stale':
+            print(f"Warning: Cached model for {country} is stale, serving it until it is retrained")
+
+        from prophet.serialize import model_from_json
+
+        with open(cache_path, 'r') as f:
+            model = model_from_json(f.read())
+        try:
+            engine = FastProphetModel.from_prophet(model)
+            engine.features.attach_holiday_source(self.holiday_table.frame)
+            return engine, None
+        except Exception as e:
+            print(f"Warning: Fast prediction unavailable for {country}, using Prophet.predict: {e}")
+            return None, model
+
+    def _evict_excess(self):
+        if self.max_resident_models is None:
+            return
+        while len(self._resident) > self.max_resident_models:
+            country, _ = self._resident.popitem(last=False)
+            self._evict(country)
+
+    def _evict(self, country):
+        with self._resident_lock:
+            self._resident.pop(country, None)
+            self.engines.pop(country, None)
+            self.models.pop(country, None)
+
+    def residency_stats(self):
+        with self._resident_lock:
+            return {
+                'lazy': self.lazy,
+                'countries': len(self.countries),
+                'resident': len(self.engines.keys() | self.models.keys()),
+                'max_resident': self.max_resident_models,
+                'warmed_up': self.warmed_up,
+            }
+
+    def warm_up(self, countries=None):
+        """Load models ahead of first use, up to the resident limit"""
+        countries = list(countries or self.countries)
+        if self.max_resident_models is not None:
+            countries = countries[:self.max_resident_models]
+
+        start_time = time.time()
+        for country in countries:
+            try:
+                self.get_country_model(country)
+            except Exception as e:
+                print(f"Error warming up model for {country}: {e}")
+
+        self.warmed_up = True
+        elapsed = time.time() - start_time
+        print(f"[>] Warmed up {len(countries)} country models in {elapsed:.2f}s")
+
+    def start_background_warm_up(self, countries=None):
+        """Warm up models on a daemon thread so serving can start immediately"""
+        thread = threading.Thread(
+            target=self.warm_up,
+            args=(countries,),
+            name='country-model-warm-up',
+            daemon=True
+        )
+        thread.start()
+        return thread
+
+    def reload_cached_models(self):
+        """Reload models whose cache file changed on disk, keeping the old model if it cannot be read"""
+        reloaded = []
+        for country in list(self.engines.keys() | self.models.keys()):
+            cache_path = self._cache_path(country)
+            if not os.path.exists(cache_path):
+                continue
+            if os.stat(cache_path).st_mtime_ns == self.model_mtimes.get(country):
+                continue
+            if self.lazy:
+                # Dropped models are loaded again from disk on next use
+                self._evict(country)
+                reloaded.append(country)
+                continue
+            try:
+                from prophet.serialize import model_from_json
+
+                with open(cache_path, 'r') as f:
+                    self.models[country] = model_from_json(f.read())
+                reloaded.append(country)
+            except Exception as e:
+                print(f"Warning: Could not reload cached model for {country}: {e}")
+
+        if reloaded:
+            print(f"[>] Reloaded {len(reloaded)} changed country models")
+            if not self.lazy:
+                self._build_engines()
+        return reloaded
+
     def _forecast_single_country(self, country, future_df):
         """Forecast for a single country - designed for parallel execution"""        
         print(f"[>] Forecasting {country}...")
         start_time = time.time()
         
         try:
-            model = self.models[country]
-            forecast = model.predict(future_df)
+            engine, model = self.get_country_model(country)
+            if engine is not None:
+                forecast = engine.predict(future_df)
+            else:
+                with timed('predict'):
+                    forecast = prophet_predict(model, future_df)
             total_forecast = forecast['yhat'].sum()
             
             elapsed = time.time() - start_time
@@ -179,121 +637,225 @@ class ProphetCountrySpecificModels:
             print(f"Error forecasting for {country}: {e}")
             return country, 0, None
 
+    def find_country(self, name):
+        """Canonical country name for a case-insensitive name, or None"""
+        if not name:
+            return None
+        if not hasattr(self, '_country_lookup'):
+            self._country_lookup = {country.upper(): country for country in self.countries}
+        return self._country_lookup.get(str(name).strip().upper())
+
+    @timed('actual_join')
+    def country_actuals(self, country, dates):
+        """Historical arrivals for country on dates (NaN where there is no data)"""
+        actuals = pd.Series(
+            self.country_data.values(country).astype(float),
+            index=pd.DatetimeIndex(self.country_data.dates(country)).normalize()
+        )
+        actuals = actuals[~actuals.index.duplicated(keep='first')]
+        return actuals.reindex(pd.DatetimeIndex(dates).normalize()).to_numpy()
+
+    def forecast_country_frame(self, country, future_df):
+        """Prophet-style forecast frame for one country over future_df"""
+        engine, model = self.get_country_model(country)
+        if engine is not None:
+            return engine.predict(future_df)
+        with timed('predict'):
+            return prophet_predict(model, future_df)
+
+    def forecast_country_series(self, start_date, months_to_forecast, countries=None, include_components=False):
+        """Forecast frames for the given countries (default all) over one date grid.
+
+        The future dataframe and each distinct feature matrix are built once
+        and shared by every country whose model has the same feature layout.
+        """
+        future_df = create_future_features(start_date, months_to_forecast)
+
+        feature_matrices = {}
+        forecasts = {}
+        for country in countries if countries is not None else self.countries:
+            engine, model = self.get_country_model(country)
+            if engine is None:
+                with timed('predict'):
+                    forecast = prophet_predict(model, future_df)
+            else:
+                signature = engine.features.signature
+                if signature not in feature_matrices:
+                    feature_matrices[signature] = engine.features.build(future_df)
+                forecast = engine.predict(future_df, include_components=include_components,
+                                          X=feature_matrices[signature])
+
+            columns = ['ds', 'yhat']
+            if include_components:
+                if engine is not None:
+                    seasonalities = [name for name, _, _, _ in engine.features.seasonalities]
+                else:
+                    seasonalities = list(model.seasonalities)
+                columns += [
+                    name for name in ['trend'] + seasonalities + SERIES_COMPONENTS
+                    if name in forecast.columns
+                ]
+            forecasts[country] = forecast[columns]
+
+        return forecasts
+
     def forecast_top_countries(self, start_date, months_to_forecast, count=None):
-        """Forecast all countries in parallel and return top performances"""
-        if count is None:
-            count = 10
-        
+        """Forecast all countries in one batched pass and return top performances"""
+        names, yhat = self.forecast_country_matrix(start_date, months_to_forecast)
+        return self.rank_countries(names, yhat.sum(axis=1), count)
+
+    def forecast_country_matrix(self, start_date, months_to_forecast):
+        """Return country names and the matching (countries x months) yhat matrix"""
         # Prepare future dataframe once
-        future_df = create_future_dataframe(start_date, months_to_forecast)
-        self._add_feature_columns_to_future(future_df)
-        
-        forecast_totals = {}
-        
-        # Use ThreadPoolExecutor for forecasting
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_country = {
-                executor.submit(self._forecast_single_country, country, future_df.copy()): country 
-                for country in self.models.keys()
-            }
-            
-            for future in as_completed(future_to_country):
+        future_df = create_future_features(start_date, months_to_forecast)
+        return self.country_matrix_for_future(future_df)
+
+    def country_matrix_for_future(self, future_df):
+        """Country names and (countries x rows) yhat for a future dataframe with its feature columns"""
+        months_to_forecast = len(future_df)
+        names = []
+        rows = []
+
+        for batch_engine, fallback_countries in self._forecast_batches():
+            # All countries with an engine are evaluated together in one stacked pass
+            if batch_engine is not None:
+                names.extend(batch_engine.names)
+                rows.append(batch_engine.predict(future_df))
+
+            for country in fallback_countries:
+                country, total, forecast = self._forecast_single_country(country, future_df.copy())
+                names.append(country)
+                if forecast is not None:
+                    rows.append(forecast['yhat'].to_numpy()[None, :])
+                else:
+                    rows.append(np.zeros((1, months_to_forecast)))
+
+        yhat = np.vstack(rows) if rows else np.zeros((0, months_to_forecast))
+        return names, yhat
+
+    def country_scenarios_for_future(self, future_df, scenarios):
+        """Country names and (1 + scenarios, countries, rows) yhat, baseline first.
+
+        Scenarios are applied to the fitted parameters, so nothing is
+        refitted; countries without a fast engine are returned separately
+        as unsupported. Raises ValueError if a replayed holiday has no
+        fitted effect in one of the country models.
+        """
+        names = []
+        blocks = []
+        unsupported = []
+
+        for batch_engine, fallback_countries in self._forecast_batches():
+            if batch_engine is not None:
+                check_replays(batch_engine, scenarios)
+                names.extend(batch_engine.names)
+                blocks.append(batch_engine.predict_scenarios(future_df, scenarios))
+            unsupported.extend(fallback_countries)
+
+        if blocks:
+            yhat = np.concatenate(blocks, axis=1)
+        else:
+            yhat = np.zeros((len(scenarios) + 1, 0, len(future_df)))
+        return names, yhat, unsupported
+
+    def _forecast_batches(self):
+        """Yield (batch engine, countries needing Prophet.predict) groups covering all countries"""
+        if not self.lazy:
+            yield self.batch_engine, [c for c in self.models.keys() if c not in self.engines]
+            return
+
+        # Lazy mode: work through the countries in chunks that fit the resident limit
+        chunk_size = self.max_resident_models or len(self.countries)
+        for i in range(0, len(self.countries), chunk_size):
+            engines = {}
+            fallback_countries = []
+            for country in self.countries[i:i + chunk_size]:
                 try:
-                    country, total, forecast = future.result()
-                    if total > 0:  # Only include successful forecasts
-                        forecast_totals[country] = total
+                    engine, model = self.get_country_model(country)
                 except Exception as e:
-                    country = future_to_country[future]
-                    print(f"Error in forecast for {country}: {e}")
-
-        # Sort and return top countries
-        results = sorted(
-            [{"name": key.title(), "value": value} for key, value in forecast_totals.items()],
-            key=lambda x: x["value"],
-            reverse=True
-        )[:count]
-        
-        return results
-    
-    def _add_feature_columns_to_future(self, future_df):
-        """Add feature columns to future dataframe"""
-        future_df['pre_covid'] = pd.to_datetime(future_df['ds']) < pd.to_datetime(COVID_OUTBREAK_DATE)
-        future_df['has_covid'] = (
-            (pd.to_datetime(future_df['ds']) > pd.to_datetime(COVID_OUTBREAK_DATE)) &
-            (pd.to_datetime(future_df['ds']) < pd.to_datetime(COVID_RECOVERY_DATE))
-        )
+                    print(f"Error loading model for {country}: {e}")
+                    continue
+                if engine is not None:
+                    engines[country] = engine
+                else:
+                    fallback_countries.append(country)
+            yield self._lazy_batch_engine(engines), fallback_countries
 
-        for i, month in enumerate(self.months, 1):
-            future_df[f'is_{month}'] = (future_df['ds'].dt.month == i).astype(int)
+    def _lazy_batch_engine(self, engines):
+        """Batch engine over engines, reused while the same engines stay resident"""
+        if not engines:
+            return None
+        with self._resident_lock:
+            cached = self._lazy_batch
+        if cached is not None and list(cached[0]) == list(engines) and all(
+                a is b for a, b in zip(cached[1], engines.values())):
+            return cached[2]
 
-    def get_all_holidays(self):
-        """Get holidays dataframe - optimized version"""
-        data_years = list(range(
-            self.historical_data['ds'].dt.year.min(), 
-            self.historical_data['ds'].dt.year.max() + 3  # Add buffer for forecasting
-        ))
-
-        country_code = 'PH'
-        country_holidays = holidays.country_holidays(country_code, years=data_years)
-
-        holiday_df = pd.DataFrame(
-            [(name, date) for date, name in country_holidays.items()],
-            columns=['holiday', 'ds']
-        )
+        batch_engine = BatchForecastEngine(engines)
+        with self._resident_lock:
+            self._lazy_batch = (list(engines), list(engines.values()), batch_engine)
+        return batch_engine
 
-        holiday_df['lower_window'] = 0
-        holiday_df['upper_window'] = 0
-        holiday_df = holiday_df.sort_values(by='ds').reset_index(drop=True)
-        
-        holiday_df['ds'] = pd.to_datetime(holiday_df['ds'])
-        holiday_df['ds'] = holiday_df['ds'].dt.strftime('%Y-%m-01')
-        holiday_df['ds'] = pd.to_datetime(holiday_df['ds'])
-        holiday_df = holiday_df.drop_duplicates(subset=['holiday', 'ds'])
-        
-        # COVID lockdown periods
-        lockdowns = pd.DataFrame([
-            {
-                'holiday': 'covid_impact_1',
-                'ds': '2020-02-01',
-                'lower_window': 0,
-                'ds_upper': '2020-12-01'
-            },
-            {
-                'holiday': 'covid_impact_2',
-                'ds': '2021-01-01',
-                'lower_window': 0,
-                'ds_upper': '2021-12-01'
-            },
-            {
-                'holiday': 'covid_recovery',
-                'ds': '2022-01-01',
-                'lower_window': 0,
-                'ds_upper': '2022-07-01'
-            }
-        ])
+    @staticmethod
+    def rank_countries(names, totals, count=None):
+        """Top `count` countries by forecast total, largest first"""
+        if count is None:
+            count = 10
+
+        totals = np.asarray(totals)
 
-        for t_col in ['ds', 'ds_upper']:
-            lockdowns[t_col] = pd.to_datetime(lockdowns[t_col])
+        # Only include successful forecasts
+        positive = np.flatnonzero(totals > 0)
+        top = positive[top_n(totals[positive], count)]
 
-        lockdowns['upper_window'] = (lockdowns['ds_upper'] - lockdowns['ds']).dt.days
+        return [{"name": names[i].title(), "value": float(totals[i])} for i in top]
+    
+    def _add_feature_columns_to_future(self, future_df):
+        """Add feature columns to future dataframe"""
+        add_future_features(future_df)
 
-        return pd.concat([lockdowns, holiday_df])
+    def get_all_holidays(self):
+        """Get holidays dataframe from the shared holiday table"""
+        start_year, end_year = self.country_data.year_range()
+        return self.holiday_table.frame(start_year, end_year + 2)  # Add buffer for forecasting
     
     def clear_cache(self):
-        """Clear the model cache"""
-        if os.path.exists(self.cache_dir):
-            import shutil
-            shutil.rmtree(self.cache_dir)
-            print("Model cache cleared")
+        """Clear the model cache, keeping tuned configs"""
+        clear_model_cache(self.cache_dir)
+
+
+def clear_model_cache(cache_dir):
+    """Delete cached models and their metadata; tuned *_config.json files are kept"""
+    if not os.path.exists(cache_dir):
+        return
+    for name in os.listdir(cache_dir):
+        if name.endswith('_model.json') or name.endswith('_meta.json'):
+            os.remove(os.path.join(cache_dir, name))
+    print("Model cache cleared")
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train (or load cached) country models and forecast the top countries")
+    parser.add_argument('--processes', action='store_true', help="Fit models on a process pool instead of threads")
+    parser.add_argument('--workers', type=int, default=None, help="Number of training workers")
+    parser.add_argument('--retrain', action='store_true', help="Clear the model cache and refit every country")
+    parser.add_argument('--warm-start', action='store_true', help="Initialize stale refits from the previous fit")
+    args = parser.parse_args()
+
+    if args.retrain:
+        clear_model_cache("./model/country_model_cache")
+
     models = ProphetCountrySpecificModels(
         data_path="./dataset/country_monthly_dataset.csv",
-        use_multiprocessing=False,  # Use threading by default
-        max_workers=8,  # Adjust based on your CPU
-        cache_models=True  # Cache trained models for reuse
+        use_multiprocessing=args.processes,  # Use threading by default
+        max_workers=args.workers,  # Adjust based on your CPU
+        cache_models=True,  # Cache trained models for reuse
+        model_store_path=None if args.retrain else "./model/country_models.store",
+        warm_start=args.warm_start
     )
+
     
     top_countries = models.forecast_top_countries(
         start_date="2024-01-01",
@@ -301,4 +863,4 @@ if __name__ == "__main__":
         count=10
     )
     
-    print("Top forecasted countries:", top_countries)
\ No newline at end of file
+    print("Top forecasted countries:", top_countries)
@@ -1,8 +1,16 @@
 import pandas as pd
-from prophet.serialize import model_from_json
+import numpy as np
 from prophet_country_model import ProphetCountrySpecificModels
-from utils import create_future_dataframe, COVID_OUTBREAK_DATE, COVID_RECOVERY_DATE
-import json
+from forecast_engine import BatchForecastEngine, FastProphetModel, prophet_predict
+from instrumentation import timed
+from forecast_cache import ForecastCache, files_fingerprint, normalize_start_date
+from model_store import open_model_store
+from columnar_dataset import columnar_path, read_columns
+from holiday_table import load_holiday_table
+from materialized_forecasts import MATERIALIZED_PATH, model_sources, open_materialized_forecasts
+from reconciliation import DEFAULT_RECONCILIATION_METHOD, HierarchyReconciler
+from scenarios import check_replays
+from utils import add_future_features, create_future_dataframe, create_future_features, nullable_values
 
 class ProphetTourismModel:
     def __init__(
@@ -10,24 +18,68 @@ class ProphetTourismModel:
         aggregated_model_path, 
         aggregated_data_path,
         country_monthly_data_path,
+        cache_size=256,
+        cache_ttl=3600,
+        aggregated_store_path='./model/aggregated_model.store',
+        lazy_country_models=False,
+        max_resident_country_models=None,
+        country_max_workers=None,
+        materialized_path=MATERIALIZED_PATH,
     ):
         self.aggregated_model_path = aggregated_model_path
         self.aggregated_data_path = aggregated_data_path
+        self.aggregated_store_path = aggregated_store_path
+        self.materialized_path = materialized_path
 
         self.aggregated_model = None
+        self.aggregated_engine = None
         self.aggregated_historical_data = None
+        self.aggregated_actuals = None
+        self.materialized = None
+        self.reconciler = None
+
+        # Shared with the country models
+        self.holiday_table = load_holiday_table()
 
         self.prophet_countries = ProphetCountrySpecificModels(
             data_path=country_monthly_data_path,
-            max_workers=8,  # TODO: Remove this
-            cache_models=True
+            max_workers=country_max_workers,
+            cache_models=True,
+            lazy=lazy_country_models,
+            max_resident_models=max_resident_country_models
         )
         
         self.load_aggregated_model()
         self.load_historical_data()
+        self.load_materialized_forecasts()
+
+        # Only the files that define the models; generated artifacts under ./model
+        # (holiday table, materialized forecasts, backtests) and the country cache's
+        # meta/config files, written while serving, must not flush the cache
+        self.model_paths = [
+            self.aggregated_model_path,
+            self.aggregated_store_path,
+            self.prophet_countries.cache_dir
+        ]
+        self.forecast_cache = ForecastCache(
+            max_entries=cache_size,
+            ttl_seconds=cache_ttl,
+            version_fn=lambda: files_fingerprint([path for path in self.model_paths if path], suffix='_model.json')
+        )
     
     def load_aggregated_model(self):
+        store = open_model_store(self.aggregated_store_path) if self.aggregated_store_path else None
+        if store is not None and 'aggregated' in store and store.is_current('aggregated', self.aggregated_model_path):
+            self.aggregated_engine = store.load('aggregated')
+            self.aggregated_engine.features.attach_holiday_source(self.holiday_table.frame)
+            self.aggregated_model = None
+            print(f"Aggregated model loaded successfully from {self.aggregated_store_path}")
+            return
+
         try:
+            # Only needed when the model store is missing or out of date
+            from prophet.serialize import model_from_json
+
             with open(self.aggregated_model_path, 'r') as f:
                 model = model_from_json(f.read())
             
@@ -35,53 +87,72 @@ class ProphetTourismModel:
             print(f"Aggregated model loaded successfully from {self.aggregated_model_path}")
         except Exception as e:
             raise Exception(f"Error loading aggregated model: {str(e)}")
+
+        try:
+            self.aggregated_engine = FastProphetModel.from_prophet(self.aggregated_model)
+            self.aggregated_engine.features.attach_holiday_source(self.holiday_table.frame)
+        except Exception as e:
+            print(f"Warning: Fast prediction unavailable for aggregated model, using Prophet.predict: {e}")
+            self.aggregated_engine = None
     
     def load_historical_data(self):
         try:
-            self.aggregated_historical_data = pd.read_csv(self.aggregated_data_path)
-            self.aggregated_historical_data['ds'] = pd.to_datetime(self.aggregated_historical_data['ds'])
+            loaded = read_columns(columnar_path(self.aggregated_data_path), self.aggregated_data_path)
+            if loaded is not None:
+                columns = loaded[0]
+                self.aggregated_historical_data = pd.DataFrame({'ds': columns['ds'], 'y': columns['y']}, copy=False)
+            else:
+                self.aggregated_historical_data = pd.read_csv(self.aggregated_data_path)
+                self.aggregated_historical_data['ds'] = pd.to_datetime(self.aggregated_historical_data['ds'])
+
+            # Actual arrivals indexed by day, for joining onto forecast dates
+            actuals = pd.Series(
+                self.aggregated_historical_data['y'].to_numpy(dtype=float),
+                index=pd.DatetimeIndex(self.aggregated_historical_data['ds']).normalize()
+            )
+            self.aggregated_actuals = actuals[~actuals.index.duplicated(keep='first')].sort_index()
             print(f"The aggregated historical data has been loaded successfully!")
         except Exception as e:
             raise Exception(f"Error loading historical data: {str(e)}")
     
-    def forecast(self, start_date, months_to_forecast):
+    def load_materialized_forecasts(self):
+        self.materialized = open_materialized_forecasts(self.materialized_path, model_sources(self))
+        if self.materialized is not None:
+            print(f"Materialized forecasts loaded from {self.materialized_path}")
+
+    def refresh_models(self):
+        """Reload models and drop cached results when one of the model files changed"""
+        if self.forecast_cache.check_version():
+            print("Model files changed, reloading models...")
+            self.load_aggregated_model()
+            self.prophet_countries.reload_cached_models()
+            self.load_materialized_forecasts()
+            self.reconciler = None
+
+    def forecast(self, start_date, months_to_forecast, include_intervals=False):
         try:
-            if not self.aggregated_model:
+            if self.aggregated_engine is None and not self.aggregated_model:
                 raise Exception("Aggregated model is not loaded")
-            
-            future_df = create_future_dataframe(start_date, months_to_forecast)
 
-            future_df['pre_covid'] = pd.to_datetime(future_df['ds']) < pd.to_datetime(COVID_OUTBREAK_DATE)
-            future_df['has_covid'] = (
-                (pd.to_datetime(future_df['ds']) > pd.to_datetime(COVID_OUTBREAK_DATE)) &
-                (pd.to_datetime(future_df['ds']) < pd.to_datetime(COVID_RECOVERY_DATE))
-            )
+            self.refresh_models()
 
-            months = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
-            for i, month in enumerate(months, 1):
-                future_df[f'is_{month}'] = (future_df['ds'].dt.month == i).astype(int)
+            namespace = 'forecast_intervals' if include_intervals else 'forecast'
+            cache_date = normalize_start_date(start_date)
+            materialized = None
+            if self.materialized is not None and not include_intervals:
+                materialized = self.materialized.forecast_records(start_date, months_to_forecast)
+            cached = None
+            if materialized is None and cache_date:
+                cached = self.forecast_cache.get(namespace, cache_date, months_to_forecast)
 
-            forecast = self.aggregated_model.predict(future_df)
-            
-            results = []
-            
-            for i, row in future_df.iterrows():
-                date_str = row['ds'].strftime('%Y-%m-%d')
-                prediction = float(forecast.iloc[i]['yhat'])
-                
-                actual = None
-                if self.aggregated_historical_data is not None:
-                    actual_row = self.aggregated_historical_data[
-                        self.aggregated_historical_data['ds'].dt.strftime('%Y-%m-%d') == date_str
-                    ]
-                    if not actual_row.empty:
-                        actual = float(actual_row.iloc[0]['y'])
-                
-                results.append({
-                    'date': date_str,
-                    'actual': actual,
-                    'prediction': prediction
-                })
+            if materialized is not None:
+                results = materialized
+            elif cached is not None:
+                results = cached[0][:months_to_forecast]
+            else:
+                results = self._forecast_records(start_date, months_to_forecast, include_intervals)
+                if cache_date:
+                    self.forecast_cache.put(namespace, cache_date, months_to_forecast, results)
             
             return {
                 'success': True,
@@ -99,10 +170,73 @@ class ProphetTourismModel:
                 'error': str(e),
                 'data': []
             }
+
+    def _forecast_records(self, start_date, months_to_forecast, include_intervals=False):
+        future_df = create_future_features(start_date, months_to_forecast)
+        return self._records_for_future(future_df, include_intervals)
+
+    def _predict_aggregated(self, future_df, include_intervals=False):
+        if self.aggregated_engine is not None:
+            return self.aggregated_engine.predict(future_df, include_intervals=include_intervals)
+        with timed('predict'):
+            return prophet_predict(self.aggregated_model, future_df)
+
+    @timed('actual_join')
+    def _aggregated_actuals_for(self, dates):
+        """Aggregated actuals on dates as an object array, None where there is no data"""
+        if self.aggregated_actuals is not None:
+            actuals = self.aggregated_actuals.reindex(dates.normalize()).to_numpy()
+        else:
+            actuals = np.full(len(dates), np.nan)
+
+        return nullable_values(actuals)
+
+    def _records_for_future(self, future_df, include_intervals=False):
+        """Forecast records for a future dataframe that already has its feature columns"""
+        forecast = self._predict_aggregated(future_df, include_intervals)
+        dates = pd.DatetimeIndex(forecast['ds'])
+
+        columns = {
+            'date': dates.strftime('%Y-%m-%d'),
+            'actual': self._aggregated_actuals_for(dates),
+            'prediction': forecast['yhat'].to_numpy(dtype=float)
+        }
+        if include_intervals:
+            columns['prediction_lower'] = forecast['yhat_lower'].to_numpy(dtype=float)
+            columns['prediction_upper'] = forecast['yhat_upper'].to_numpy(dtype=float)
+
+        with timed('serialize'):
+            results = pd.DataFrame(columns).to_dict('records')
+        
+        return results
     
     def forecast_top_countries(self, start_date, months_to_forecast, count=None):
         try:
-            results = self.prophet_countries.forecast_top_countries(start_date, months_to_forecast, count)
+            self.refresh_models()
+
+            cache_date = normalize_start_date(start_date)
+            materialized = None
+            if self.materialized is not None:
+                materialized = self.materialized.country_totals(start_date, months_to_forecast)
+            cached = None
+            if materialized is None and cache_date:
+                cached = self.forecast_cache.get('top_countries', cache_date, months_to_forecast)
+
+            if materialized is not None:
+                names, totals = materialized
+            elif cached is not None:
+                names, cumulative = cached[0]
+            else:
+                names, yhat = self.prophet_countries.forecast_country_matrix(start_date, months_to_forecast)
+                # Running totals let a longer horizon answer any shorter one
+                cumulative = np.cumsum(yhat, axis=1)
+                if cache_date:
+                    self.forecast_cache.put('top_countries', cache_date, months_to_forecast, (names, cumulative))
+
+            if materialized is None:
+                totals = cumulative[:, months_to_forecast - 1]
+
+            results = self.prophet_countries.rank_countries(names, totals, count)
                 
             return {
                 'success': True,
@@ -119,19 +253,364 @@ class ProphetTourismModel:
                 'data': []
             }
     
-    def export_forecast(self, start_date, months_to_forecast, export_format='csv'):
+    def forecast_country_series(self, start_date, months_to_forecast, countries=None, include_components=False):
         try:
-            forecast_result = self.forecast(start_date, months_to_forecast)
-            
-            if not forecast_result['success']:
-                raise Exception(forecast_result['error'])
-            
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        
-            filename = f'tourism_forecast_{timestamp}.csv'
-            df = pd.DataFrame(forecast_result['data'])
-            df.to_csv(filename, index=False)
-            
-            return filename
+            self.refresh_models()
+
+            if countries:
+                names = [self.prophet_countries.find_country(country) for country in countries]
+                unknown = [country for country, name in zip(countries, names) if name is None]
+                if unknown:
+                    raise Exception(f"Unknown countries: {', '.join(map(str, unknown))}")
+            else:
+                names = None
+
+            forecasts = self.prophet_countries.forecast_country_series(
+                start_date, months_to_forecast, names, include_components
+            )
+
+            results = []
+            with timed('serialize'):
+                for country, forecast in forecasts.items():
+                    series = forecast.rename(columns={'yhat': 'prediction'})
+                    series.insert(0, 'date', series.pop('ds').dt.strftime('%Y-%m-%d'))
+                    results.append({'name': country.title(), 'data': series.to_dict('records')})
+
+            return {
+                'success': True,
+                'data': results,
+                'metadata': {
+                    'start_date': start_date,
+                    'months_forecasted': months_to_forecast,
+                    'countries': len(results)
+                }
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'data': []
+            }
+
+    def hierarchy_reconciler(self):
+        """Reconciler over [aggregated, countries...] with in-sample residuals, built once per model version"""
+        if self.reconciler is None:
+            with timed('reconcile'):
+                dates = pd.DatetimeIndex(self.aggregated_actuals.index)
+                history_df = add_future_features(pd.DataFrame({'ds': dates}))
+
+                aggregate = self._predict_aggregated(history_df)['yhat'].to_numpy(dtype=float)
+                names, countries = self.prophet_countries.country_matrix_for_future(history_df)
+
+                actuals = np.vstack(
+                    [self.aggregated_actuals.to_numpy(dtype=float)] +
+                    [self.prophet_countries.country_actuals(country, dates) for country in names]
+                )
+                residuals = (actuals - np.vstack([aggregate[None, :], countries])).T
+                self.reconciler = HierarchyReconciler(names, residuals)
+        return self.reconciler
+
+    def forecast_reconciled(self, start_date, months_to_forecast, method=DEFAULT_RECONCILIATION_METHOD, count=None):
+        """Aggregated and country forecasts reconciled so the countries sum to the aggregate.
+
+        Both levels are predicted over the same dates and passed through one
+        reconciliation matrix; base (unreconciled) predictions are returned
+        alongside. count limits the countries returned (default all), largest
+        reconciled total first.
+        """
+        try:
+            if self.aggregated_engine is None and not self.aggregated_model:
+                raise Exception("Aggregated model is not loaded")
+
+            self.refresh_models()
+            reconciler = self.hierarchy_reconciler()
+            # Validates the method before any forecasting work
+            reconciler.matrix(method)
+
+            namespace = f'reconciled_{method}'
+            cache_date = normalize_start_date(start_date)
+            cached = self.forecast_cache.get(namespace, cache_date, months_to_forecast) if cache_date else None
+
+            if cached is not None:
+                dates, base, reconciled = cached[0]
+                dates = dates[:months_to_forecast]
+                base = base[:, :months_to_forecast]
+                reconciled = reconciled[:, :months_to_forecast]
+            else:
+                future_df = create_future_features(start_date, months_to_forecast)
+                aggregate = self._predict_aggregated(future_df)['yhat'].to_numpy(dtype=float)
+                names, countries = self.prophet_countries.country_matrix_for_future(future_df)
+
+                with timed('reconcile'):
+                    base = np.vstack([aggregate[None, :], reconciler.align(names, countries)])
+                    reconciled = reconciler.matrix(method) @ base
+
+                dates = pd.DatetimeIndex(future_df['ds'])
+                if cache_date:
+                    self.forecast_cache.put(namespace, cache_date, months_to_forecast, (dates, base, reconciled))
+
+            totals = reconciled[1:].sum(axis=1)
+            order = np.argsort(-totals, kind='stable')
+            if count is not None:
+                order = order[:int(count)]
+
+            with timed('serialize'):
+                date_strings = dates.strftime('%Y-%m-%d')
+                aggregated = pd.DataFrame({
+                    'date': date_strings,
+                    'actual': self._aggregated_actuals_for(dates),
+                    'prediction': reconciled[0],
+                    'base_prediction': base[0]
+                }).to_dict('records')
+
+                countries = []
+                for i in order:
+                    series = pd.DataFrame({
+                        'date': date_strings,
+                        'prediction': reconciled[i + 1],
+                        'base_prediction': base[i + 1]
+                    })
+                    countries.append({
+                        'name': reconciler.names[i].title(),
+                        'value': float(totals[i]),
+                        'base_value': float(base[i + 1].sum()),
+                        'data': series.to_dict('records')
+                    })
+
+            return {
+                'success': True,
+                'data': {'aggregated': aggregated, 'countries': countries},
+                'metadata': {
+                    'start_date': start_date,
+                    'months_forecasted': months_to_forecast,
+                    'method': method,
+                    'countries': len(reconciler.names),
+                    'shrinkage': reconciler.shrinkage
+                }
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'data': []
+            }
+
+    def forecast_scenarios(self, start_date, months_to_forecast, scenarios, countries=None, include_series=False):
+        """What-if forecasts of the aggregated and country models, as deltas against the baseline.
+
+        scenarios are Scenario objects. Every scenario is applied to the
+        already-fitted parameters and evaluated in one batched pass per
+        model group, so no model is refitted. countries limits the country
+        breakdown (default all); include_series adds monthly values per country.
+        """
+        try:
+            self.refresh_models()
+            if self.aggregated_engine is None:
+                raise Exception("Scenarios need the fast aggregated engine, which is not loaded")
+
+            aggregated_batch = BatchForecastEngine({'aggregated': self.aggregated_engine})
+            check_replays(aggregated_batch, scenarios)
+
+            selected = None
+            if countries:
+                selected = [self.prophet_countries.find_country(country) for country in countries]
+                unknown = [country for country, name in zip(countries, selected) if name is None]
+                if unknown:
+                    raise Exception(f"Unknown countries: {', '.join(map(str, unknown))}")
+
+            future_df = create_future_features(start_date, months_to_forecast)
+            aggregate = aggregated_batch.predict_scenarios(future_df, scenarios)[:, 0, :]
+            names, yhat, unsupported = self.prophet_countries.country_scenarios_for_future(future_df, scenarios)
+
+            if selected is not None:
+                keep = [i for i, name in enumerate(names) if name in set(selected)]
+                names = [names[i] for i in keep]
+                yhat = yhat[:, keep, :]
+
+            with timed('serialize'):
+                date_strings = pd.DatetimeIndex(future_df['ds']).strftime('%Y-%m-%d')
+                baseline_totals = yhat[0].sum(axis=1)
+                results = []
+                for s, scenario in enumerate(scenarios, start=1):
+                    baseline_total = float(aggregate[0].sum())
+                    scenario_total = float(aggregate[s].sum())
+                    aggregated = {
+                        'baseline': baseline_total,
+                        'scenario': scenario_total,
+                        'delta': scenario_total - baseline_total,
+                        'delta_pct': (scenario_total / baseline_total - 1) * 100 if baseline_total else None,
+                        'data': pd.DataFrame({
+                            'date': date_strings,
+                            'baseline': aggregate[0],
+                            'scenario': aggregate[s],
+                            'delta': aggregate[s] - aggregate[0]
+                        }).to_dict('records')
+                    }
+
+                    scenario_totals = yhat[s].sum(axis=1)
+                    deltas = scenario_totals - baseline_totals
+                    country_results = []
+                    for i in np.argsort(deltas, kind='stable'):
+                        entry = {
+                            'name': names[i].title(),
+                            'baseline': float(baseline_totals[i]),
+                            'scenario': float(scenario_totals[i]),
+                            'delta': float(deltas[i])
+                        }
+                        if include_series:
+                            entry['data'] = pd.DataFrame({
+                                'date': date_strings,
+                                'baseline': yhat[0, i],
+                                'scenario': yhat[s, i],
+                                'delta': yhat[s, i] - yhat[0, i]
+                            }).to_dict('records')
+                        country_results.append(entry)
+
+                    results.append({
+                        'name': scenario.name,
+                        'aggregated': aggregated,
+                        'countries': country_results
+                    })
+
+            return {
+                'success': True,
+                'data': results,
+                'metadata': {
+                    'start_date': start_date,
+                    'months_forecasted': months_to_forecast,
+                    'scenarios': len(scenarios),
+                    'countries': len(names),
+                    'unsupported_countries': [country.title() for country in unsupported]
+                }
+            }
         except Exception as e:
-            raise Exception(f"Error exporting forecast: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'data': []
+            }
+
+    def forecast_batch(self, queries):
+        """Answer many forecast queries, predicting each model once over the union of their dates.
+
+        Each query is a dict with start_date, months_to_forecast and optionally
+        country (omitted for the aggregated model) or type 'top_countries' with
+        count; any type other than 'forecast' (the default) or 'top_countries'
+        is answered with an error. Returns one result per query, in order, shaped like the single
+        forecast endpoints.
+        """
+        self.refresh_models()
+
+        results = [None] * len(queries)
+        groups = {}
+        top_queries = []
+
+        for i, query in enumerate(queries):
+            try:
+                query_type = query.get('type', 'forecast')
+                if query_type not in ('forecast', 'top_countries'):
+                    raise Exception("type must be forecast or top_countries")
+                start_date = normalize_start_date(query.get('start_date'))
+                months = int(query.get('months_to_forecast') or 0)
+                if start_date is None:
+                    raise Exception("start_date must be in YYYY-MM-DD format")
+                if months <= 0:
+                    raise Exception("months_to_forecast must be greater than 0")
+
+                if query_type == 'top_countries':
+                    top_queries.append((i, start_date, months, query.get('count')))
+                    continue
+
+                country = query.get('country')
+                if country:
+                    model_name = self.prophet_countries.find_country(country)
+                    if model_name is None:
+                        raise Exception(f"Unknown country: {country}")
+                else:
+                    model_name = None
+
+                dates = create_future_dataframe(start_date, months)['ds'].to_numpy()
+                groups.setdefault(model_name, []).append((i, start_date, months, dates))
+            except Exception as e:
+                results[i] = {'success': False, 'error': str(e), 'data': []}
+
+        for model_name, group in groups.items():
+            try:
+                union = np.unique(np.concatenate([dates for _, _, _, dates in group]))
+                future_df = add_future_features(pd.DataFrame({'ds': pd.DatetimeIndex(union)}))
+
+                if model_name is None:
+                    records = self._records_for_future(future_df)
+                else:
+                    records = self._country_records(model_name, future_df)
+
+                for i, start_date, months, dates in group:
+                    positions = np.searchsorted(union, dates)
+                    metadata = {'start_date': start_date, 'months_forecasted': months, 'total_records': months}
+                    if model_name is not None:
+                        metadata['country'] = model_name.title()
+                    results[i] = {
+                        'success': True,
+                        'data': [records[position] for position in positions],
+                        'metadata': metadata
+                    }
+            except Exception as e:
+                for i, _, _, _ in group:
+                    results[i] = {'success': False, 'error': str(e), 'data': []}
+
+        # Longest horizon first, so shorter rankings from the same start come from the cache
+        for i, start_date, months, count in sorted(top_queries, key=lambda query: -query[2]):
+            results[i] = self.forecast_top_countries(start_date, months, count)
+
+        return results
+
+    def _country_records(self, country, future_df):
+        forecast = self.prophet_countries.forecast_country_frame(country, future_df)
+
+        dates = pd.DatetimeIndex(forecast['ds'])
+        with timed('actual_join'):
+            actual = nullable_values(self.prophet_countries.country_actuals(country, dates))
+
+        with timed('serialize'):
+            return pd.DataFrame({
+                'date': dates.strftime('%Y-%m-%d'),
+                'actual': actual,
+                'prediction': forecast['yhat'].to_numpy(dtype=float)
+            }).to_dict('records')
+
+    def export_frames(self, start_date, months_to_forecast, scope='aggregated', chunk_months=120):
+        """Yield the forecast as DataFrames of at most chunk_months dates each.
+
+        Predictions for a date do not depend on the horizon, so a long export
+        is computed chunk by chunk and only one chunk is held in memory.
+        """
+        if normalize_start_date(start_date) is None:
+            raise Exception("start_date must be in YYYY-MM-DD format")
+        if scope not in ('aggregated', 'countries'):
+            raise Exception("scope must be aggregated or countries")
+
+        self.refresh_models()
+
+        chunk_start = start_date
+        remaining = months_to_forecast
+        while remaining > 0:
+            months = min(chunk_months, remaining)
+
+            if scope == 'aggregated':
+                frame = pd.DataFrame(self._forecast_records(chunk_start, months))
+                last_date = frame['date'].iloc[-1]
+            else:
+                names, yhat = self.prophet_countries.forecast_country_matrix(chunk_start, months)
+                dates = create_future_dataframe(chunk_start, months)['ds'].dt.strftime('%Y-%m-%d').to_numpy()
+                frame = pd.DataFrame({
+                    'date': np.tile(dates, len(names)),
+                    'country': np.repeat([name.title() for name in names], months),
+                    'prediction': yhat.ravel()
+                })
+                last_date = dates[-1]
+
+            yield frame
+
+            remaining -= months
+            # Continue from the month after this chunk, as create_future_dataframe would
+            chunk_start = create_future_dataframe(last_date, 2)['ds'].iloc[1].strftime('%Y-%m-%d')
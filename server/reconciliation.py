@@ -0,0 +1,129 @@
+import threading
+
+import numpy as np
+
+RECONCILIATION_METHODS = ('bottom_up', 'ols', 'wls', 'mint_shrink')
+DEFAULT_RECONCILIATION_METHOD = 'mint_shrink'
+
+# Variance floor, relative to the mean residual variance, so series with
+# (near) perfect in-sample fits do not make the weight matrix singular
+VARIANCE_FLOOR = 1e-6
+
+
+def summing_matrix(n_bottom):
+    """(1 + n) x n matrix mapping bottom-level series to [total, bottom...]"""
+    return np.vstack([np.ones((1, n_bottom)), np.eye(n_bottom)])
+
+
+def shrink_covariance(residuals):
+    """Residual covariance shrunk towards its diagonal (Schafer-Strimmer), and the shrinkage weight.
+
+    residuals is (observations x series); rows with any NaN are ignored.
+    """
+    residuals = residuals[~np.isnan(residuals).any(axis=1)]
+    n = len(residuals)
+    if n < 2:
+        raise Exception("Not enough complete residual rows to estimate a covariance")
+
+    covariance = residuals.T @ residuals / n
+    variance = np.diag(covariance).copy()
+    variance = np.maximum(variance, VARIANCE_FLOOR * max(variance.mean(), 1.0))
+
+    scale = np.sqrt(variance)
+    standardized = residuals / scale
+    correlation = covariance / np.outer(scale, scale)
+
+    # Estimated variance of each sample correlation against its squared size off the diagonal
+    squared = standardized ** 2
+    v = (squared.T @ squared - (standardized.T @ standardized) ** 2 / n) / (n * (n - 1))
+    np.fill_diagonal(v, 0.0)
+    d = correlation ** 2
+    np.fill_diagonal(d, 0.0)
+    shrinkage = float(np.clip(v.sum() / d.sum(), 0.0, 1.0)) if d.sum() > 0 else 1.0
+
+    shrunk = (1.0 - shrinkage) * covariance
+    shrunk[np.diag_indices_from(shrunk)] = variance
+    return shrunk, shrinkage
+
+
+def reconciliation_matrix(S, method, covariance=None):
+    """Square matrix M so that M @ base (all series x horizons) is coherent.
+
+    M = S G with G = (S' W^-1 S)^-1 S' W^-1 for the least-squares methods,
+    or G picking out the bottom rows for bottom_up.
+    """
+    n_total, n_bottom = S.shape
+    if method == 'bottom_up':
+        G = np.hstack([np.zeros((n_bottom, n_total - n_bottom)), np.eye(n_bottom)])
+        return S @ G
+
+    if method == 'ols':
+        W_inv = np.eye(n_total)
+    elif method == 'wls':
+        W_inv = np.diag(1.0 / np.diag(covariance))
+    elif method == 'mint_shrink':
+        W_inv = np.linalg.inv(covariance)
+    else:
+        raise Exception(f"Unknown reconciliation method: {method}")
+
+    StW = S.T @ W_inv
+    G = np.linalg.solve(StW @ S, StW)
+    return S @ G
+
+
+class HierarchyReconciler:
+    """Reconciles the aggregate forecast with the country forecasts that sum to it.
+
+    Series are ordered [aggregate, countries...]. residuals holds in-sample
+    residuals in that order (observations x series) and is only needed by
+    the wls and mint_shrink methods. Each method's matrix is built once, so
+    reconciling a request is a single matrix product.
+    """
+
+    def __init__(self, names, residuals=None):
+        self.names = list(names)
+        self.S = summing_matrix(len(self.names))
+        self.residuals = residuals
+        self.covariance = None
+        self.shrinkage = None
+        self._matrices = {}
+        self._lock = threading.Lock()
+
+    def matrix(self, method):
+        if method not in RECONCILIATION_METHODS:
+            raise Exception(f"Unknown reconciliation method: {method}. "
+                            f"Expected one of: {', '.join(RECONCILIATION_METHODS)}")
+        with self._lock:
+            if method not in self._matrices:
+                if method in ('wls', 'mint_shrink') and self.covariance is None:
+                    if self.residuals is None:
+                        raise Exception(f"Reconciliation method {method} needs in-sample residuals")
+                    self.covariance, self.shrinkage = shrink_covariance(self.residuals)
+                self._matrices[method] = reconciliation_matrix(self.S, method, self.covariance)
+            return self._matrices[method]
+
+    def align(self, names, countries):
+        """Rows of countries (in names order) rearranged into this reconciler's order"""
+        countries = np.asarray(countries, dtype=float)
+        if list(names) == self.names:
+            return countries
+        position = {name: i for i, name in enumerate(names)}
+        missing = [name for name in self.names if name not in position]
+        if missing:
+            raise Exception(f"No forecast for countries: {', '.join(missing)}")
+        return countries[[position[name] for name in self.names]]
+
+    def reconcile(self, aggregate, countries, method=DEFAULT_RECONCILIATION_METHOD, names=None):
+        """Coherent (aggregate (months,), countries (countries x months)) from the base forecasts"""
+        if names is not None:
+            countries = self.align(names, countries)
+        base = np.vstack([np.asarray(aggregate, dtype=float)[None, :], np.asarray(countries, dtype=float)])
+        reconciled = self.matrix(method) @ base
+        return reconciled[0], reconciled[1:]
+
+    def stats(self):
+        return {
+            'series': len(self.names) + 1,
+            'methods_built': sorted(self._matrices),
+            'shrinkage': self.shrinkage,
+        }
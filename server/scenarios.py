@@ -0,0 +1,144 @@
+from datetime import datetime
+
+import numpy as np
+
+# Condition flags (utils.FEATURE_COLUMNS) a scenario may override; they switch the conditional seasonalities
+CONDITION_COLUMNS = ('pre_covid', 'has_covid')
+
+
+def _month(value, field):
+    """Month ordinal (months since 1970-01) of a YYYY-MM-DD date"""
+    try:
+        date = datetime.strptime(str(value), '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f"{field} must be in YYYY-MM-DD format")
+    return (date.year - 1970) * 12 + date.month - 1
+
+
+def _window(spec, field):
+    """(first month, last month) from start and either end or months (default one month)"""
+    if not spec.get('start'):
+        raise ValueError(f"{field}.start is required")
+    first = _month(spec['start'], f"{field}.start")
+    if spec.get('end'):
+        last = _month(spec['end'], f"{field}.end")
+    else:
+        months = int(spec.get('months') or 1)
+        if months <= 0:
+            raise ValueError(f"{field}.months must be greater than 0")
+        last = first + months - 1
+    if last < first:
+        raise ValueError(f"{field}.end must not be before {field}.start")
+    return first, last
+
+
+def _entries(spec, key, name):
+    """The list under spec[key] (empty if absent)"""
+    entries = spec.get(key) or []
+    if not isinstance(entries, list):
+        raise ValueError(f"{name}.{key} must be a list")
+    return entries
+
+
+def _row_months(ds_ns):
+    return ds_ns.astype('datetime64[ns]').astype('datetime64[M]').astype(np.int64)
+
+
+class Scenario:
+    """A hypothetical set of shocks and condition flags applied to fitted models at predict time.
+
+    - replays: a fitted holiday or shock (e.g. covid_impact_1) replayed month
+      by month from a new start, optionally truncated and scaled
+    - effects: a uniform relative change (e.g. -0.2) over a window of months
+    - conditions: pre_covid / has_covid flags overridden over a window of months
+    """
+
+    def __init__(self, name, replays=(), effects=(), conditions=()):
+        self.name = name
+        self.replays = list(replays)
+        self.effects = list(effects)
+        self.conditions = list(conditions)
+
+    @classmethod
+    def from_dict(cls, spec, index=0):
+        if not isinstance(spec, dict):
+            raise ValueError(f"scenarios[{index}] must be an object")
+        name = spec.get('name') or f"scenario_{index + 1}"
+
+        replays, effects, conditions = [], [], []
+        for i, shock in enumerate(_entries(spec, 'shocks', name)):
+            field = f"{name}.shocks[{i}]"
+            if not isinstance(shock, dict):
+                raise ValueError(f"{field} must be an object")
+            if shock.get('like'):
+                first = _month(shock.get('start'), f"{field}.start")
+                months = int(shock['months']) if shock.get('months') else None
+                if months is not None and months <= 0:
+                    raise ValueError(f"{field}.months must be greater than 0")
+                replays.append((str(shock['like']), first, months, float(shock.get('scale', 1.0))))
+            elif shock.get('effect') is not None:
+                first, last = _window(shock, field)
+                effects.append((first, last, float(shock['effect'])))
+            else:
+                raise ValueError(f"{field} needs either like (a holiday to replay) or effect")
+
+        for i, condition in enumerate(_entries(spec, 'conditions', name)):
+            field = f"{name}.conditions[{i}]"
+            if not isinstance(condition, dict):
+                raise ValueError(f"{field} must be an object")
+            first, last = _window(condition, field)
+            flags = {key: condition[key] for key in CONDITION_COLUMNS if key in condition}
+            for key, value in flags.items():
+                if not isinstance(value, bool):
+                    raise ValueError(f"{field}.{key} must be true or false")
+            if not flags:
+                raise ValueError(f"{field} must set at least one of: {', '.join(CONDITION_COLUMNS)}")
+            conditions.append((first, last, flags))
+
+        if not (replays or effects or conditions):
+            raise ValueError(f"{name} has no shocks or conditions")
+        return cls(name, replays, effects, conditions)
+
+    @property
+    def holidays(self):
+        return {holiday for holiday, _, _, _ in self.replays}
+
+    def effect(self, ds_ns):
+        """Relative change of yhat per row, e.g. -0.1 for 10% fewer arrivals"""
+        months = _row_months(ds_ns)
+        effect = np.zeros(len(months))
+        for first, last, value in self.effects:
+            effect[(months >= first) & (months <= last)] += value
+        return effect
+
+    def build(self, features, frame, ds_ns, X):
+        """Feature matrix of this scenario, from the baseline matrix X of the same rows"""
+        months = _row_months(ds_ns)
+        if self.conditions:
+            frame = frame.copy()
+            for first, last, flags in self.conditions:
+                window = (months >= first) & (months <= last)
+                for column, value in flags.items():
+                    values = frame[column].to_numpy(copy=True)
+                    values[window] = value
+                    frame[column] = values
+            X = features.build(frame, ds_ns=ds_ns)
+        else:
+            X = X.copy()
+
+        for holiday, first, count, scale in self.replays:
+            profile = features.holiday_profile(holiday)
+            for k, col in enumerate(profile[:count] if count else profile):
+                X[months == first + k, col] = scale
+        return X
+
+
+def check_replays(batch_engine, scenarios):
+    """Raise ValueError naming the replayed holidays a model of batch_engine cannot replay"""
+    for scenario in scenarios:
+        missing = batch_engine.unreplayable(scenario.holidays)
+        if missing:
+            raise ValueError(
+                f"{scenario.name}: cannot replay {', '.join(missing)}; "
+                f"the fitted models have no month-start effect for them"
+            )
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The server modules import each other by name and use paths relative to server/
+sys.path.insert(0, SERVER_DIR)
+os.chdir(SERVER_DIR)
+
+# Build the models on first use rather than in a background thread at import
+os.environ.setdefault('MODEL_WARM_UP', 'lazy')
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    import app
+    if app.get_tourism_model() is None:
+        pytest.fail(f"Model failed to warm up: {app.warm_up_state['error']}")
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture(scope='session')
+def tourism_model(app_module):
+    return app_module.get_tourism_model()
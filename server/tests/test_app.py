@@ -0,0 +1,123 @@
+import runpy
+
+import pytest
+
+
+def test_forecast_round_trip(client):
+    response = client.post('/forecast', json={'start_date': '2024-01-01', 'months_to_forecast': 12})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['success']
+    assert [record['date'] for record in body['data']][:2] == ['2024-01-01', '2024-02-01']
+    assert len(body['data']) == 12
+    assert all(record['prediction'] > 0 for record in body['data'])
+    assert body['data'][0]['actual'] is not None
+
+
+def test_forecast_matches_model(client, tourism_model):
+    body = client.post('/forecast', json={'start_date': '2026-01-01', 'months_to_forecast': 6}).get_json()
+    expected = tourism_model.forecast('2026-01-01', 6)['data']
+
+    assert [record['prediction'] for record in body['data']] == [record['prediction'] for record in expected]
+
+
+def test_forecast_with_intervals(client):
+    body = client.post('/forecast', json={
+        'start_date': '2026-01-01', 'months_to_forecast': 3, 'include_intervals': True
+    }).get_json()
+
+    for record in body['data']:
+        assert record['prediction_lower'] <= record['prediction'] <= record['prediction_upper']
+
+
+def test_forecast_rejects_non_boolean_flags(client):
+    response = client.post('/forecast', json={
+        'start_date': '2026-01-01', 'months_to_forecast': 3, 'include_intervals': 'false'
+    })
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'include_intervals must be true or false'
+
+
+def test_forecast_validation(client):
+    assert client.post('/forecast', json={'months_to_forecast': 3}).status_code == 400
+    assert client.post('/forecast', json={'start_date': '2026-01-01', 'months_to_forecast': 0}).status_code == 400
+    assert client.post('/forecast', json={'start_date': '2026-01-01', 'months_to_forecast': 'x'}).status_code == 400
+
+
+def test_job_wait_must_be_a_number(client):
+    job = client.post('/jobs', json={'start_date': '2026-01-01', 'months_to_forecast': 3}).get_json()
+
+    response = client.get(f"/jobs/{job['job_id']}?wait=abc")
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'wait must be a number of seconds'
+
+    assert client.get(f"/jobs/{job['job_id']}?wait=-5").status_code == 200
+    assert client.get(f"/jobs/{job['job_id']}?wait=10").get_json()['status'] == 'done'
+
+
+def test_streamed_export_stages_are_attributed_to_export(client):
+    import json
+    from instrumentation import STAGE_SECONDS
+
+    def predict_count(endpoint):
+        series = STAGE_SECONDS._series.get((endpoint, 'predict'))
+        return series[1] if series else 0
+
+    before = predict_count('export_forecast'), predict_count('background')
+    # 240 months is two chunks; the second one is predicted while the body streams
+    body = json.dumps({'start_date': '2031-01-01', 'months_to_forecast': 240})
+    response = client.post('/export', data=body, content_type='application/json')
+    response.get_data()
+
+    assert predict_count('export_forecast') == before[0] + 2
+    assert predict_count('background') == before[1]
+
+
+def test_jobs_can_be_disabled(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'JOBS_ENABLED', False)
+
+    response = client.post('/jobs', json={'start_date': '2026-01-01', 'months_to_forecast': 3})
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize('jobs_enabled, expected_workers', [('1', 1), ('0', 4)])
+def test_gunicorn_runs_one_worker_while_jobs_are_enabled(monkeypatch, jobs_enabled, expected_workers):
+    monkeypatch.setenv('JOBS_ENABLED', jobs_enabled)
+    monkeypatch.setenv('WEB_WORKERS', '4')
+    monkeypatch.setenv('WARM_COUNTRY_MODELS_IN_BACKGROUND', '0')
+
+    assert runpy.run_path('gunicorn.conf.py')['workers'] == expected_workers
+
+
+def test_batch_matches_single_queries(client, tourism_model):
+    body = client.post('/forecast-batch', json={'queries': [
+        {'start_date': '2026-01-01', 'months_to_forecast': 12},
+        {'start_date': '2026-03-01', 'months_to_forecast': 6},
+        {'start_date': '2026-01-01', 'months_to_forecast': 6, 'country': 'Japan'},
+        {'start_date': '2026-01-01', 'months_to_forecast': 12, 'type': 'top_countries', 'count': 5},
+        {'start_date': '2026-01-01', 'months_to_forecast': 3, 'country': 'Atlantis'},
+    ]}).get_json()
+
+    aggregated, shifted, japan, top, unknown = body['data']
+    for result, (start_date, months) in [(aggregated, ('2026-01-01', 12)), (shifted, ('2026-03-01', 6))]:
+        expected = tourism_model.forecast(start_date, months)['data']
+        assert [r['date'] for r in result['data']] == [r['date'] for r in expected]
+        assert [r['prediction'] for r in result['data']] == pytest.approx([r['prediction'] for r in expected])
+    assert japan['metadata']['country'] == 'Japan' and len(japan['data']) == 6
+    assert top['data'] == tourism_model.forecast_top_countries('2026-01-01', 12, 5)['data']
+    assert not unknown['success'] and unknown['error'] == 'Unknown country: Atlantis'
+    assert body['metadata'] == {'total_queries': 5, 'failed_queries': 1}
+
+
+def test_batch_rejects_unknown_query_types(client):
+    body = client.post('/forecast-batch', json={'queries': [
+        {'start_date': '2026-01-01', 'months_to_forecast': 3},
+        {'start_date': '2026-01-01', 'months_to_forecast': 3, 'type': 'top_country'},
+    ]}).get_json()
+
+    first, unknown = body['data']
+    assert first['success'] and len(first['data']) == 3
+    assert not unknown['success'] and unknown['error'] == 'type must be forecast or top_countries'
+    assert body['metadata']['failed_queries'] == 1
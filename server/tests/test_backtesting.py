@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtesting import Backtester, rolling_cutoffs, score_predictions
+
+MONTHS = pd.date_range('2015-01-01', periods=60, freq='MS')
+
+
+def test_cutoffs_leave_a_full_horizon_and_the_initial_window():
+    cutoffs = rolling_cutoffs(MONTHS, horizon=12, period=6, initial=36)
+
+    assert cutoffs == [MONTHS[35], MONTHS[41], MONTHS[47]]
+    assert (MONTHS > cutoffs[-1]).sum() == 12
+    assert (MONTHS <= cutoffs[0]).sum() == 36
+    assert rolling_cutoffs(MONTHS, horizon=12, period=6, initial=36, last=1) == [MONTHS[47]]
+
+
+def test_scores_per_series():
+    predictions = pd.DataFrame({
+        'series': ['A', 'A', 'B', 'B'],
+        'cutoff': [MONTHS[0], MONTHS[1], MONTHS[0], MONTHS[0]],
+        'horizon': [1, 1, 1, 2],
+        'y': [100.0, 200.0, 0.0, 10.0],
+        'yhat': [110.0, 180.0, 5.0, 10.0],
+    })
+
+    summary = score_predictions(predictions).set_index('series')
+    assert summary.loc['A', 'cutoffs'] == 2 and summary.loc['A', 'points'] == 2
+    assert summary.loc['A', 'mape'] == pytest.approx(0.1)
+    assert summary.loc['A', 'rmse'] == pytest.approx(np.sqrt((10 ** 2 + 20 ** 2) / 2))
+    assert summary.loc['A', 'mae'] == pytest.approx(15)
+    # Zero actuals are left out of MAPE but not of the other errors
+    assert summary.loc['B', 'mape'] == 0
+    assert summary.loc['B', 'mae'] == pytest.approx(2.5)
+
+
+def test_backtest_scores_only_months_after_each_cutoff(tourism_model):
+    backtester = Backtester(tourism_model.prophet_countries, max_workers=1)
+    predictions = backtester.run(['GUAM'], include_aggregated=False, horizon=6, quick=True, quick_cutoffs=1)
+
+    cutoff = predictions['cutoff'].iloc[0]
+    history = tourism_model.prophet_countries.country_data.frame('GUAM')
+    expected = history[history['ds'] > cutoff].head(6)
+    assert predictions['horizon'].tolist() == [1, 2, 3, 4, 5, 6]
+    np.testing.assert_array_equal(predictions['ds'].to_numpy(), expected['ds'].to_numpy())
+    np.testing.assert_array_equal(predictions['y'].to_numpy(), expected['y'].to_numpy())
+    assert np.isfinite(predictions['yhat']).all()
@@ -0,0 +1,63 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from columnar_dataset import (AGGREGATED_DATA_PATH, COUNTRY_DATA_PATH, convert_aggregated_dataset,
+                              convert_country_dataset, read_columns)
+from country_data import CountryDataStore
+
+
+@pytest.fixture
+def country_csv(tmp_path):
+    path = tmp_path / 'country_monthly_dataset.csv'
+    shutil.copy2(COUNTRY_DATA_PATH, path)
+    return str(path)
+
+
+def test_country_store_round_trip(country_csv, tmp_path):
+    path = str(tmp_path / 'country.columnar')
+    convert_country_dataset(country_csv, path)
+
+    opened = CountryDataStore.open(path, country_csv)
+    expected = CountryDataStore.from_csv(country_csv)
+    assert opened.countries == expected.countries
+    assert isinstance(opened.ds, np.memmap)
+    for name in ['offsets', 'ds', 'y', 'features', 'months']:
+        np.testing.assert_array_equal(getattr(opened, name), getattr(expected, name))
+    assert opened.year_range() == expected.year_range()
+
+
+def test_stale_copy_is_not_opened(country_csv, tmp_path):
+    path = str(tmp_path / 'country.columnar')
+    convert_country_dataset(country_csv, path)
+
+    os.utime(country_csv, ns=(0, 0))
+    assert CountryDataStore.open(path, country_csv) is None
+
+
+def test_copy_with_other_feature_definitions_is_not_opened(country_csv, tmp_path):
+    path = str(tmp_path / 'country.columnar')
+    convert_country_dataset(country_csv, path)
+    manifest_path = os.path.join(path, 'manifest.json')
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    manifest['attributes']['covid_recovery_date'] = '2022-01-01'
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+
+    assert CountryDataStore.open(path, country_csv) is None
+
+
+def test_aggregated_columns_match_the_csv(tmp_path):
+    path = str(tmp_path / 'aggregated.columnar')
+    convert_aggregated_dataset(AGGREGATED_DATA_PATH, path)
+
+    columns, _ = read_columns(path, AGGREGATED_DATA_PATH)
+    expected = pd.read_csv(AGGREGATED_DATA_PATH)
+    assert sorted(columns) == ['ds', 'y']
+    np.testing.assert_array_equal(columns['ds'], pd.to_datetime(expected['ds']).to_numpy())
+    np.testing.assert_array_equal(columns['y'], expected['y'].to_numpy(dtype=float))
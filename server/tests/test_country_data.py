@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from columnar_dataset import COUNTRY_DATA_PATH
+from country_data import CountryDataStore
+from utils import FEATURE_COLUMNS, add_future_features
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    df = pd.read_csv(COUNTRY_DATA_PATH, usecols=['Country of Residence', 'Arrivals', 'Date'])
+    return df.rename(columns={'Date': 'ds', 'Arrivals': 'y'})
+
+
+@pytest.fixture(scope='module')
+def store():
+    return CountryDataStore.from_csv(COUNTRY_DATA_PATH)
+
+
+def test_country_blocks_keep_file_order(dataset, store):
+    assert store.countries == list(dataset['Country of Residence'].unique())
+    for country in ['JAPAN', 'GUAM', store.countries[-1]]:
+        rows = dataset[dataset['Country of Residence'] == country]
+        np.testing.assert_array_equal(store.dates(country), pd.to_datetime(rows['ds']).to_numpy())
+        np.testing.assert_array_equal(store.values(country), rows['y'].to_numpy())
+
+
+def test_frame_matches_the_dataframe_slice(dataset, store):
+    rows = dataset[dataset['Country of Residence'] == 'KOREA']
+    expected = add_future_features(pd.DataFrame({'ds': pd.to_datetime(rows['ds']).to_numpy(), 'y': rows['y'].to_numpy()}))
+
+    pd.testing.assert_frame_equal(store.frame('KOREA'), expected[['ds', 'y'] + FEATURE_COLUMNS], check_dtype=False)
+
+
+def test_whole_numbers_are_stored_compactly():
+    frame = pd.DataFrame({
+        'Country of Residence': ['A', 'B', 'A'],
+        'ds': ['2024-01-01', '2024-01-01', '2024-02-01'],
+        'y': [1.0, 2.0, 3.0],
+    })
+
+    store = CountryDataStore.from_frame(frame)
+    assert store.y.dtype == np.int32
+    assert store.values('A').tolist() == [1, 3]
+    assert 'C' not in store
+
+    frame.loc[1, 'y'] = 2.5
+    assert CountryDataStore.from_frame(frame).y.dtype == np.float64
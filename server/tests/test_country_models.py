@@ -0,0 +1,60 @@
+import pytest
+
+from prophet_country_model import ProphetCountrySpecificModels
+
+COUNTRY_DATA_PATH = './dataset/country_monthly_dataset.csv'
+
+
+@pytest.fixture
+def lazy_models():
+    return ProphetCountrySpecificModels(data_path=COUNTRY_DATA_PATH, lazy=True)
+
+
+def test_lazy_batch_engine_is_reused(lazy_models):
+    first = [engine for engine, _ in lazy_models._forecast_batches()]
+    second = [engine for engine, _ in lazy_models._forecast_batches()]
+
+    assert first[0] is not None
+    assert first[0] is second[0]
+
+
+def test_lazy_batch_engine_rebuilt_after_eviction(lazy_models):
+    first = next(lazy_models._forecast_batches())[0]
+    lazy_models._evict('JAPAN')
+    second = next(lazy_models._forecast_batches())[0]
+
+    assert first is not second
+
+
+def test_lazy_missing_model_is_an_error_not_a_fit(tmp_path, monkeypatch):
+    models = ProphetCountrySpecificModels(data_path=COUNTRY_DATA_PATH, lazy=True, model_store_path=None)
+    models.cache_dir = str(tmp_path)
+    monkeypatch.setattr(models, '_train_single_model', lambda country: pytest.fail("fitted on the request path"))
+
+    with pytest.raises(Exception, match='No trained model for JAPAN'):
+        models.get_country_model('JAPAN')
+
+
+def test_only_the_edited_country_is_refit(tmp_path):
+    import shutil
+    import pandas as pd
+
+    data_path = tmp_path / 'country_monthly_dataset.csv'
+    data = pd.read_csv(COUNTRY_DATA_PATH)
+    edited = (data['Country of Residence'] == 'GUAM') & (data['Year'] == 2019) & (data['Month'] == 'March')
+    data.loc[edited, 'Arrivals'] *= 1.5
+    data.to_csv(data_path, index=False)
+
+    # The shipped caches have no metadata, so they are confirmed from their stored training history
+    cache_dir = tmp_path / 'country_model_cache'
+    shutil.copytree('./model/country_model_cache', cache_dir,
+                    ignore=lambda directory, names: [name for name in names if not name.endswith('_model.json')])
+
+    models = ProphetCountrySpecificModels(
+        data_path=str(data_path), cache_dir=str(cache_dir), model_store_path=None, max_workers=4
+    )
+
+    assert list(models.fit_times) == ['GUAM']
+    assert len(models.engines) == len(models.countries)
+    assert models.stale_countries() == []
+    assert all((cache_dir / f"{country}_meta.json").exists() for country in models.countries)
@@ -0,0 +1,82 @@
+import time
+
+from forecast_cache import ForecastCache, files_fingerprint
+
+
+def test_longer_horizon_serves_shorter_requests():
+    cache = ForecastCache()
+    cache.put('forecast', '2024-01-01', 24, 'value')
+
+    assert cache.get('forecast', '2024-01-01', 12) == ('value', 24)
+    assert cache.get('forecast', '2024-01-01', 36) is None
+
+
+def test_shorter_horizon_does_not_replace_longer():
+    cache = ForecastCache()
+    cache.put('forecast', '2024-01-01', 24, 'long')
+    cache.put('forecast', '2024-01-01', 6, 'short')
+
+    assert cache.get('forecast', '2024-01-01', 6) == ('long', 24)
+
+
+def test_lru_eviction():
+    cache = ForecastCache(max_entries=2)
+    cache.put('forecast', '2024-01-01', 12, 'a')
+    cache.put('forecast', '2024-02-01', 12, 'b')
+    cache.get('forecast', '2024-01-01', 12)
+    cache.put('forecast', '2024-03-01', 12, 'c')
+
+    assert cache.get('forecast', '2024-02-01', 12) is None
+    assert cache.get('forecast', '2024-01-01', 12) is not None
+    assert cache.evictions == 1
+
+
+def test_ttl_expiry():
+    cache = ForecastCache(ttl_seconds=0.01)
+    cache.put('forecast', '2024-01-01', 12, 'a')
+    time.sleep(0.02)
+
+    assert cache.get('forecast', '2024-01-01', 12) is None
+
+
+def test_version_change_drops_entries():
+    version = ['v1']
+    cache = ForecastCache(version_fn=lambda: version[0], version_check_interval=0)
+    cache.put('forecast', '2024-01-01', 12, 'a')
+
+    assert not cache.check_version()
+    version[0] = 'v2'
+    assert cache.check_version()
+    assert cache.get('forecast', '2024-01-01', 12) is None
+    assert cache.invalidations == 1
+
+
+def test_files_fingerprint_ignores_unlisted_files(tmp_path):
+    model = tmp_path / 'model.json'
+    cache_dir = tmp_path / 'cache'
+    model.write_text('{}')
+    cache_dir.mkdir()
+    paths = [str(model), str(cache_dir)]
+    version = files_fingerprint(paths)
+
+    (tmp_path / 'holidays.npz').write_bytes(b'generated')
+    assert files_fingerprint(paths) == version
+
+    (cache_dir / 'JAPAN_model.json').write_text('{}')
+    assert files_fingerprint(paths) != version
+
+
+def test_files_fingerprint_suffix_skips_other_files_in_directories(tmp_path):
+    model = tmp_path / 'aggregated_model.json'
+    cache_dir = tmp_path / 'cache'
+    model.write_text('{}')
+    cache_dir.mkdir()
+    paths = [str(model), str(cache_dir)]
+    version = files_fingerprint(paths, suffix='_model.json')
+
+    (cache_dir / 'JAPAN_meta.json').write_text('{}')
+    (cache_dir / 'JAPAN_config.json').write_text('{}')
+    assert files_fingerprint(paths, suffix='_model.json') == version
+
+    (cache_dir / 'JAPAN_model.json').write_text('{}')
+    assert files_fingerprint(paths, suffix='_model.json') != version
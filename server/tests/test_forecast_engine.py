@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from prophet.serialize import model_from_json
+
+from forecast_engine import BatchForecastEngine, FastProphetModel
+from utils import create_future_features
+
+COUNTRIES = ['JAPAN', 'KOREA', 'GUAM']
+
+
+def _load(path):
+    with open(path, 'r') as f:
+        return model_from_json(f.read())
+
+
+@pytest.fixture(scope='module')
+def future_df():
+    # Spans history, the COVID shock windows and the forecast range
+    return create_future_features('2015-01-01', 180)
+
+
+@pytest.mark.parametrize('path', [
+    './model/aggregated_model.json',
+    *[f'./model/country_model_cache/{country}_model.json' for country in COUNTRIES],
+])
+def test_fast_engine_matches_prophet_predict(path, future_df):
+    model = _load(path)
+    expected = model.predict(future_df.copy())['yhat'].to_numpy()
+    forecast = FastProphetModel.from_prophet(model).predict(future_df)
+
+    np.testing.assert_allclose(forecast['yhat'].to_numpy(), expected, rtol=1e-9, atol=1e-6)
+
+
+def test_batch_engine_matches_single_engines(future_df):
+    engines = {
+        country: FastProphetModel.from_prophet(_load(f'./model/country_model_cache/{country}_model.json'))
+        for country in COUNTRIES
+    }
+    yhat = BatchForecastEngine(engines).predict(future_df)
+
+    for i, country in enumerate(COUNTRIES):
+        single = engines[country].predict(future_df)['yhat'].to_numpy()
+        np.testing.assert_allclose(yhat[i], single, rtol=1e-9, atol=1e-6)
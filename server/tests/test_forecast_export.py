@@ -0,0 +1,72 @@
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from forecast_export import stream_export
+
+
+def _frames():
+    yield pd.DataFrame({'date': ['2024-01-01', '2024-02-01'], 'actual': [1.0, np.nan], 'prediction': [1.5, 2.5]})
+    yield pd.DataFrame({'date': ['2024-03-01'], 'actual': [np.nan], 'prediction': [3.5]})
+
+
+def test_csv_has_one_header_and_consistent_line_endings():
+    data = b''.join(stream_export(_frames(), 'csv'))
+
+    assert b'\r' not in data
+    assert data.splitlines()[0] == b'date,actual,prediction'
+    assert len(pd.read_csv(io.BytesIO(data))) == 3
+
+
+def test_ndjson_writes_nan_as_null():
+    lines = b''.join(stream_export(_frames(), 'ndjson')).decode().splitlines()
+
+    assert [json.loads(line)['actual'] for line in lines] == [1.0, None, None]
+
+
+def test_parquet_round_trip():
+    pytest.importorskip('pyarrow')
+    data = b''.join(stream_export(_frames(), 'parquet'))
+
+    frame = pd.read_parquet(io.BytesIO(data))
+    assert frame['prediction'].tolist() == [1.5, 2.5, 3.5]
+
+
+def test_export_endpoint_csv(client):
+    response = client.post('/export', json={'start_date': '2024-01-01', 'months_to_forecast': 6})
+
+    assert response.status_code == 200
+    lines = response.get_data().split(b'\n')
+    assert lines[0] == b'date,actual,prediction'
+    assert b'\r' not in response.get_data()
+    assert len([line for line in lines if line]) == 7
+
+
+def test_export_endpoint_parquet_across_the_end_of_history(client):
+    pytest.importorskip('pyarrow')
+    # The second 120-month chunk starts after the last actual, so its actuals are all None
+    response = client.post('/export', json={'start_date': '2016-01-01', 'months_to_forecast': 240, 'format': 'parquet'})
+
+    assert response.status_code == 200
+    frame = pd.read_parquet(io.BytesIO(response.get_data()))
+    assert len(frame) == 240
+    assert frame['actual'].iloc[0] > 0
+    assert pd.isna(frame['actual'].iloc[-1])
+
+
+@pytest.mark.parametrize('payload, error', [
+    ({'months_to_forecast': 6}, 'start_date is required in YYYY-MM-DD format'),
+    ({'start_date': '2024-01-01', 'months_to_forecast': 'six'}, 'months_to_forecast must be an integer'),
+    ({'start_date': '2024-01-01', 'months_to_forecast': 0}, 'months_to_forecast must be greater than 0'),
+    ({'start_date': '2024-01-01', 'months_to_forecast': -3}, 'months_to_forecast must be greater than 0'),
+    ({'start_date': '2024-01-01', 'months_to_forecast': 6, 'format': 'xlsx'}, 'format must be one of csv, ndjson, parquet'),
+    ({'start_date': '2024-01-01', 'months_to_forecast': 6, 'scope': 'regions'}, 'scope must be aggregated or countries'),
+])
+def test_export_endpoint_rejects_bad_input(client, payload, error):
+    response = client.post('/export', json=payload)
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == error
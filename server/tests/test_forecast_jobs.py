@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+
+from forecast_jobs import ForecastJobManager, JobQueueFull
+
+
+@pytest.fixture
+def manager():
+    manager = ForecastJobManager(max_workers=2, max_queue=2, result_ttl=600)
+    yield manager
+    manager.shutdown()
+
+
+def test_identical_submissions_share_one_job(manager):
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return {'success': True, 'data': []}
+
+    params = {'start_date': '2026-01-01', 'months_to_forecast': 12}
+    job, coalesced = manager.submit('forecast', params, work)
+    again, coalesced_again = manager.submit('forecast', dict(reversed(list(params.items()))), work)
+    release.set()
+
+    assert not coalesced and coalesced_again
+    assert again is job
+    assert manager.wait(job.id, 5).status == 'done'
+    assert len(calls) == 1 and job.coalesced == 1
+
+
+def test_finished_job_is_not_coalesced(manager):
+    first, _ = manager.submit('forecast', {'months_to_forecast': 3}, lambda: {'success': True})
+    manager.wait(first.id, 5)
+
+    second, coalesced = manager.submit('forecast', {'months_to_forecast': 3}, lambda: {'success': True})
+    assert not coalesced and second is not first
+
+
+def test_full_queue_rejects_new_jobs(manager):
+    release = threading.Event()
+    for months in (1, 2):
+        manager.submit('forecast', {'months_to_forecast': months}, lambda: release.wait(5))
+
+    with pytest.raises(JobQueueFull):
+        manager.submit('forecast', {'months_to_forecast': 3}, lambda: None)
+    release.set()
+    assert manager.stats()['rejected'] == 1
+
+
+def test_failed_result_marks_the_job_failed(manager):
+    job, _ = manager.submit('forecast', {}, lambda: {'success': False, 'error': 'bad start_date'})
+
+    assert manager.wait(job.id, 5).status == 'failed'
+    assert job.error == 'bad start_date'
+
+
+def test_finished_jobs_expire_after_the_ttl(manager, monkeypatch):
+    job, _ = manager.submit('forecast', {}, lambda: {'success': True})
+    manager.wait(job.id, 5)
+    assert manager.get(job.id) is job
+
+    monkeypatch.setattr(manager, 'result_ttl', 0)
+    job.finished_at -= 1
+    assert manager.get(job.id) is None
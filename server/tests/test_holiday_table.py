@@ -0,0 +1,33 @@
+from holiday_table import SHOCK_WINDOWS, HolidayTable
+
+CUSTOM_SHOCKS = [{'holiday': 'typhoon', 'ds': '2013-11-01', 'ds_upper': '2014-01-01'}]
+
+
+def test_custom_shocks_survive_a_reload(tmp_path):
+    path = str(tmp_path / 'holidays.npz')
+    table = HolidayTable(path=None, shocks=CUSTOM_SHOCKS, start_year=2010, end_year=2020)
+    table.path = path
+    table.save()
+
+    reloaded = HolidayTable(path)
+
+    assert reloaded.shocks == CUSTOM_SHOCKS
+    assert 'typhoon' in set(reloaded.frame(2010, 2020)['holiday'])
+    assert 'covid_impact_1' not in set(reloaded.frame(2010, 2020)['holiday'])
+
+
+def test_new_table_uses_default_shocks(tmp_path):
+    table = HolidayTable(str(tmp_path / 'holidays.npz'), start_year=2019, end_year=2021)
+
+    assert table.shocks == SHOCK_WINDOWS
+    assert HolidayTable(table.path).shocks == SHOCK_WINDOWS
+
+
+def test_explicit_shocks_regenerate_a_table_with_other_shocks(tmp_path):
+    path = str(tmp_path / 'holidays.npz')
+    HolidayTable(path, start_year=2019, end_year=2021)
+
+    table = HolidayTable(path, shocks=CUSTOM_SHOCKS, start_year=2019, end_year=2021)
+
+    assert table.shocks == CUSTOM_SHOCKS
+    assert HolidayTable(path).shocks == CUSTOM_SHOCKS
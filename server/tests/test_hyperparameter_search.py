@@ -0,0 +1,50 @@
+import time
+
+import pandas as pd
+
+import hyperparameter_search
+from hyperparameter_search import tune_country
+
+CUTOFFS = [pd.Timestamp('2019-01-01'), pd.Timestamp('2018-07-01')]
+
+
+def _fake_evaluate(errors):
+    """evaluate_cutoff stand-in: each config's error size, raising for configs marked None"""
+    def evaluate_cutoff(series, frame, cutoff, horizon, holidays_df=None, config=None, model_json=None):
+        error = errors[config['fourier_order']]
+        if error is None:
+            raise RuntimeError("Stan optimization failed")
+        predictions = pd.DataFrame({'y': [100.0] * horizon, 'yhat': [100.0 + error] * horizon})
+        return series, cutoff, predictions, 0.0
+    return evaluate_cutoff
+
+
+def _tune(monkeypatch, errors, patience=10):
+    monkeypatch.setattr(hyperparameter_search, 'evaluate_cutoff', _fake_evaluate(errors))
+    candidates = [{'fourier_order': order} for order in errors]
+    return tune_country('GUAM', None, None, candidates, CUTOFFS, 3, 'rmse', patience, time.time() + 60)
+
+
+def test_failed_candidate_keeps_the_best_so_far(monkeypatch):
+    result = _tune(monkeypatch, {10: 5.0, 3: 2.0, 15: None, 5: 4.0})
+
+    assert result['config'] == {'fourier_order': 3}
+    assert result['score'] == 2.0
+    assert result['baseline_score'] == 5.0
+    assert result['failed'] == 1
+    assert result['evaluated'] == 3
+
+
+def test_failed_baseline_is_not_reported_as_a_score(monkeypatch):
+    result = _tune(monkeypatch, {10: None, 3: 2.0})
+
+    assert result['config'] == {'fourier_order': 3}
+    assert result['baseline_score'] is None
+
+
+def test_losing_candidates_are_pruned(monkeypatch):
+    result = _tune(monkeypatch, {10: 1.0, 3: 2.0, 5: 3.0}, patience=1)
+
+    assert result['config'] == {'fourier_order': 10}
+    assert result['pruned'] == 1
+    assert result['stop_reason'] == 'early_stopping'
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from materialized_forecasts import materialize_forecasts, model_sources, open_materialized_forecasts
+
+START_DATES = ['2024-01-01', '2027-06-01']
+
+
+@pytest.fixture(scope='module')
+def materialized_path(tourism_model, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('materialized') / 'forecasts.npz')
+    materialize_forecasts(tourism_model, START_DATES, 12, path)
+    return path
+
+
+def test_shorter_horizons_match_live_forecasts(tourism_model, materialized_path):
+    materialized = open_materialized_forecasts(materialized_path, model_sources(tourism_model))
+
+    for start_date in START_DATES:
+        records = materialized.forecast_records(start_date, 6)
+        live = tourism_model._forecast_records(start_date, 6)
+        assert [record['date'] for record in records] == [record['date'] for record in live]
+        assert [record['actual'] for record in records] == [record['actual'] for record in live]
+        np.testing.assert_allclose([r['prediction'] for r in records], [r['prediction'] for r in live])
+
+
+def test_country_totals_match_live_forecasts(tourism_model, materialized_path):
+    materialized = open_materialized_forecasts(materialized_path)
+    names, totals = materialized.country_totals('2027-06-01', 9)
+
+    live_names, yhat = tourism_model.prophet_countries.forecast_country_matrix('2027-06-01', 9)
+    live = dict(zip(live_names, yhat.sum(axis=1)))
+    np.testing.assert_allclose(totals, [live[name] for name in names])
+
+
+def test_requests_outside_the_grid_are_not_answered(materialized_path):
+    materialized = open_materialized_forecasts(materialized_path)
+
+    assert materialized.forecast_records('2024-02-01', 6) is None
+    assert materialized.forecast_records('2024-01-01', 13) is None
+    assert materialized.country_totals('2024-01-01', 0) is None
+
+
+def test_forecasts_from_other_models_are_not_opened(tourism_model, materialized_path):
+    sources = dict(model_sources(tourism_model), country_models='0' * 12)
+
+    assert open_materialized_forecasts(materialized_path, sources) is None
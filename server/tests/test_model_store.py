@@ -0,0 +1,51 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from model_store import convert_json_models, open_model_store
+from utils import create_future_features
+
+MODELS = {
+    'aggregated': './model/aggregated_model.json',
+    'JAPAN': './model/country_model_cache/JAPAN_model.json',
+    'GUAM': './model/country_model_cache/GUAM_model.json',
+}
+
+
+@pytest.fixture(scope='module')
+def converted(tmp_path_factory):
+    store_path = str(tmp_path_factory.mktemp('store') / 'models.store')
+    engines = convert_json_models(MODELS, store_path)
+    return engines, open_model_store(store_path)
+
+
+def test_store_round_trip_matches_json_models(converted):
+    engines, store = converted
+    future_df = create_future_features('2015-01-01', 180)
+
+    assert sorted(store.names) == sorted(MODELS)
+    for name, engine in engines.items():
+        loaded = store.load(name).predict(future_df, include_components=True)
+        expected = engine.predict(future_df, include_components=True)
+        for column in expected.columns.drop('ds'):
+            np.testing.assert_array_equal(loaded[column].to_numpy(), expected[column].to_numpy())
+
+
+def test_store_entries_go_stale_with_their_source(converted, tmp_path):
+    _, store = converted
+    source = tmp_path / 'JAPAN_model.json'
+    shutil.copy2(MODELS['JAPAN'], source)
+
+    assert store.is_current('JAPAN', str(source))
+    os.utime(source, ns=(0, 0))
+    assert not store.is_current('JAPAN', str(source))
+
+
+def test_unreadable_store_is_ignored(tmp_path):
+    path = tmp_path / 'broken.store'
+    path.write_bytes(b'not a store')
+
+    assert open_model_store(str(path)) is None
+    assert open_model_store(str(tmp_path / 'missing.store')) is None
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from reconciliation import RECONCILIATION_METHODS, HierarchyReconciler, shrink_covariance
+
+
+@pytest.fixture
+def reconciler():
+    rng = np.random.default_rng(0)
+    residuals = rng.normal(size=(60, 5)) * [50, 10, 20, 5, 15]
+    return HierarchyReconciler(['A', 'B', 'C', 'D'], residuals)
+
+
+@pytest.mark.parametrize('method', RECONCILIATION_METHODS)
+def test_reconciled_forecasts_are_coherent(reconciler, method):
+    rng = np.random.default_rng(1)
+    countries = rng.uniform(100, 1000, size=(4, 12))
+    aggregate = countries.sum(axis=0) * 1.1
+
+    total, bottom = reconciler.reconcile(aggregate, countries, method)
+
+    np.testing.assert_allclose(bottom.sum(axis=0), total, rtol=1e-9)
+
+
+@pytest.mark.parametrize('method', RECONCILIATION_METHODS)
+def test_coherent_forecasts_are_unchanged(reconciler, method):
+    countries = np.arange(1, 25, dtype=float).reshape(4, 6)
+
+    total, bottom = reconciler.reconcile(countries.sum(axis=0), countries, method)
+
+    np.testing.assert_allclose(bottom, countries, rtol=1e-9)
+
+
+def test_align_reorders_countries(reconciler):
+    countries = np.arange(8, dtype=float).reshape(4, 2)
+    aligned = reconciler.align(['D', 'C', 'B', 'A'], countries)
+
+    np.testing.assert_array_equal(aligned, countries[::-1])
+
+
+def test_shrinkage_is_a_weight():
+    rng = np.random.default_rng(2)
+    covariance, shrinkage = shrink_covariance(rng.normal(size=(30, 6)))
+
+    assert 0.0 <= shrinkage <= 1.0
+    assert np.all(np.linalg.eigvalsh(covariance) > 0)
@@ -0,0 +1,103 @@
+import pytest
+
+from forecast_engine import BatchForecastEngine
+from instrumentation import finish_profile, start_profile
+from scenarios import Scenario
+from utils import create_future_features
+
+
+def _scenarios(client, *scenarios, **options):
+    return client.post('/forecast-scenarios', json={
+        'start_date': '2027-01-01', 'months_to_forecast': 12, 'scenarios': list(scenarios), **options
+    })
+
+
+def test_uniform_effect_scales_every_forecast(client):
+    body = _scenarios(client, {
+        'name': 'slump', 'shocks': [{'effect': -0.1, 'start': '2027-01-01', 'end': '2027-12-01'}]
+    }).get_json()
+
+    assert body['success']
+    result = body['data'][0]
+    assert result['name'] == 'slump'
+    assert result['aggregated']['delta_pct'] == pytest.approx(-10)
+    for country in result['countries']:
+        assert country['scenario'] == pytest.approx(country['baseline'] * 0.9)
+
+
+def test_effect_outside_the_horizon_changes_nothing(client):
+    body = _scenarios(client, {'shocks': [{'effect': -0.5, 'start': '2030-01-01'}]}).get_json()
+
+    result = body['data'][0]
+    assert result['aggregated']['delta'] == 0
+    assert all(country['delta'] == 0 for country in result['countries'])
+
+
+def test_replayed_shock_lowers_the_forecast(client):
+    body = _scenarios(client, {
+        'shocks': [{'like': 'covid_impact_1', 'start': '2027-03-01', 'months': 6}]
+    }).get_json()
+
+    assert body['success']
+    assert body['data'][0]['aggregated']['delta'] < 0
+
+
+def test_holiday_without_a_fitted_effect_is_rejected(client):
+    response = _scenarios(client, {'name': 'eid', 'shocks': [{'like': "Eid'l Fitr", 'start': '2027-03-01'}]})
+
+    assert response.status_code == 400
+    assert "Eid'l Fitr" in response.get_json()['error']
+
+
+def test_unknown_holiday_is_rejected(client):
+    response = _scenarios(client, {'shocks': [{'like': 'No Such Day', 'start': '2027-03-01'}]})
+
+    assert response.status_code == 400
+    assert 'No Such Day' in response.get_json()['error']
+
+
+def test_include_series_must_be_a_boolean(client):
+    response = _scenarios(client, {'shocks': [{'effect': -0.1, 'start': '2027-01-01'}]}, include_series='false')
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'include_series must be true or false'
+
+
+def test_scenario_prediction_is_timed_as_predict(tourism_model):
+    batch = BatchForecastEngine({'aggregated': tourism_model.aggregated_engine})
+    scenario = Scenario.from_dict({'shocks': [{'like': 'covid_impact_1', 'start': '2027-03-01'}]})
+
+    profile = start_profile('test')
+    try:
+        batch.unreplayable(scenario.holidays)
+        assert 'predict' not in profile.stages
+        batch.predict_scenarios(create_future_features('2027-01-01', 12), [scenario])
+        assert profile.stages['predict'] > 0
+    finally:
+        finish_profile()
+
+
+def test_scenarios_use_the_engine_after_a_reload(tourism_model, monkeypatch):
+    def reload_without_engine():
+        monkeypatch.setattr(tourism_model, 'aggregated_engine', None)
+
+    monkeypatch.setattr(tourism_model, 'refresh_models', reload_without_engine)
+    scenario = Scenario.from_dict({'shocks': [{'effect': -0.1, 'start': '2027-01-01'}]})
+    result = tourism_model.forecast_scenarios('2027-01-01', 12, [scenario])
+
+    assert not result['success']
+    assert 'not loaded' in result['error']
+
+
+@pytest.mark.parametrize('spec, error', [
+    ({'name': 's', 'conditions': [{'start': '2027-01-01', 'pre_covid': 'false'}]},
+     's.conditions[0].pre_covid must be true or false'),
+    ({'name': 's', 'shocks': ['covid_impact_1']}, 's.shocks[0] must be an object'),
+    ({'name': 's', 'conditions': [None]}, 's.conditions[0] must be an object'),
+    ({'name': 's', 'shocks': {'effect': -0.1}}, 's.shocks must be a list'),
+])
+def test_malformed_scenarios_are_rejected(client, spec, error):
+    response = _scenarios(client, spec)
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == error
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from dateutil.relativedelta import relativedelta
+
+from utils import (COVID_OUTBREAK_DATE, COVID_RECOVERY_DATE, FEATURE_COLUMNS, add_future_features,
+                   create_future_dataframe, create_future_features, nullable_values)
+
+
+def _reference_dates(start_date, months):
+    """The original loop: add one month at a time with relativedelta"""
+    dates = []
+    current = datetime.strptime(start_date, '%Y-%m-%d')
+    for _ in range(months):
+        dates.append(current)
+        current = current + relativedelta(months=1)
+    return dates
+
+
+@pytest.mark.parametrize('start_date', ['2024-01-01', '2024-01-31', '2023-03-30', '2024-02-29'])
+def test_future_dates_match_relativedelta_steps(start_date):
+    ds = create_future_dataframe(start_date, 30)['ds']
+
+    assert list(ds) == [pd.Timestamp(date) for date in _reference_dates(start_date, 30)]
+
+
+def test_empty_and_invalid_horizons():
+    assert len(create_future_dataframe('2024-01-01', 0)) == 0
+    with pytest.raises(Exception, match='Error creating future dataframe'):
+        create_future_dataframe('2024-13-01', 3)
+
+
+def test_features_match_per_row_definitions():
+    df = add_future_features(create_future_dataframe('2019-06-01', 60))
+
+    assert list(df.columns) == ['ds'] + FEATURE_COLUMNS
+    outbreak, recovery = pd.Timestamp(COVID_OUTBREAK_DATE), pd.Timestamp(COVID_RECOVERY_DATE)
+    for row in df.itertuples(index=False):
+        assert row.pre_covid == (row.ds < outbreak)
+        assert row.has_covid == (outbreak < row.ds < recovery)
+        months = [getattr(row, column) for column in FEATURE_COLUMNS[2:]]
+        assert months == [int(month == row.ds.month) for month in range(1, 13)]
+
+
+def test_memoized_features_are_returned_as_copies():
+    first = create_future_features('2025-01-01', 12)
+    first['pre_covid'] = True
+    second = create_future_features('2025-01-01', 12)
+
+    assert not second['pre_covid'].any()
+    np.testing.assert_array_equal(second['ds'], create_future_dataframe('2025-01-01', 12)['ds'])
+
+
+def test_nullable_values_replaces_nan_with_none():
+    values = nullable_values(np.array([1.5, np.nan, 3.0]))
+
+    assert values.dtype == object
+    assert values.tolist() == [1.5, None, 3.0]
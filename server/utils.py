@@ -1,23 +1,63 @@
-from datetime import datetime, timedelta
-from dateutil.relativedelta import relativedelta
+from datetime import datetime
+from functools import lru_cache
+import numpy as np
 import pandas as pd
+from instrumentation import timed
 
 COVID_OUTBREAK_DATE = '2020-02-01'
 COVID_RECOVERY_DATE = '2023-07-01'
 
+MONTHS = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+FEATURE_COLUMNS = ['pre_covid', 'has_covid'] + [f'is_{month}' for month in MONTHS]
+
+FUTURE_FRAME_CACHE_SIZE = 512
+
+def _monthly_dates(start_dt, months_to_forecast):
+    """start_dt plus 0..n-1 months, stepping one month at a time like repeated relativedelta(months=1)"""
+    periods = pd.period_range(start_dt, periods=months_to_forecast, freq='M')
+    # A day past the end of a short month is clipped and stays clipped for later months
+    days = np.minimum.accumulate(np.minimum(periods.days_in_month.to_numpy(), start_dt.day))
+    time_of_day = pd.Timestamp(start_dt) - pd.Timestamp(start_dt).normalize()
+    return periods.to_timestamp() + pd.to_timedelta(days - 1, unit='D') + time_of_day
+
 def create_future_dataframe(start_date, months_to_forecast):
-    try:
-        start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-        
-        future_dates = []
-        current_date = start_dt
-        
-        for i in range(months_to_forecast):
-            future_dates.append(current_date)
-            current_date = current_date + relativedelta(months=1)
-        
-        future_df = pd.DataFrame({'ds': future_dates})
-        return future_df
-        
-    except Exception as e:
-        raise Exception(f"Error creating future dataframe: {str(e)}")
\ No newline at end of file
+    with timed('future_frame'):
+        try:
+            start_dt = datetime.strptime(start_date, '%Y-%m-%d')
+            return pd.DataFrame({'ds': _monthly_dates(start_dt, max(int(months_to_forecast), 0))})
+        except Exception as e:
+            raise Exception(f"Error creating future dataframe: {str(e)}")
+
+@timed('features')
+def add_future_features(df):
+    """Add the COVID condition flags and is_<month> one-hot columns for df['ds'] in place"""
+    ds = pd.DatetimeIndex(df['ds'])
+    outbreak = pd.Timestamp(COVID_OUTBREAK_DATE)
+    recovery = pd.Timestamp(COVID_RECOVERY_DATE)
+
+    df['pre_covid'] = np.asarray(ds < outbreak)
+    df['has_covid'] = np.asarray((ds > outbreak) & (ds < recovery))
+
+    one_hot = (ds.month.to_numpy()[:, None] == np.arange(1, 13)).astype(int)
+    df[FEATURE_COLUMNS[2:]] = pd.DataFrame(one_hot, index=df.index, columns=FEATURE_COLUMNS[2:])
+    return df
+
+@lru_cache(maxsize=FUTURE_FRAME_CACHE_SIZE)
+def _cached_future_features(start_date, months_to_forecast):
+    return add_future_features(create_future_dataframe(start_date, months_to_forecast))
+
+def create_future_features(start_date, months_to_forecast):
+    """Future dataframe with `ds` and every feature column, memoized per (start, horizon).
+
+    Returns a copy, so callers may add or overwrite columns.
+    """
+    with timed('future_frame'):
+        return _cached_future_features(str(start_date), int(months_to_forecast)).copy()
+
+
+def nullable_values(values):
+    """Float values as an object array with None where they are NaN, for JSON records"""
+    values = np.asarray(values, dtype=float)
+    nullable = values.astype(object)
+    nullable[np.isnan(values)] = None
+    return nullable